@@ -0,0 +1,75 @@
+"""一括描画のベンチマーク.
+
+大量の図形を1つずつ描画した場合と一括描画した場合で、コマンドバッファへの記録と
+コマンド数を比較する。
+
+    python bench/bench_batch.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import timeit
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from headless import HeadlessRenderer  # noqa: E402
+from values import Position, Size, Rect, Color  # noqa: E402
+
+#: 図形の数
+SHAPE_COUNT = 5000
+#: 計測の繰り返し回数
+NUMBER = 20
+
+
+def main() -> None:
+    color = Color(255, 255, 0)
+    rects = array('d')
+    for i in range(SHAPE_COUNT):
+        rects.extend((i % 600, i // 600 * 4, 3, 3))
+    rect_list = [
+        Rect(Position(rects[i], rects[i + 1]), Size(rects[i + 2], rects[i + 3]))
+        for i in range(0, len(rects), 4)
+    ]
+    circles = array('d')
+    for i in range(SHAPE_COUNT):
+        circles.extend((i % 600, i // 600 * 4, 2))
+
+    renderer = HeadlessRenderer()
+
+    def single_rects():
+        for rect in rect_list:
+            renderer.draw_rect(rect, color)
+        renderer.flush()
+
+    def batch_rects():
+        renderer.draw_rects(rects, color)
+        renderer.flush()
+
+    def single_circles():
+        for i in range(0, len(circles), 3):
+            renderer.draw_circle((circles[i], circles[i + 1]), circles[i + 2], color)
+        renderer.flush()
+
+    def batch_circles():
+        renderer.draw_circles(circles, color)
+        renderer.flush()
+
+    print(f'{SHAPE_COUNT} shapes {"ms":>10} {"commands":>10}')
+    for (name, func) in [
+            ('single rects', single_rects),
+            ('batch rects', batch_rects),
+            ('single circles', single_circles),
+            ('batch circles', batch_circles)]:
+        renderer.take_counts()
+        func()
+        commands = sum(renderer.take_counts().values())
+        ms = timeit.timeit(func, number=NUMBER) / NUMBER * 1000
+        renderer.take_counts()
+        print(f'{name:18} {ms:10.3f} {commands:10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""衝突判定のベンチマーク.
+
+ランダムに動く物体について、ブロードフェーズごとに移動の反映と1回の判定にかかる時間を計測する。
+総当たりは物体数が少ない場合だけ、移動後の同じ物体について計測し、衝突数が一致するか確かめる。
+
+    python bench/bench_collision.py
+    python bench/bench_collision.py --counts 1000 10000 50000 --ticks 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from collision import (  # noqa: E402
+    CollisionWorld, SpatialHashBroadPhase, SweepAndPruneBroadPhase, DEFAULT_GRID_DIVISIONS)
+from values import Position, Size, Rect  # noqa: E402
+
+#: 物体の大きさ
+BODY_SIZE = Size(8, 8)
+#: 1回の判定での移動量の最大
+MAX_SPEED = 2.0
+#: 総当たりを計測する物体数の上限
+BRUTE_FORCE_LIMIT = 2000
+
+
+def create_world_size(count: int) -> Size:
+    """物体の密度が一定になるワールドの大きさ(物体1つあたり32×32)."""
+    side = math.sqrt(count) * 32
+    return Size(side, side)
+
+
+def measure(name: str, count: int, ticks: int, broad_phase_factory) -> tuple[list[Rect], int]:
+    """1回の判定の時間を計測して表示する.
+
+    :return: (移動後の物体の矩形, 衝突数)
+    """
+    rng = random.Random(0)
+    world_size = create_world_size(count)
+    positions = [[rng.uniform(0, world_size.width), rng.uniform(0, world_size.height)] for _ in range(count)]
+    velocities = [(rng.uniform(-MAX_SPEED, MAX_SPEED), rng.uniform(-MAX_SPEED, MAX_SPEED)) for _ in range(count)]
+
+    world = CollisionWorld(world_size, broad_phase_factory(world_size))
+    for (item, (x, y)) in enumerate(positions):
+        world.add(item, Rect(Position(x, y), BODY_SIZE))
+    world.find_collisions()
+
+    move_time = 0.0
+    find_time = 0.0
+    for _ in range(ticks):
+        rects = []
+        for (position, (dx, dy)) in zip(positions, velocities):
+            position[0] += dx
+            position[1] += dy
+            rects.append(Rect(Position(position[0], position[1]), BODY_SIZE))
+        start = time.perf_counter()
+        for (item, rect) in enumerate(rects):
+            world.move(item, rect)
+        middle = time.perf_counter()
+        world.find_collisions()
+        end = time.perf_counter()
+        move_time += middle - start
+        find_time += end - middle
+
+    print(f'{name:16} {count:8}  move {move_time / ticks * 1000:8.2f} ms  find {find_time / ticks * 1000:8.2f} ms'
+          f'  candidates {world.candidate_count:8}  collisions {world.collision_count:6}')
+    rects = [Rect(Position(x, y), BODY_SIZE) for (x, y) in positions]
+    return rects, world.collision_count
+
+
+def measure_brute_force(rects: list[Rect]) -> int:
+    """総当たりの時間を計測して表示する.
+
+    :param rects: 物体の矩形
+    :return: 衝突数
+    """
+    count = len(rects)
+    start = time.perf_counter()
+    collisions = [
+        (i, j)
+        for (i, rect) in enumerate(rects) for j in range(i + 1, count)
+        if rect.intersects_with_rect(rects[j])
+    ]
+    elapsed = time.perf_counter() - start
+    print(f'{"brute force":16} {count:8}  {"":16}  find {elapsed * 1000:8.2f} ms  collisions {len(collisions):6}')
+    return len(collisions)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000, 10000, 50000], help='物体数')
+    parser.add_argument('--ticks', type=int, default=5, help='計測する判定の回数')
+    args = parser.parse_args()
+
+    for count in args.counts:
+        results = [
+            measure('spatial hash', count, args.ticks, lambda world_size: SpatialHashBroadPhase(
+                max(world_size.width, world_size.height) / DEFAULT_GRID_DIVISIONS)),
+            measure('spatial hash 16', count, args.ticks, lambda world_size: SpatialHashBroadPhase(16)),
+            measure('sweep and prune', count, args.ticks, lambda world_size: SweepAndPruneBroadPhase()),
+        ]
+        if count <= BRUTE_FORCE_LIMIT:
+            # 乱数の種が同じなので、どのブロードフェーズも移動後の矩形は同じ
+            (rects, _) = results[0]
+            expected = measure_brute_force(rects)
+            for (_, collision_count) in results:
+                if collision_count != expected:
+                    raise AssertionError(f'collisions({collision_count}) != brute force({expected})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""エンティティの更新のベンチマーク.
+
+エンティティごとのオブジェクトのメソッドを呼ぶ場合と、EntityStoreの列をシステムでまとめて更新する場合を比較する。
+
+    python bench/bench_entities.py --count 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import model  # noqa: E402
+from model import EntityStore, POSITION, VELOCITY, move_system  # noqa: E402
+
+#: デルタ秒
+DELTA = 1.0 / 30
+
+
+class LegacyEntity:
+    """エンティティごとのオブジェクト(比較用)."""
+
+    def __init__(self, x: float, y: float, dx: float, dy: float):
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+
+    def update(self, delta: float) -> None:
+        self.x += self.dx * delta
+        self.y += self.dy * delta
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100_000, help='エンティティ数')
+    parser.add_argument('--number', type=int, default=20, help='計測する更新の回数')
+    args = parser.parse_args()
+
+    legacy = [LegacyEntity(i, i, 1, 2) for i in range(args.count)]
+
+    def update_legacy() -> None:
+        for entity in legacy:
+            entity.update(DELTA)
+
+    store = EntityStore()
+    store.register(POSITION)
+    store.register(VELOCITY)
+    for i in range(args.count):
+        store.create(position=(i, i), velocity=(1, 2))
+
+    legacy_ms = timeit.timeit(update_legacy, number=args.number) / args.number * 1000
+    system_ms = timeit.timeit(lambda: move_system(store, DELTA), number=args.number) / args.number * 1000
+    print(f'entities:        {args.count}  ({"numpy" if model.numpy is not None else "array"})')
+    print(f'per-object ms:   {legacy_ms:10.2f}')
+    print(f'move_system ms:  {system_ms:10.2f}  (x{system_ms / legacy_ms:.2f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""GameModel + GameViewのフレームベンチマーク.
+
+ブラウザなしでGameModel、GameViewを動かし、決まった入力を流しながらNフレーム実行して
+1フレームあたりのコストを計測する。結果はJSONで出力でき、--compareで以前の結果と比較できる。
+
+    python bench/bench_frame.py --frames 3000 --output result.json
+    python bench/bench_frame.py --compare result.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import typing as tp
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from headless import HeadlessRenderer, InstantImageLoader, estimate_text_surface  # noqa: E402
+from input import VirtualKey, InputState, OperationParam, InputQueue  # noqa: E402
+from model import GameModel  # noqa: E402
+from text_cache import TextSurfaceCache  # noqa: E402
+from values import Position, Size  # noqa: E402
+from view import GameView  # noqa: E402
+
+#: 1フレームの秒数
+STEP = 1.0 / 30
+#: 画面サイズ
+SCREEN_SIZE = Size(600, 400)
+
+
+def create_script(frames: int, moves_per_frame: int = 4) -> list[list[OperationParam]]:
+    """フレームごとの入力を作る.
+
+    マウスを円を描くように動かし、定期的にボタンをクリックしてキーを押す。
+    """
+    script = []
+    for frame in range(frames):
+        params = []
+        for i in range(moves_per_frame):
+            angle = (frame * moves_per_frame + i) * 0.05
+            position = Position(300 + math.cos(angle) * 200, 200 + math.sin(angle) * 150)
+            params.append(OperationParam(VirtualKey.MouseMove, InputState.Press, position))
+        if frame % 30 == 0:
+            button_position = Position(20, 60)
+            params.append(OperationParam(VirtualKey.MouseLeft, InputState.Press, button_position))
+            params.append(OperationParam(VirtualKey.MouseLeft, InputState.Release, button_position))
+        if frame % 45 == 0:
+            params.append(OperationParam(VirtualKey.Space, InputState.Press))
+            params.append(OperationParam(VirtualKey.Space, InputState.Release))
+        script.append(params)
+    return script
+
+
+def create_game(
+        text_cache: bool = False,
+        layered: bool = False) -> tuple[GameModel, GameView, HeadlessRenderer]:
+    """ベンチマーク用のモデルとビューを作る.
+
+    :param text_cache: 描画済み文字列のキャッシュを使うか
+    :param layered: 描画レイヤーを使うか
+    """
+    model = GameModel(world_size=SCREEN_SIZE, log_func=lambda mes: None)
+    cache = TextSurfaceCache(estimate_text_surface) if text_cache else None
+    renderer = HeadlessRenderer(SCREEN_SIZE, text_cache=cache)
+    loader = InstantImageLoader(['image.png'])
+    view = GameView(model, renderer, loader, log_func=lambda mes: None, layered=layered)
+    return model, view, renderer
+
+
+def run_frames(
+        script: list[list[OperationParam]],
+        text_cache: bool = False,
+        layered: bool = False) -> dict[str, tp.Any]:
+    """時間と描画コマンド数を計測する."""
+    (model, view, renderer) = create_game(text_cache, layered)
+    input_queue = InputQueue()
+    times = {'input': 0.0, 'update': 0.0, 'draw': 0.0}
+    draw_calls = 0
+    state_changes = 0
+    perf_counter = time.perf_counter
+
+    start = perf_counter()
+    for params in script:
+        t0 = perf_counter()
+        for param in params:
+            input_queue.push(param)
+        input_queue.dispatch(view.operate)
+        t1 = perf_counter()
+        model.update(STEP)
+        t2 = perf_counter()
+        view.draw()
+        t3 = perf_counter()
+
+        times['input'] += t1 - t0
+        times['update'] += t2 - t1
+        times['draw'] += t3 - t2
+
+        counts = renderer.take_counts()
+        draw_calls += HeadlessRenderer.count_draw_calls(counts)
+        state_changes += sum(counts.values()) - HeadlessRenderer.count_draw_calls(counts)
+    elapsed = perf_counter() - start
+
+    frames = len(script)
+    return {
+        'fps': frames / elapsed,
+        'frame_ms': elapsed / frames * 1000,
+        'phase_ms': {key: value / frames * 1000 for (key, value) in times.items()},
+        'draw_calls_per_frame': draw_calls / frames,
+        'state_commands_per_frame': state_changes / frames,
+        'merged_inputs': input_queue.merged_count,
+    }
+
+
+def measure_allocations(
+        script: list[list[OperationParam]],
+        text_cache: bool = False,
+        layered: bool = False) -> dict[str, float]:
+    """1フレームあたりのメモリ確保量を計測する.
+
+    tracemalloc は実行を遅くするので、時間の計測とは別に実行する。
+    フレーム中のピークとフレーム開始時の差を、そのフレームで一時的に確保した量とみなす。
+    """
+    (model, view, renderer) = create_game(text_cache, layered)
+    input_queue = InputQueue()
+    peak_total = 0
+    blocks_total = 0
+
+    tracemalloc.start()
+    for params in script:
+        tracemalloc.reset_peak()
+        (start_bytes, _) = tracemalloc.get_traced_memory()
+        start_blocks = sys.getallocatedblocks()
+        for param in params:
+            input_queue.push(param)
+        input_queue.dispatch(view.operate)
+        model.update(STEP)
+        view.draw()
+        (_, peak_bytes) = tracemalloc.get_traced_memory()
+        peak_total += peak_bytes - start_bytes
+        blocks_total += sys.getallocatedblocks() - start_blocks
+        renderer.take_counts()
+    tracemalloc.stop()
+
+    frames = len(script)
+    return {
+        'alloc_peak_bytes_per_frame': peak_total / frames,
+        'retained_blocks_per_frame': blocks_total / frames,
+    }
+
+
+def git_commit() -> tp.Optional[str]:
+    """計測したコミット."""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run(frames: int, warmup: int, text_cache: bool = False, layered: bool = False) -> dict[str, tp.Any]:
+    """ベンチマークを実行する."""
+    run_frames(create_script(warmup), text_cache, layered)
+    script = create_script(frames)
+    result = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'frames': frames,
+        'text_cache': text_cache,
+        'layered': layered,
+    }
+    result.update(run_frames(script, text_cache, layered))
+    result.update(measure_allocations(script, text_cache, layered))
+    return result
+
+
+def print_result(result: dict[str, tp.Any], base: tp.Optional[dict[str, tp.Any]] = None) -> None:
+    """結果を表示する."""
+
+    def flatten(data: dict[str, tp.Any], prefix: str = '') -> dict[str, float]:
+        items = {}
+        for (key, value) in data.items():
+            if isinstance(value, dict):
+                items.update(flatten(value, f'{prefix}{key}.'))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                items[prefix + key] = value
+        return items
+
+    current = flatten(result)
+    previous = flatten(base) if base is not None else {}
+    print(f'commit: {result["commit"]}  python: {result["python"]}')
+    for (key, value) in current.items():
+        line = f'{key:32} {value:12.4f}'
+        if key in previous and previous[key]:
+            line += f'  (base {previous[key]:12.4f}, x{value / previous[key]:.2f})'
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=3000, help='計測するフレーム数')
+    parser.add_argument('--warmup', type=int, default=300, help='計測前に実行するフレーム数')
+    parser.add_argument('--text-cache', action='store_true', help='描画済み文字列のキャッシュを使う')
+    parser.add_argument('--layered', action='store_true', help='描画レイヤーを使う')
+    parser.add_argument('--output', help='結果を書き出すJSONファイル')
+    parser.add_argument('--compare', help='比較する以前の結果のJSONファイル')
+    args = parser.parse_args()
+
+    result = run(args.frames, args.warmup, args.text_cache, args.layered)
+
+    base = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            base = json.load(file)
+    print_result(result, base)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
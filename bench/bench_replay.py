@@ -0,0 +1,106 @@
+"""記録した入力の再生ベンチマーク.
+
+記録した入力をブラウザなしでGameModel、GameViewに流し、最速で再生して1フレームあたりのコストを計測する。
+記録ファイルを指定しなければ、bench_frameと同じ入力でプレイして記録してから再生する。
+記録にチェックサムがあれば、再生後のモデルの状態と比べて、一致しなければ失敗する。
+
+    python bench/bench_replay.py --save session.bin
+    python bench/bench_replay.py session.bin
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_frame import STEP, create_game, create_script  # noqa: E402
+from headless import HeadlessRenderer  # noqa: E402
+from input import InputQueue  # noqa: E402
+from input_record import InputLog, InputRecorder, InputReplayer  # noqa: E402
+from loop import GameLoop, ManualClock  # noqa: E402
+
+#: 記録時に処理落ちさせる間隔(フレーム)。そのフレームでは2ステップ分の時間が経つ
+LAG_INTERVAL = 7
+
+
+def record(frames: int) -> InputLog:
+    """bench_frameと同じ入力でプレイして記録する.
+
+    LAG_INTERVALごとに処理落ちさせるので、更新しないフレームと2回更新するフレームが混ざる。
+    """
+    (model, view, _) = create_game()
+    recorder = InputRecorder()
+    input_queue = InputQueue()
+    input_queue.add_listener(recorder.record_frame)
+    script = iter(create_script(frames))
+
+    def process_input() -> None:
+        for param in next(script):
+            input_queue.push(param)
+        input_queue.dispatch(view.operate)
+
+    def update(delta: float) -> None:
+        model.update(delta)
+        recorder.record_update(delta)
+
+    clock = ManualClock()
+    loop = GameLoop(clock, update, view.draw, step=STEP, process_input=process_input)
+    for frame in range(frames):
+        loop.tick()
+        clock.advance(STEP * 2 if frame % LAG_INTERVAL == 0 else STEP)
+    return recorder.to_log(checksum=model.to_save_data().checksum)
+
+
+def replay(log: InputLog, text_cache: bool = False, layered: bool = False) -> None:
+    """再生して結果を表示する."""
+    (model, view, renderer) = create_game(text_cache, layered)
+    draw_calls = 0
+
+    def draw() -> None:
+        nonlocal draw_calls
+        view.draw()
+        draw_calls += HeadlessRenderer.count_draw_calls(renderer.take_counts())
+
+    result = InputReplayer(
+        log, view.operate, model.update, draw, step=STEP,
+        checksum=lambda: model.to_save_data().checksum).run()
+    if result.is_reproduced is False:
+        raise AssertionError(f'checksum({result.checksum:08x}) != recorded({result.expected_checksum:08x})')
+    print(f'frames:     {result.frame_count}')
+    print(f'inputs:     {result.input_count}')
+    print(f'updates:    {result.update_count}')
+    print(f'draws:      {result.draw_count}')
+    print(f'draw calls: {draw_calls}')
+    print(f'model time: {model.time:.4f}')
+    print(f'checksum:   {result.checksum:08x} (reproduced: {result.is_reproduced})')
+    print(f'fps:        {result.frame_count / result.elapsed:.1f}')
+    print(f'frame_ms:   {result.elapsed / result.frame_count * 1000:.4f}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('log', nargs='?', help='再生する記録ファイル')
+    parser.add_argument('--frames', type=int, default=3000, help='記録ファイルがない場合に記録するフレーム数')
+    parser.add_argument('--save', help='記録した入力を書き出すファイル')
+    parser.add_argument('--text-cache', action='store_true', help='描画済み文字列のキャッシュを使う')
+    parser.add_argument('--layered', action='store_true', help='描画レイヤーを使う')
+    args = parser.parse_args()
+
+    if args.log:
+        log = InputLog.load(args.log)
+    else:
+        log = record(args.frames)
+    raw_size = len(log.to_bytes(compress=False))
+    compressed_size = len(log.to_bytes(compress=True))
+    print(f'log size:   {raw_size} bytes ({compressed_size} bytes compressed)')
+    if args.save:
+        log.save(args.save)
+
+    replay(log, args.text_cache, args.layered)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""セーブデータのベンチマーク.
+
+エンティティを持つGameModelを保存・読み込みし、単純なJSONとバイナリ形式(全体・差分)の
+大きさと時間を比較する。エンティティの半分は動き、半分は止まっている。
+
+    python bench/bench_save.py --count 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from model import GameModel  # noqa: E402
+from save_data import SaveData  # noqa: E402
+from values import Size  # noqa: E402
+
+#: デルタ秒
+DELTA = 1.0 / 30
+
+
+def create_model(count: int) -> GameModel:
+    """ベンチマーク用のモデルを作る."""
+    model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None)
+    for i in range(count):
+        if i % 2 == 0:
+            model.entities.create(position=(i, i), velocity=(1, 2))
+        else:
+            model.entities.create(position=(i, i))
+    model.update(DELTA)
+    return model
+
+
+def to_json(model: GameModel) -> str:
+    """単純なJSONに変換する(比較用)."""
+    entities = []
+    for archetype in model.entities.query():
+        for (row, entity) in enumerate(archetype.entities):
+            entities.append({
+                'id': entity,
+                'components': {name: archetype.get(row, name) for name in archetype.component_names},
+            })
+    return json.dumps({'time': model.time, 'tick': model.tick, 'entities': entities})
+
+
+def from_json(model: GameModel, text: str) -> None:
+    """単純なJSONから読み込む(比較用。IDは保たない)."""
+    data = json.loads(text)
+    model.time = data['time']
+    model.tick = data['tick']
+    for entity in data['entities']:
+        model.entities.create(**entity['components'])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100_000, help='エンティティ数')
+    parser.add_argument('--number', type=int, default=5, help='計測する回数')
+    args = parser.parse_args()
+
+    model = create_model(args.count)
+    number = args.number
+
+    def measure(func) -> float:
+        return timeit.timeit(func, number=number) / number * 1000
+
+    text = to_json(model)
+    json_save_ms = measure(lambda: to_json(model))
+    json_load_ms = measure(lambda: from_json(create_model(0), text))
+
+    base = model.to_save_data()
+    raw = base.to_bytes(compress=False)
+    compressed = base.to_bytes()
+    binary_save_ms = measure(lambda: model.to_save_data().to_bytes(compress=False))
+    compressed_save_ms = measure(lambda: model.to_save_data().to_bytes())
+    binary_load_ms = measure(lambda: create_model(0).restore(SaveData.from_bytes(raw)))
+    compressed_load_ms = measure(lambda: create_model(0).restore(SaveData.from_bytes(compressed)))
+
+    # 動いているエンティティだけが差分に入る
+    model.update(DELTA)
+    delta = model.to_save_data().to_delta_bytes(base)
+    delta_save_ms = measure(lambda: model.to_save_data().to_delta_bytes(base))
+
+    print(f'entities: {args.count}')
+    print(f'{"":18} {"bytes":>12} {"save ms":>10} {"load ms":>10}')
+    print(f'{"json":18} {len(text.encode()):12} {json_save_ms:10.2f} {json_load_ms:10.2f}')
+    print(f'{"binary":18} {len(raw):12} {binary_save_ms:10.2f} {binary_load_ms:10.2f}')
+    print(f'{"binary+zlib":18} {len(compressed):12} {compressed_save_ms:10.2f} {compressed_load_ms:10.2f}')
+    print(f'{"delta+zlib":18} {len(delta):12} {delta_save_ms:10.2f} {"":>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""valuesモジュールの値オブジェクトのベンチマーク.
+
+変更前の@dataclass版と比較して、生成・参照・判定の速度とメモリ使用量を計測する。
+また、Rectを1件ずつ判定する場合とRectArrayでまとめて判定する場合を比較する。
+
+    python bench/bench_values.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import timeit
+import tracemalloc
+import typing as tp
+from dataclasses import dataclass
+from numbers import Real
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import rect_array  # noqa: E402
+import values  # noqa: E402
+
+#: 計測の繰り返し回数
+NUMBER = 200_000
+#: メモリ計測で生成する矩形の数
+RECT_COUNT = 100_000
+#: まとめて判定する矩形の数
+BATCH_COUNT = 2_000
+#: まとめて判定する相手の矩形の数
+REGION_COUNT = 50
+
+
+@dataclass
+class LegacyPosition:
+    x: Real = 0
+    y: Real = 0
+
+
+@dataclass
+class LegacySize:
+    width: Real
+    height: Real
+
+
+@dataclass
+class LegacyRect:
+    position: LegacyPosition
+    size: LegacySize
+
+    @property
+    def left(self) -> Real:
+        return self.position.x
+
+    @property
+    def right(self) -> Real:
+        return self.position.x + self.size.width
+
+    @property
+    def top(self) -> Real:
+        return self.position.y
+
+    @property
+    def bottom(self) -> Real:
+        return self.position.y + self.size.height
+
+    def contains_point(self, point: LegacyPosition) -> bool:
+        is_x = self.left <= point.x <= self.right
+        is_y = self.top <= point.y <= self.bottom
+        return is_x and is_y
+
+    def intersects_with_rect(self, other: LegacyRect) -> bool:
+        is_x = other.left <= self.right and self.left <= other.right
+        is_y = other.top <= self.bottom and self.top <= other.bottom
+        return is_x and is_y
+
+    @classmethod
+    def _from_edges(cls, left: Real, top: Real, right: Real, bottom: Real) -> LegacyRect:
+        # 変更前は上下左右から作る手段がなく、位置と大きさを作っていた
+        return cls(LegacyPosition(left, top), LegacySize(right - left, bottom - top))
+
+    def union_with_rect(self, other: LegacyRect) -> LegacyRect:
+        left = min(self.left, other.left)
+        top = min(self.top, other.top)
+        right = max(self.right, other.right)
+        bottom = max(self.bottom, other.bottom)
+        return LegacyRect(LegacyPosition(left, top), LegacySize(right - left, bottom - top))
+
+    def clip_with_rect(self, other: LegacyRect) -> tp.Optional[LegacyRect]:
+        if not self.intersects_with_rect(other):
+            return None
+        left = max(self.left, other.left)
+        top = max(self.top, other.top)
+        right = min(self.right, other.right)
+        bottom = min(self.bottom, other.bottom)
+        return LegacyRect(LegacyPosition(left, top), LegacySize(right - left, bottom - top))
+
+
+def _measure(position_type, size_type, rect_type) -> dict[str, float]:
+    """1回あたりの時間(ナノ秒)とメモリ(バイト)を計測する."""
+    rect = rect_type(position_type(10, 20), size_type(30, 40))
+    other = rect_type(position_type(20, 30), size_type(40, 50))
+    point = position_type(15, 25)
+
+    def ns(func) -> float:
+        return timeit.timeit(func, number=NUMBER) / NUMBER * 1e9
+
+    result = {
+        'construct_rect_ns': ns(lambda: rect_type(position_type(10, 20), size_type(30, 40))),
+        'construct_edges_ns': ns(lambda: rect_type._from_edges(10, 20, 40, 60)),
+        'right_ns': ns(lambda: rect.right),
+        'contains_point_ns': ns(lambda: rect.contains_point(point)),
+        'intersects_ns': ns(lambda: rect.intersects_with_rect(other)),
+        'union_ns': ns(lambda: rect.union_with_rect(other)),
+        'clip_ns': ns(lambda: rect.clip_with_rect(other)),
+    }
+
+    tracemalloc.start()
+    rects = [rect_type(position_type(i, i), size_type(10, 10)) for i in range(RECT_COUNT)]
+    (current, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result['bytes_per_rect'] = current / len(rects)
+    return result
+
+
+def _measure_batch() -> tuple[dict[str, float], dict[str, float]]:
+    """1件ずつ判定する場合とまとめて判定する場合の、1判定あたりの時間(ナノ秒)を計測する."""
+    Position = values.Position
+    Size = values.Size
+    rects = [values.Rect(Position(i % 100 * 10, i // 100 * 10), Size(8, 8)) for i in range(BATCH_COUNT)]
+    regions = rects[::BATCH_COUNT // REGION_COUNT]
+    region = values.Rect(Position(100, 100), Size(300, 300))
+    point = Position(155, 155)
+    rect_array_ = rect_array.RectArray(rects)
+    region_array = rect_array.RectArray(regions)
+
+    def ns(func, count: int) -> float:
+        return timeit.timeit(func, number=20) / 20 / count * 1e9
+
+    pairs = len(rects) * len(regions)
+    single = {
+        'batch_contains_ns': ns(lambda: [rect.contains_point(point) for rect in rects], len(rects)),
+        'batch_intersects_ns': ns(lambda: [rect.intersects_with_rect(region) for rect in rects], len(rects)),
+        'batch_pairwise_ns': ns(
+            lambda: [[rect.intersects_with_rect(other) for other in regions] for rect in rects], pairs),
+    }
+    batch = {
+        'batch_contains_ns': ns(lambda: rect_array_.contains_point(point), len(rects)),
+        'batch_intersects_ns': ns(lambda: rect_array_.intersects_rect(region), len(rects)),
+        'batch_pairwise_ns': ns(lambda: rect_array_.intersects(region_array), pairs),
+    }
+    return single, batch
+
+
+def main() -> None:
+    legacy = _measure(LegacyPosition, LegacySize, LegacyRect)
+    current = _measure(values.Position, values.Size, values.Rect)
+    print(f'{"":20} {"legacy":>10} {"current":>10} {"ratio":>6}')
+    for key in legacy:
+        print(f'{key:20} {legacy[key]:10.1f} {current[key]:10.1f} {current[key] / legacy[key]:6.2f}')
+
+    (single, batch) = _measure_batch()
+    backend = 'numpy' if rect_array.numpy is not None else 'array'
+    print(f'{"":20} {"Rect":>10} {"RectArray":>10} {"ratio":>6}  ({backend})')
+    for key in single:
+        print(f'{key:20} {single[key]:10.1f} {batch[key]:10.1f} {batch[key] / single[key]:6.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""スプライトアトラス.
+
+多数の画像を1枚の画像(アトラス)にまとめ、名前ごとにアトラス内の矩形を引けるようにする。
+画像ファイルの読み込みが1回になり、描画時の画像の切り替えも減る。
+"""
+
+from __future__ import annotations
+
+import json
+import typing as tp
+
+from values import Position, Size, Rect
+
+
+class AtlasManifest:
+    """アトラスの目録.
+
+    :param image_file: アトラスの画像ファイル名
+    :param size: アトラスのサイズ
+    :param regions: 名前→アトラス内の矩形
+    """
+
+    def __init__(self, image_file: str, size: Size, regions: tp.Mapping[str, Rect]):
+        if image_file is None:
+            raise ValueError('image_file is None')
+        self._image_file = image_file
+        self._size = size
+        self._regions = dict(regions)
+
+    def __len__(self) -> int:
+        return len(self._regions)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._regions
+
+    @property
+    def image_file(self) -> str:
+        """アトラスの画像ファイル名."""
+        return self._image_file
+
+    @property
+    def size(self) -> Size:
+        """アトラスのサイズ."""
+        return self._size
+
+    @property
+    def names(self) -> tp.KeysView[str]:
+        """含まれる画像の名前."""
+        return self._regions.keys()
+
+    def get(self, name: str) -> tp.Optional[Rect]:
+        """アトラス内の矩形を得る.
+
+        :return: 矩形。含まれていなければNone
+        """
+        return self._regions.get(name)
+
+    def to_json(self) -> str:
+        """JSON文字列に変換する."""
+        regions = {
+            name: [rect.position.x, rect.position.y, rect.size.width, rect.size.height]
+            for (name, rect) in self._regions.items()
+        }
+        data = {
+            'image': self._image_file,
+            'width': self._size.width,
+            'height': self._size.height,
+            'regions': regions,
+        }
+        return json.dumps(data, indent=2)
+
+    @classmethod
+    def from_json(cls, text: str) -> AtlasManifest:
+        """JSON文字列から生成する."""
+        data = json.loads(text)
+        regions = {
+            name: Rect(Position(x, y), Size(width, height))
+            for (name, (x, y, width, height)) in data['regions'].items()
+        }
+        return cls(data['image'], Size(data['width'], data['height']), regions)
+
+
+class AtlasPacker:
+    """画像をアトラスに配置する.
+
+    高さの大きい順に、棚(行)へ左から詰めていく。
+
+    :param max_width: アトラスの最大幅
+    :param padding: 画像同士の間隔。拡大縮小時に隣の画像がにじむのを防ぐ
+    """
+
+    def __init__(self, max_width: int = 2048, padding: int = 1):
+        if max_width <= 0:
+            raise ValueError(f'max_width({max_width}) must be positive.')
+        if padding < 0:
+            raise ValueError(f'padding({padding}) must not be negative.')
+        self._max_width = max_width
+        self._padding = padding
+        self._sizes: dict[str, Size] = {}
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def add(self, name: str, size: Size) -> None:
+        """画像を追加する."""
+        if name in self._sizes:
+            raise ValueError(f'Image({name}) is already exists.')
+        if size.width + self._padding * 2 > self._max_width:
+            raise ValueError(f'Image({name}) is wider than max_width({self._max_width}).')
+        self._sizes[name] = size
+
+    def pack(self, image_file: str) -> AtlasManifest:
+        """画像を配置する.
+
+        :param image_file: アトラスの画像ファイル名
+        """
+        padding = self._padding
+        order = sorted(
+            self._sizes.items(),
+            key=lambda item: (item[1].height, item[1].width),
+            reverse=True)
+
+        regions: dict[str, Rect] = {}
+        x = padding
+        y = padding
+        shelf_height = 0
+        width = 0
+        for (name, size) in order:
+            if x + size.width + padding > self._max_width:
+                # 次の棚へ
+                x = padding
+                y += shelf_height + padding
+                shelf_height = 0
+            regions[name] = Rect(Position(x, y), size)
+            x += size.width + padding
+            shelf_height = max(shelf_height, size.height)
+            width = max(width, x)
+
+        height = y + shelf_height + padding if regions else 0
+        return AtlasManifest(image_file, Size(width, height), regions)
@@ -0,0 +1,331 @@
+"""衝突判定.
+
+ブロードフェーズで衝突しそうな組(候補)を絞り込み、ナローフェーズでRectの判定により確定する。
+全ての組を判定するO(n²)を避け、数万の物体でも毎フレーム判定できるようにする。
+
+ブロードフェーズは2種類から選べる。
+
+- SpatialHashBroadPhase: 一様グリッド。物体の大きさがそろっている場合に向く
+- SweepAndPruneBroadPhase: x軸で掃引する。物体の大きさがまちまちな場合や、疎な場合に向く
+"""
+
+from __future__ import annotations
+
+import typing as tp
+from bisect import bisect_right
+from operator import itemgetter
+
+from values import Rect, Size
+
+T = tp.TypeVar('T')
+
+#: 型：衝突時のコールバック
+CollisionCallback = tp.Callable[[tp.Any, tp.Any], None]
+
+#: ワールドの大きさからセルの大きさを決める時の、長辺の分割数
+DEFAULT_GRID_DIVISIONS = 64
+
+
+class AbstractBroadPhase(tp.Generic[T]):
+    """ブロードフェーズの抽象クラス."""
+
+    def __len__(self) -> int:
+        pass
+
+    def insert(self, item: T, rect: Rect) -> None:
+        """物体を登録する."""
+        pass
+
+    def remove(self, item: T) -> None:
+        """物体の登録を解除する."""
+        pass
+
+    def update(self, item: T, rect: Rect) -> None:
+        """物体の矩形を更新する."""
+        pass
+
+    def clear(self) -> None:
+        """全ての物体の登録を解除する."""
+        pass
+
+    def find_candidates(self) -> list[tuple[T, T]]:
+        """衝突しそうな組を得る.
+
+        同じ組は1回だけ含む。実際には衝突していない組を含むことがある。
+        """
+        pass
+
+
+class SpatialHashBroadPhase(AbstractBroadPhase[T]):
+    """一様グリッドによるブロードフェーズ.
+
+    物体を矩形と重なるセルに登録し、同じセルにある物体同士を候補とする。
+    複数のセルを共有する組は、2つの物体のセル範囲が重なる部分の左上のセルでだけ数える。
+    移動してもセル範囲が変わらなければ、セルへの登録はそのままにする。
+
+    :param cell_size: セルの大きさ。物体の典型的な大きさの1～2倍程度が目安
+    """
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError(f'cell_size({cell_size}) must be positive.')
+        self._cell_size = cell_size
+        self._cells: dict[tuple[int, int], dict[T, None]] = {}
+        #: 物体が2つ以上あるセル
+        self._crowded_cells: set[tuple[int, int]] = set()
+        #: 物体→セル範囲(左、上、右、下)
+        self._ranges: dict[T, tuple[int, int, int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    @property
+    def cell_size(self) -> float:
+        """セルの大きさ."""
+        return self._cell_size
+
+    def insert(self, item: T, rect: Rect) -> None:
+        """物体を登録する."""
+        if item in self._ranges:
+            raise ValueError(f'item({item}) is already registered.')
+        cell_range = self._get_cell_range(rect)
+        self._ranges[item] = cell_range
+        self._add_to_cells(item, cell_range)
+
+    def remove(self, item: T) -> None:
+        """物体の登録を解除する."""
+        self._remove_from_cells(item, self._ranges.pop(item))
+
+    def update(self, item: T, rect: Rect) -> None:
+        """物体の矩形を更新する."""
+        cell_range = self._get_cell_range(rect)
+        old_range = self._ranges[item]
+        if cell_range == old_range:
+            return
+        self._remove_from_cells(item, old_range)
+        self._ranges[item] = cell_range
+        self._add_to_cells(item, cell_range)
+
+    def clear(self) -> None:
+        """全ての物体の登録を解除する."""
+        self._cells.clear()
+        self._crowded_cells.clear()
+        self._ranges.clear()
+
+    def find_candidates(self) -> list[tuple[T, T]]:
+        """同じセルにある物体の組を得る."""
+        ranges = self._ranges
+        cells = self._cells
+        pairs = []
+        for cell in self._crowded_cells:
+            bucket = cells[cell]
+            (x, y) = cell
+            count = len(bucket)
+            items = list(bucket)
+            for i in range(count - 1):
+                item = items[i]
+                (left, top, _, _) = ranges[item]
+                for other in items[i + 1:]:
+                    (other_left, other_top, _, _) = ranges[other]
+                    # 重なる部分の左上のセルでだけ数える
+                    if (left if left > other_left else other_left) == x \
+                            and (top if top > other_top else other_top) == y:
+                        pairs.append((item, other))
+        return pairs
+
+    def _get_cell_range(self, rect: Rect) -> tuple[int, int, int, int]:
+        """矩形と重なるセルの範囲."""
+        size = self._cell_size
+        return (int(rect.left // size), int(rect.top // size),
+                int(rect.right // size), int(rect.bottom // size))
+
+    def _add_to_cells(self, item: T, cell_range: tuple[int, int, int, int]) -> None:
+        """セル範囲に物体を登録する."""
+        (left, top, right, bottom) = cell_range
+        cells = self._cells
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                cell = (x, y)
+                bucket = cells.get(cell)
+                if bucket is None:
+                    cells[cell] = {item: None}
+                else:
+                    bucket[item] = None
+                    self._crowded_cells.add(cell)
+
+    def _remove_from_cells(self, item: T, cell_range: tuple[int, int, int, int]) -> None:
+        """セル範囲から物体の登録を解除する."""
+        (left, top, right, bottom) = cell_range
+        cells = self._cells
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                cell = (x, y)
+                bucket = cells[cell]
+                del bucket[item]
+                count = len(bucket)
+                if count == 1:
+                    self._crowded_cells.discard(cell)
+                elif count == 0:
+                    del cells[cell]
+
+
+class SweepAndPruneBroadPhase(AbstractBroadPhase[T]):
+    """掃引によるブロードフェーズ.
+
+    物体を左端の順に並べておき、物体ごとに左端が自分の右端までにある物体(x軸で重なる物体)を二分探索で求め、
+    そのうちy軸でも重なる組を候補とする。
+    並び順は前回の判定のものを使い回すので、少しずつ動く物体ならほぼ整列済みで、並べ替えはO(n)に近い。
+    """
+
+    def __init__(self):
+        #: 物体→[左、右、上、下、物体]
+        self._entries: dict[T, list] = {}
+        #: 左端の順に並べた(前回の判定時点で)項目
+        self._order: list[list] = []
+        self._removed = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def insert(self, item: T, rect: Rect) -> None:
+        """物体を登録する."""
+        if item in self._entries:
+            raise ValueError(f'item({item}) is already registered.')
+        entry = [rect.left, rect.right, rect.top, rect.bottom, item]
+        self._entries[item] = entry
+        self._order.append(entry)
+
+    def remove(self, item: T) -> None:
+        """物体の登録を解除する.
+
+        並びからは次の判定時にまとめて取り除く。
+        """
+        entry = self._entries.pop(item)
+        entry[4] = self
+        self._removed = True
+
+    def update(self, item: T, rect: Rect) -> None:
+        """物体の矩形を更新する."""
+        entry = self._entries[item]
+        entry[0] = rect.left
+        entry[1] = rect.right
+        entry[2] = rect.top
+        entry[3] = rect.bottom
+
+    def clear(self) -> None:
+        """全ての物体の登録を解除する."""
+        self._entries.clear()
+        self._order.clear()
+        self._removed = False
+
+    def find_candidates(self) -> list[tuple[T, T]]:
+        """x軸とy軸で重なる物体の組を得る."""
+        order = self._order
+        if self._removed:
+            # 登録を解除した項目には、物体の代わりに自分を入れてある
+            order[:] = [entry for entry in order if entry[4] is not self]
+            self._removed = False
+        order.sort(key=itemgetter(0))
+
+        lefts = [entry[0] for entry in order]
+
+        pairs = []
+        for (index, (_, right, top, bottom, item)) in enumerate(order):
+            # 左端がこの物体の右端までにある物体が、x軸で重なる
+            end = bisect_right(lefts, right, index + 1)
+            for other in order[index + 1:end]:
+                if other[2] <= bottom and top <= other[3]:
+                    pairs.append((item, other[4]))
+        return pairs
+
+
+class CollisionWorld(tp.Generic[T]):
+    """衝突判定を行う物体の集まり.
+
+    :param world_size: ワールドの大きさ。ブロードフェーズを指定しない場合、一様グリッドのセルの大きさを決める
+    :param broad_phase: ブロードフェーズ。Noneならワールドの大きさから決めた一様グリッド
+    """
+
+    def __init__(self, world_size: Size, broad_phase: AbstractBroadPhase[T] = None):
+        if broad_phase is None:
+            if world_size is None:
+                raise ValueError('world_size is None')
+            cell_size = max(world_size.width, world_size.height) / DEFAULT_GRID_DIVISIONS
+            broad_phase = SpatialHashBroadPhase(cell_size)
+        self._broad_phase = broad_phase
+        self._rects: dict[T, Rect] = {}
+        self._callbacks: list[CollisionCallback] = []
+        #: 前回の判定での候補の数
+        self.candidate_count = 0
+        #: 前回の判定で衝突していた組の数
+        self.collision_count = 0
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, item: T) -> bool:
+        return item in self._rects
+
+    @property
+    def broad_phase(self) -> AbstractBroadPhase[T]:
+        """ブロードフェーズ."""
+        return self._broad_phase
+
+    def add(self, item: T, rect: Rect) -> None:
+        """物体を追加する."""
+        if item in self._rects:
+            raise ValueError(f'item({item}) is already registered.')
+        self._rects[item] = rect
+        self._broad_phase.insert(item, rect)
+
+    def remove(self, item: T) -> None:
+        """物体を削除する."""
+        del self._rects[item]
+        self._broad_phase.remove(item)
+
+    def move(self, item: T, rect: Rect) -> None:
+        """物体の矩形を更新する."""
+        if item not in self._rects:
+            raise ValueError(f'item({item}) is not registered.')
+        self._rects[item] = rect
+        self._broad_phase.update(item, rect)
+
+    def get_rect(self, item: T) -> Rect:
+        """物体の矩形を得る."""
+        return self._rects[item]
+
+    def clear(self) -> None:
+        """全ての物体を削除する."""
+        self._rects.clear()
+        self._broad_phase.clear()
+
+    def connect(self, callback: CollisionCallback) -> None:
+        """衝突時のコールバックを登録する."""
+        self._callbacks.append(callback)
+
+    def disconnect(self, callback: CollisionCallback) -> None:
+        """衝突時のコールバックの登録を解除する."""
+        self._callbacks.remove(callback)
+
+    def find_collisions(self) -> list[tuple[T, T]]:
+        """衝突している組を得る."""
+        rects = self._rects
+        candidates = self._broad_phase.find_candidates()
+        collisions = [
+            (item, other) for (item, other) in candidates
+            if rects[item].intersects_with_rect(rects[other])
+        ]
+        self.candidate_count = len(candidates)
+        self.collision_count = len(collisions)
+        return collisions
+
+    def update(self) -> None:
+        """衝突判定を行い、衝突している組ごとにコールバックを呼ぶ.
+
+        コールバックがなければ判定もしない。
+        """
+        if not self._callbacks:
+            return
+        for (item, other) in self.find_collisions():
+            for callback in self._callbacks:
+                callback(item, other)
@@ -0,0 +1,93 @@
+"""画面外の描画の省略(カリング).
+
+描画命令の範囲が表示範囲と重ならなければ、描画先に送らずに捨てる。
+範囲は実際より大きめに見積もるので、見えるものを捨てることはない。
+"""
+
+from __future__ import annotations
+
+from rect_array import RectArray, Mask, count_mask
+from values import Rect, Font
+
+
+def get_line_bounds(x1: float, y1: float, x2: float, y2: float) -> Rect:
+    """線の範囲(線の太さの分だけ外側に広げる)."""
+    return Rect._from_edges(min(x1, x2) - 1, min(y1, y2) - 1, max(x1, x2) + 1, max(y1, y2) + 1)
+
+
+def get_stroke_rect_bounds(rect: Rect) -> Rect:
+    """枠線矩形の範囲(線の太さの分だけ外側に広げる)."""
+    return Rect._from_edges(rect.left - 1, rect.top - 1, rect.right + 1, rect.bottom + 1)
+
+
+def get_circle_bounds(x: float, y: float, radius: float) -> Rect:
+    """円の範囲."""
+    return Rect._from_edges(x - radius, y - radius, x + radius, y + radius)
+
+
+def get_text_bounds(text: str, x: float, y: float, font: Font) -> Rect:
+    """文字列の範囲.
+
+    文字幅は分からないので、1文字あたりフォントサイズ分の幅として大きめに見積もる。
+    """
+    size = font.size
+    return Rect._from_edges(x, y - size, x + len(text) * size, y + size * 0.5)
+
+
+class ViewportCuller:
+    """表示範囲による描画の省略.
+
+    判定した数はフレームごとに数え、end_frameで前のフレームの値として確定する。
+
+    :param viewport: 表示範囲
+    """
+
+    def __init__(self, viewport: Rect):
+        if viewport is None:
+            raise ValueError('viewport is None')
+        self._viewport = viewport
+        #: 現在のフレームで省略した数
+        self.culled_count = 0
+        #: 現在のフレームで描画した数
+        self.drawn_count = 0
+        #: 前のフレームで省略した数
+        self.last_culled_count = 0
+        #: 前のフレームで描画した数
+        self.last_drawn_count = 0
+
+    @property
+    def viewport(self) -> Rect:
+        """表示範囲."""
+        return self._viewport
+
+    @viewport.setter
+    def viewport(self, value: Rect) -> None:
+        if value is None:
+            raise ValueError('viewport is None')
+        self._viewport = value
+
+    def is_visible(self, bounds: Rect) -> bool:
+        """描画する必要があるか判定して数える."""
+        if self._viewport.intersects_with_rect(bounds):
+            self.drawn_count += 1
+            return True
+        self.culled_count += 1
+        return False
+
+    def get_visible_mask(self, bounds: RectArray) -> Mask:
+        """まとめて描画する必要があるか判定して数える.
+
+        :return: 範囲ごとに、描画する必要があるかを並べたマスク(numpyがあればbool配列)
+        """
+        mask = bounds.intersects_rect(self._viewport)
+        drawn = count_mask(mask)
+        self.drawn_count += drawn
+        self.culled_count += len(mask) - drawn
+        return mask
+
+    def end_frame(self) -> None:
+        """現在のフレームの数を確定して、0に戻す."""
+        self.last_culled_count = self.culled_count
+        self.last_drawn_count = self.drawn_count
+        self.culled_count = 0
+        self.drawn_count = 0
@@ -0,0 +1,64 @@
+"""再描画範囲の管理."""
+
+from __future__ import annotations
+
+import typing as tp
+
+from values import Rect
+
+
+class DirtyRegion:
+    """再描画が必要な範囲（ダーティ領域）.
+
+    無効化された矩形を保持する。重なる、または接する矩形は1つにまとめる。
+
+    :param bounds: 画面全体の矩形
+    """
+
+    def __init__(self, bounds: Rect):
+        self._bounds = bounds
+        self._rects: list[Rect] = []
+
+    @property
+    def bounds(self) -> Rect:
+        """画面全体の矩形."""
+        return self._bounds
+
+    @property
+    def rects(self) -> tp.Sequence[Rect]:
+        """再描画が必要な矩形のリスト."""
+        return self._rects
+
+    def is_empty(self) -> bool:
+        """再描画が不要か."""
+        return not self._rects
+
+    def invalidate(self, rect: Rect) -> None:
+        """指定した範囲を再描画が必要な状態にする."""
+        rect = rect.clip_with_rect(self._bounds)
+        if rect is None:
+            return
+
+        # まとめた結果さらに別の矩形と重なることがあるので、重ならなくなるまで繰り返す
+        merged = True
+        while merged:
+            merged = False
+            for (index, other) in enumerate(self._rects):
+                if rect.intersects_with_rect(other):
+                    rect = rect.union_with_rect(other)
+                    del self._rects[index]
+                    merged = True
+                    break
+        self._rects.append(rect)
+
+    def invalidate_all(self) -> None:
+        """画面全体を再描画が必要な状態にする."""
+        self._rects = [self._bounds]
+
+    def intersects_with_rect(self, rect: Rect) -> bool:
+        """指定した矩形が再描画範囲と交差するか."""
+        return any(dirty.intersects_with_rect(rect) for dirty in self._rects)
+
+    def clear(self) -> None:
+        """再描画範囲を空にする."""
+        self._rects = []
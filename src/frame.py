@@ -1,38 +1,179 @@
 """フレームモジュール."""
 from __future__ import annotations
 
-from input import OperationParam, VirtualKey, InputEvent
+import typing as tp
+
+from dirty_region import DirtyRegion
+from input import OperationParam, VirtualKey, InputEvent, KeySubscriptionIndex
+from spatial_grid import SpatialGrid
 from values import Rect, Position, Size
 
 
 class Frame:
-    """矩形、親子関係を持つ抽象概念."""
+    """矩形、親子関係を持つ抽象概念.
+
+    矩形(rect)は親フレームからの相対座標で持つ。画面上の矩形はworld_rectで得る。
+    world_rectはキャッシュしておき、先祖が移動した時に子孫のキャッシュを捨てる。
+
+    子フレームは重なり順(z)と追加順を持ち、zが大きいほど、同じzなら後に追加したほど手前になる。
+    追加、削除、親の付け替えは子の数によらない時間で行える。
+
+    位置を持たない入力(キー入力など)は、ルートフレームが持つ抽象キー→フレームの逆引きを使って、
+    木をたどらずに登録したフレームへ直接渡す。
+    """
 
-    def __init__(self, rect: Rect, parent: Frame = None):
+    def __init__(self, rect: Rect, parent: Frame = None, z: int = 0):
         self._rect = rect
-        self._parent = parent
-        if parent is not None:
-            parent.append(self)
+        self._world_rect: tp.Optional[Rect] = None
+        self._parent: tp.Optional[Frame] = None
+        self._z = z
 
-        self._children: list[Frame] = []
+        #: 子フレーム→並び順のキー(z, 追加順)
+        self._child_order: dict[Frame, tuple[int, int]] = {}
+        #: 並び順に並べた子フレームのキャッシュ
+        self._sorted_children: tp.Optional[list[Frame]] = None
+        self._next_child_order = 0
+        self._child_index: tp.Optional[SpatialGrid[Frame]] = None
         self._input_event = InputEvent()
+        #: 抽象キー→入力コールバックを登録したフレーム(ルートフレームのみ)。Noneなら作り直しが必要
+        self._key_index: tp.Optional[KeySubscriptionIndex[Frame]] = KeySubscriptionIndex()
+        self._dirty_region: tp.Optional[DirtyRegion] = None
+
+        if parent is not None:
+            parent.append(self)
 
     def append(self, child: Frame) -> None:
         """子フレームを追加する."""
-        if child in self._children:
+        if child in self._child_order:
             raise RuntimeError(f'Frame is already exists.')
-        self._children.append(child)
+        if child._parent is not None:
+            raise RuntimeError(f'Frame already has a parent.')
+        if child._is_ancestor_of(self):
+            raise RuntimeError(f'Frame cannot be appended to its descendant.')
+
+        # 子の木の入力コールバックの登録をルートフレームに移す
+        child_index = child._get_key_index()
+        child._key_index = None
+        self._link(child)
+        key_index = self._get_root()._get_key_index()
+        for (code, frame) in child_index.items():
+            key_index.add(code, frame)
+        child.invalidate()
+
+    def remove(self, child: Frame) -> None:
+        """子フレームを削除する.
+
+        削除したフレームはルートフレームになる。
+        削除したフレームの木の入力コールバックの登録は、元のルートフレームの逆引きからすぐに取り除く。
+        削除したフレームの逆引きは、次に必要になった時に作り直す。
+        """
+        if child not in self._child_order:
+            raise RuntimeError(f'Frame is not a child.')
+        child.invalidate()
+        key_index = self._get_root()._key_index
+        if key_index is not None:
+            frames = [child]
+            while frames:
+                frame = frames.pop()
+                for code in frame._input_event.codes:
+                    key_index.remove(code, frame)
+                frames.extend(frame._child_order)
+        self._unlink(child)
+        child._key_index = None
+
+    def reparent(self, parent: Frame) -> None:
+        """親フレームを付け替える.
+
+        同じ木の中での付け替えでは、入力コールバックの逆引きを更新しない。
+
+        :param parent: 新しい親フレーム
+        """
+        if parent is self._parent:
+            return
+        if self._is_ancestor_of(parent):
+            raise RuntimeError(f'Frame cannot be appended to its descendant.')
+        if self._parent is None or parent._get_root() is not self._get_root():
+            if self._parent is not None:
+                self._parent.remove(self)
+            parent.append(self)
+            return
+
+        self.invalidate()
+        self._parent._unlink(self)
+        parent._link(self)
+        self.invalidate()
+
+    def _link(self, child: Frame) -> None:
+        """子フレームとしてつなぐ."""
+        self._child_order[child] = (child._z, self._next_child_order)
+        self._next_child_order += 1
+        self._sorted_children = None
+        child._parent = self
+        child._invalidate_world_rect()
+        if self._child_index is not None:
+            self._child_index.insert(child, child._rect)
+
+    def _unlink(self, child: Frame) -> None:
+        """子フレームから外す."""
+        del self._child_order[child]
+        self._sorted_children = None
+        child._parent = None
+        child._invalidate_world_rect()
+        if self._child_index is not None:
+            self._child_index.remove(child)
+
+    def _is_ancestor_of(self, frame: tp.Optional[Frame]) -> bool:
+        """自分がframe自身かその先祖か."""
+        while frame is not None:
+            if frame is self:
+                return True
+            frame = frame._parent
+        return False
+
+    def enable_spatial_index(self, cell_size: float = 64) -> None:
+        """子フレームの空間索引を有効にする.
+
+        位置を持つ入力では、入力位置を含む子フレームだけを調べるようになる。
+        子フレームの外側にある孫フレームには入力が届かなくなる点に注意。
+
+        :param cell_size: 索引のセルの大きさ
+        """
+        self._child_index = SpatialGrid(cell_size)
+        for child in self._child_order:
+            self._child_index.insert(child, child._rect)
+
+    def disable_spatial_index(self) -> None:
+        """子フレームの空間索引を無効にする."""
+        self._child_index = None
+
+    def invalidate(self, rect: Rect = None) -> None:
+        """再描画が必要な範囲を通知する.
+
+        通知はルートフレームまで伝わり、ルートフレームのダーティ領域に記録される。
+
+        :param rect: 再描画が必要な範囲(画面上の座標)。Noneなら自分の矩形全体
+        """
+        if rect is None:
+            rect = self.world_rect
+        root = self._get_root()
+        if root._dirty_region is not None:
+            root._dirty_region.invalidate(rect)
 
     def connect_input(self, code: VirtualKey, callback: InputEvent.Callback) -> None:
         """入力コールバックを登録する."""
         self._input_event.connect(code, callback)
+        self._get_root()._get_key_index().add(code, self)
 
     def disconnect_input(self, code: VirtualKey) -> None:
         """入力コールバックの登録を解除する."""
         self._input_event.disconnect(code)
+        self._get_root()._get_key_index().remove(code, self)
 
-    def disconnect_input_all(self, code: VirtualKey) -> None:
+    def disconnect_input_all(self) -> None:
         """全てのキーの入力コールバックの登録を解除する."""
+        key_index = self._get_root()._get_key_index()
+        for code in self._input_event.codes:
+            key_index.remove(code, self)
         self._input_event.disconnect_all()
 
     def process_input(self, param: OperationParam) -> bool:
@@ -40,9 +181,11 @@ class Frame:
 
         :return: 処理されたか
         """
+        if param.position is None and self._parent is None:
+            return self._dispatch_key_input(param)
 
         # 子
-        for frame in reversed(self._children):
+        for frame in self._get_input_children(param):
             if frame.process_input(param):
                 return True
 
@@ -51,20 +194,154 @@ class Frame:
             return False
         return self._input_event.process(param)
 
+    def _dispatch_key_input(self, param: OperationParam) -> bool:
+        """位置を持たない入力を、登録したフレームに手前から順に渡す.
+
+        木をたどる場合と同じく、子孫は先祖より、手前の子は奥の子より先に渡す。
+        """
+        key_index = self._get_key_index()
+        frames = []
+        removed = []
+        for frame in key_index.get(param.code):
+            (root, path) = frame._get_order_path()
+            if root is self:
+                frames.append((path, frame))
+            else:
+                removed.append(frame)
+        # 別の木に移ったフレームの登録が残っていれば取り除く
+        for frame in removed:
+            key_index.remove(param.code, frame)
+
+        if len(frames) > 1:
+            frames.sort(key=lambda item: item[0], reverse=True)
+        for (_, frame) in frames:
+            if frame._input_event.process(param):
+                return True
+        return False
+
+    def _get_order_path(self) -> tuple[Frame, tuple[tuple[int, int], ...]]:
+        """ルートフレームと、ルートフレームからの各階層の並び順のキー.
+
+        並び順のキーの列の順に並べると、描画順(先祖が先、奥の子が先)になる。
+        """
+        path = []
+        frame = self
+        while frame._parent is not None:
+            path.append(frame._parent._child_order[frame])
+            frame = frame._parent
+        path.reverse()
+        return frame, tuple(path)
+
+    def _get_root(self) -> Frame:
+        """ルートフレーム."""
+        frame = self
+        while frame._parent is not None:
+            frame = frame._parent
+        return frame
+
+    def _get_key_index(self) -> KeySubscriptionIndex[Frame]:
+        """入力コールバックの逆引き(ルートフレームのみ).
+
+        なければ木をたどって作り直す。
+        """
+        if self._key_index is None:
+            key_index = KeySubscriptionIndex()
+            stack = [self]
+            while stack:
+                frame = stack.pop()
+                for code in frame._input_event.codes:
+                    key_index.add(code, frame)
+                stack.extend(frame._child_order)
+            self._key_index = key_index
+        return self._key_index
+
+    def _get_input_children(self, param: OperationParam) -> tp.Iterable[Frame]:
+        """入力を渡す子フレームを手前から順に得る."""
+        if self._child_index is None or param.position is None:
+            return reversed(self.children)
+        # 索引は子フレームの相対座標で持っているので、入力位置も相対座標にする
+        origin = self.world_rect.position
+        local = Position(param.position.x - origin.x, param.position.y - origin.y)
+        candidates = self._child_index.query_point(local)
+        candidates.sort(key=self._child_order.__getitem__, reverse=True)
+        return candidates
+
     def _need_process(self, param: OperationParam) -> bool:
         """処理するべき入力か."""
         position = param.position
         if position is not None:
-            if not self._rect.contains_point(position):
+            if not self.world_rect.contains_point(position):
                 return False
 
         return True
 
+    def _invalidate_world_rect(self) -> None:
+        """自分と子孫の画面上の矩形のキャッシュを捨てる."""
+        self._world_rect = None
+        stack = list(self._child_order)
+        while stack:
+            frame = stack.pop()
+            # キャッシュは先祖から順に作られるので、キャッシュのないフレームの子孫もキャッシュを持たない
+            if frame._world_rect is None:
+                continue
+            frame._world_rect = None
+            stack.extend(frame._child_order)
+
+    @property
+    def children(self) -> list[Frame]:
+        """子フレーム(奥から手前の順)."""
+        if self._sorted_children is None:
+            self._sorted_children = sorted(self._child_order, key=self._child_order.__getitem__)
+        return self._sorted_children
+
+    @property
+    def z(self) -> int:
+        """重なり順。大きいほど手前."""
+        return self._z
+
+    @z.setter
+    def z(self, value: int) -> None:
+        if value == self._z:
+            return
+        self._z = value
+        parent = self._parent
+        if parent is not None:
+            (_, order) = parent._child_order[self]
+            parent._child_order[self] = (value, order)
+            parent._sorted_children = None
+            self.invalidate()
+
     @property
     def rect(self) -> Rect:
-        """矩形."""
+        """矩形(親フレームからの相対座標)."""
         return self._rect
 
+    @rect.setter
+    def rect(self, value: Rect) -> None:
+        self.invalidate()
+        self._rect = value
+        self._invalidate_world_rect()
+        self.invalidate()
+        if self._parent is not None and self._parent._child_index is not None:
+            self._parent._child_index.update(self, value)
+
+    @property
+    def world_rect(self) -> Rect:
+        """画面上の矩形."""
+        world_rect = self._world_rect
+        if world_rect is None:
+            if self._parent is None:
+                world_rect = self._rect
+            else:
+                origin = self._parent.world_rect
+                rect = self._rect
+                size = rect.size
+                left = origin.left + rect.left
+                top = origin.top + rect.top
+                world_rect = Rect._from_edges(left, top, left + size.width, top + size.height, size)
+            self._world_rect = world_rect
+        return world_rect
+
     @property
     def position(self) -> Position:
         return self._rect.position
@@ -77,3 +354,12 @@ class Frame:
     def parent(self) -> Frame:
         """親フレーム."""
         return self._parent
+
+    @property
+    def dirty_region(self) -> tp.Optional[DirtyRegion]:
+        """再描画の通知先（ルートフレームのみ有効）."""
+        return self._dirty_region
+
+    @dirty_region.setter
+    def dirty_region(self, value: tp.Optional[DirtyRegion]) -> None:
+        self._dirty_region = value
@@ -0,0 +1,135 @@
+"""ブラウザなしで動かすための実装.
+
+ベンチマークやテストで、GameModel、GameViewをブラウザなしで動かすために使う。
+"""
+
+from __future__ import annotations
+
+import typing as tp
+from array import array
+from collections import Counter
+
+from atlas import AtlasManifest
+from interface import AbstractImageLoader
+from render_command import CommandRecordingRenderer, RenderCommandBuffer, RenderOp, get_arg_count
+from text_cache import TextSurface, TextSurfaceCache
+from values import Size, Rect, Color, Font
+
+#: 描画状態を変更するだけのコマンド
+STATE_OPS = frozenset([
+    RenderOp.SetFillStyle,
+    RenderOp.SetStrokeStyle,
+    RenderOp.SetFont,
+    RenderOp.BeginClip,
+    RenderOp.ClipRect,
+    RenderOp.ApplyClip,
+    RenderOp.ResetClip,
+])
+
+
+def estimate_text_surface(text: str, font: Font, color: Color) -> TextSurface:
+    """文字列をラスタライズした時の大きさを見積もる.
+
+    画像データの代わりに(文字列, フォント, 色)を持つ。
+    """
+    width = max(1, len(text) * font.size * 3 // 5)
+    height = font.size * 5 // 4
+    return TextSurface((text, font, color), width, height, font.size)
+
+
+class HeadlessRenderer(CommandRecordingRenderer):
+    """描画命令を実行せずに記録だけする描画クラス.
+
+    flushされたコマンド列を保持しておき、take_countsでコマンドの種類ごとの数を得る。
+    数えるのはtake_countsを呼んだ時なので、描画時間の計測には影響しない。
+
+    :param size: 画面サイズ
+    :param background: 背景色。Noneならクリアした範囲は透明になる
+    :param sort_by_state: 描画状態ごとに描画命令を並べ替えるか
+    :param text_cache: 描画済み文字列のキャッシュ
+    :param cull: 画面外の描画命令を記録しないか
+    """
+
+    def __init__(
+            self,
+            size: Size = Size(600, 400),
+            background: tp.Optional[Color] = Color(200, 200, 200),
+            sort_by_state: bool = False,
+            text_cache: tp.Optional[TextSurfaceCache] = None,
+            cull: bool = False) -> None:
+        super().__init__(size, background, sort_by_state, text_cache, cull)
+        self._flushed: list[array] = []
+
+    def create_offscreen(
+            self,
+            size: Size,
+            background: tp.Optional[Color] = None) -> HeadlessRenderer:
+        """オフスクリーンの描画先を作る.
+
+        オフスクリーンで実行されたコマンドも、このオブジェクトのtake_countsで数える。
+        """
+        offscreen = HeadlessRenderer(
+            size, background, self._sort_by_state, self._text_cache, self._culler is not None)
+        offscreen._flushed = self._flushed
+        return offscreen
+
+    @property
+    def surface(self) -> HeadlessRenderer:
+        """描画先の画像データ(オフスクリーンのみ)."""
+        return self
+
+    def execute(self, buffer: RenderCommandBuffer) -> None:
+        """コマンド列を保持する."""
+        self._flushed.append(array('d', buffer.commands))
+
+    def take_counts(self) -> Counter[RenderOp]:
+        """前回呼んでから実行されたコマンドの数を種類ごとに得る."""
+        counts: Counter[RenderOp] = Counter()
+        for commands in self._flushed:
+            index = 0
+            while index < len(commands):
+                counts[RenderOp(int(commands[index]))] += 1
+                index += 1 + get_arg_count(commands, index)
+        self._flushed.clear()
+        return counts
+
+    @staticmethod
+    def count_draw_calls(counts: tp.Mapping[RenderOp, int]) -> int:
+        """描画を行うコマンドの数."""
+        return sum(count for (op, count) in counts.items() if op not in STATE_OPS)
+
+
+class InstantImageLoader(AbstractImageLoader):
+    """すぐに読み込みが終わる画像読み込みクラス.
+
+    画像データの代わりにファイル名を返す。
+
+    :param file_names: 読み込む画像ファイル名
+    :param atlas: アトラスの目録
+    """
+
+    def __init__(self, file_names: tp.Collection[str], atlas: tp.Optional[AtlasManifest] = None):
+        super().__init__(file_names)
+        self._file_names = set(file_names)
+        self._atlas = atlas
+
+    def load(self) -> None:
+        pass
+
+    def is_loading(self) -> bool:
+        """読み込み中か."""
+        return False
+
+    def get_image(self, file_name: str) -> tp.Optional[str]:
+        """画像データを得る."""
+        if self._atlas is not None and file_name in self._atlas:
+            return self._atlas.image_file
+        if file_name not in self._file_names:
+            return None
+        return file_name
+
+    def get_source_rect(self, file_name: str) -> tp.Optional[Rect]:
+        """画像データ内の範囲を得る."""
+        if self._atlas is None:
+            return None
+        return self._atlas.get(file_name)
@@ -1,9 +1,11 @@
 """入力モジュール."""
 
 import typing as tp
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum, auto
 
+from pool import ObjectPool
 from values import Position
 
 
@@ -154,3 +156,275 @@ class InputEvent:
     def disconnect_all(self) -> None:
         """全てのキーのコールバック登録を解除する."""
         self._callback_dict.clear()
+
+    @property
+    def codes(self) -> tp.KeysView[VirtualKey]:
+        """コールバックを登録した抽象キー."""
+        return self._callback_dict.keys()
+
+
+#: 型：購読者
+SubscriberType = tp.TypeVar('SubscriberType')
+
+
+class KeySubscriptionIndex(tp.Generic[SubscriberType]):
+    """抽象キー→入力を購読しているものの逆引き."""
+
+    def __init__(self):
+        self._subscribers: dict[VirtualKey, set[SubscriberType]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def add(self, code: VirtualKey, subscriber: SubscriberType) -> None:
+        """購読を追加する."""
+        subscribers = self._subscribers.get(code)
+        if subscribers is None:
+            subscribers = self._subscribers[code] = set()
+        subscribers.add(subscriber)
+
+    def remove(self, code: VirtualKey, subscriber: SubscriberType) -> None:
+        """購読を削除する."""
+        subscribers = self._subscribers.get(code)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[code]
+
+    def get(self, code: VirtualKey) -> tp.Collection[SubscriberType]:
+        """購読しているものを得る(順不同)."""
+        return self._subscribers.get(code, ())
+
+    def items(self) -> tp.Iterator[tuple[VirtualKey, SubscriberType]]:
+        """(抽象キー, 購読しているもの)を列挙する."""
+        for (code, subscribers) in self._subscribers.items():
+            for subscriber in subscribers:
+                yield code, subscriber
+
+    def clear(self) -> None:
+        """全ての購読を削除する."""
+        self._subscribers.clear()
+
+
+def get_key_mask(*codes: VirtualKey) -> int:
+    """抽象キーのビットマスクを得る.
+
+    InputSnapshot.any_downなどに渡すマスクは、毎回作らずに作り置きしておく。
+    """
+    mask = 0
+    for code in codes:
+        mask |= 1 << code.value
+    return mask
+
+
+class InputSnapshot:
+    """1回の更新でのキーの状態.
+
+    押されているキー、このフレームで押された・離されたキーを、
+    抽象キーの値をビット位置とするビット列で持つ。問い合わせはビット演算1回で済む。
+    フレームの最初にupdateでそのフレームの入力をまとめて反映する。
+    """
+
+    def __init__(self):
+        #: 押されているキーのビット列
+        self.down = 0
+        #: このフレームで押されたキーのビット列
+        self.pressed = 0
+        #: このフレームで離されたキーのビット列
+        self.released = 0
+        #: 最後の入力でのマウスカーソルの位置
+        self.mouse_position: tp.Optional[Position] = None
+
+    def update(self, params: tp.Iterable[OperationParam]) -> None:
+        """新しいフレームを始めて、そのフレームの入力をまとめて反映する."""
+        self.pressed = 0
+        self.released = 0
+        for param in params:
+            self.apply(param)
+
+    def apply(self, param: OperationParam) -> None:
+        """入力を1件反映する."""
+        if param.position is not None:
+            self.mouse_position = param.position
+        code = param.code
+        if code is VirtualKey.MouseMove or code is VirtualKey.Dummy:
+            return
+
+        bit = 1 << code.value
+        state = param.state
+        if state is InputState.Press:
+            if not self.down & bit:
+                self.pressed |= bit
+            self.down |= bit
+        elif state is InputState.Release:
+            if self.down & bit:
+                self.released |= bit
+            self.down &= ~bit
+
+    def clear(self) -> None:
+        """全てのキーを離した状態にする(フォーカスを失った時など)."""
+        self.released |= self.down
+        self.down = 0
+
+    def is_down(self, code: VirtualKey) -> bool:
+        """押されているか."""
+        return (self.down >> code.value) & 1 == 1
+
+    def pressed_this_frame(self, code: VirtualKey) -> bool:
+        """このフレームで押されたか."""
+        return (self.pressed >> code.value) & 1 == 1
+
+    def released_this_frame(self, code: VirtualKey) -> bool:
+        """このフレームで離されたか."""
+        return (self.released >> code.value) & 1 == 1
+
+    def any_down(self, mask: int) -> bool:
+        """マスクのキーのどれかが押されているか.
+
+        :param mask: get_key_maskで作ったビットマスク
+        """
+        return self.down & mask != 0
+
+
+#: 型：フレームの入力をまとめて受け取るリスナー
+FrameListenerType = tp.Callable[[tp.Sequence[OperationParam]], tp.Any]
+
+
+def _reset_param(param: OperationParam) -> None:
+    """プールに返却した入力が持つ参照を手放す."""
+    param.position = None
+
+
+def create_param_pool(capacity: int = 256) -> ObjectPool[OperationParam]:
+    """入力のプールを生成する."""
+    return ObjectPool(
+        lambda: OperationParam(VirtualKey.Dummy, InputState.Press),
+        _reset_param,
+        capacity)
+
+
+class InputQueue:
+    """入力キュー.
+
+    ブラウザのイベントで積まれた入力を、ゲームループで1フレームに1回まとめて処理するためのキュー。
+    連続するMouseMoveは最後の1件にまとめる。押す・離すの順序は保つ。
+
+    プールを指定した場合、捨てた入力とdispatchで処理し終えた入力はプールに返却する。
+    その場合、コールバックで入力への参照を持ち続けてはいけない。
+    pushで積んだ、プールから取り出していない入力は返却しない。
+
+    リスナーはdispatchのたびに、そのフレームの入力をまとめて受け取る(入力がなくても呼ばれる)。
+    InputSnapshot.updateを登録すれば、キーの状態を1フレームに1回まとめて更新できる。
+
+    :param capacity: 保持する最大件数。超えた場合は古いものから捨てる
+    :param pool: 入力のプール
+    """
+
+    def __init__(self, capacity: int = 256, pool: ObjectPool[OperationParam] = None):
+        if capacity <= 0:
+            raise ValueError(f'capacity({capacity}) must be positive.')
+        self._capacity = capacity
+        self._pool = pool
+        self._params: deque[OperationParam] = deque()
+        self._listeners: list[FrameListenerType] = []
+
+        #: まとめた入力の数
+        self.merged_count = 0
+        #: 捨てた入力の数
+        self.dropped_count = 0
+
+    def __len__(self) -> int:
+        return len(self._params)
+
+    def add_listener(self, listener: FrameListenerType) -> None:
+        """フレームの入力をまとめて受け取るリスナーを追加する."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: FrameListenerType) -> None:
+        """リスナーを削除する."""
+        self._listeners.remove(listener)
+
+    def push(self, param: OperationParam) -> None:
+        """入力を積む."""
+        params = self._params
+        if param.code == VirtualKey.MouseMove and params and params[-1].code == VirtualKey.MouseMove:
+            self._release(params[-1])
+            params[-1] = param
+            self.merged_count += 1
+            return
+
+        if len(params) >= self._capacity:
+            self._release(params.popleft())
+            self.dropped_count += 1
+        params.append(param)
+
+    def push_event(self, code: VirtualKey, state: InputState, position: tp.Optional[Position] = None) -> None:
+        """入力を積む.
+
+        プールがあれば入力をプールから取り出す。
+        連続するMouseMoveは、積んである入力がプールから取り出したものなら書き換える。
+        pushで積まれた入力は呼び出し元が持っている場合があるので、書き換えずに新しい入力で置き換える。
+        """
+        params = self._params
+        if code is VirtualKey.MouseMove and params and params[-1].code is VirtualKey.MouseMove:
+            last = params[-1]
+            if self._pool is not None and self._pool.is_in_use(last):
+                last.state = state
+                last.position = position
+                self.merged_count += 1
+                return
+
+        if self._pool is None:
+            param = OperationParam(code, state, position)
+        else:
+            param = self._pool.acquire()
+            param.code = code
+            param.state = state
+            param.position = position
+        self.push(param)
+
+    def drain(self) -> list[OperationParam]:
+        """積まれた入力を全て取り出す.
+
+        プールがある場合、取り出した入力は使い終わったらrelease_allで返却する。
+        """
+        params = list(self._params)
+        self._params.clear()
+        return params
+
+    def release_all(self, params: tp.Iterable[OperationParam]) -> None:
+        """drainで取り出した入力をプールに返却する。プールがなければ何もしない."""
+        if self._pool is None:
+            return
+        for param in params:
+            self._release(param)
+
+    def dispatch(self, callback: tp.Callable[[OperationParam], tp.Any]) -> int:
+        """積まれた入力を全て取り出して、順にコールバックに渡す.
+
+        コールバックより先に、リスナーにフレームの入力をまとめて渡す。
+        コールバックが例外を投げても、取り出した入力はプールに返却する。
+
+        :return: 処理した入力の数
+        """
+        params = self.drain()
+        try:
+            for listener in self._listeners:
+                listener(params)
+            for param in params:
+                callback(param)
+        finally:
+            self.release_all(params)
+        return len(params)
+
+    def reset_counts(self) -> None:
+        """まとめた数、捨てた数をリセットする."""
+        self.merged_count = 0
+        self.dropped_count = 0
+
+    def _release(self, param: OperationParam) -> None:
+        """プールから取り出した入力なら返却する."""
+        pool = self._pool
+        if pool is not None and pool.is_in_use(param):
+            pool.release(param)
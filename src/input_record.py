@@ -0,0 +1,308 @@
+"""入力の記録と再生.
+
+プレイ中の入力と、各フレームで実行した更新の回数をバイナリに記録し、ブラウザなしで同じ入力を再生する。
+処理落ちで1フレームに複数回更新したフレームも同じ回数だけ更新するので、入力は記録時と同じ更新の間に入る。
+記録の最後のモデルの状態のチェックサムを付けておけば、再生結果と比べて再現できたか確かめられる。
+記録したセッションは、そのまま再現可能なベンチマークと動作確認に使える。
+
+記録の形式(リトルエンディアン)::
+
+    ヘッダー: マジック(4バイト)、バージョン(1)、フラグ(1)、フレーム数(4)、入力数(4)、チェックサム(4)
+    本体:     フレームごとに更新回数(2)、
+              入力ごとにフレーム番号(4)、抽象キー(1)、状態(1)、x(float32)、y(float32)
+
+フラグにCOMPRESSED_FLAGが立っていれば、本体はzlibで圧縮されている。
+CHECKSUM_FLAGが立っていなければ、チェックサムは無い(0)。
+"""
+
+from __future__ import annotations
+
+import struct
+import time
+import typing as tp
+import zlib
+
+from input import VirtualKey, InputState, OperationParam
+from values import Position
+
+#: 記録の先頭に付ける識別子
+MAGIC = b'PSIR'
+#: 形式のバージョン
+VERSION = 2
+#: フラグ：本体をzlibで圧縮している
+COMPRESSED_FLAG = 0x01
+#: フラグ：チェックサムを持つ
+CHECKSUM_FLAG = 0x02
+#: 状態に付けるフラグ：座標を持つ
+POSITION_FLAG = 0x80
+
+_HEADER = struct.Struct('<4sBBIII')
+_RECORD = struct.Struct('<IBBff')
+_UPDATE_COUNT = struct.Struct('<H')
+
+#: 型：入力処理関数
+OperateFuncType = tp.Callable[[OperationParam], tp.Any]
+
+
+class InputLog:
+    """記録した入力.
+
+    :param frames: フレームごとの入力
+    :param update_counts: フレームごとの更新回数。省略すると1フレームに1回
+    :param checksum: 最後のフレームの後のモデルの状態のチェックサム
+    """
+
+    def __init__(
+            self,
+            frames: tp.Sequence[tp.Sequence[OperationParam]],
+            update_counts: tp.Sequence[int] = None,
+            checksum: tp.Optional[int] = None):
+        self._frames = [list(params) for params in frames]
+        if update_counts is None:
+            self._update_counts = [1] * len(self._frames)
+        else:
+            if len(update_counts) != len(self._frames):
+                raise ValueError(
+                    f'len(update_counts)({len(update_counts)}) != len(frames)({len(self._frames)})')
+            self._update_counts = list(update_counts)
+        self._checksum = checksum
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __iter__(self) -> tp.Iterator[list[OperationParam]]:
+        return iter(self._frames)
+
+    def __getitem__(self, frame: int) -> list[OperationParam]:
+        return self._frames[frame]
+
+    @property
+    def input_count(self) -> int:
+        """入力の総数."""
+        return sum(len(params) for params in self._frames)
+
+    @property
+    def update_counts(self) -> list[int]:
+        """フレームごとの更新回数."""
+        return self._update_counts
+
+    @property
+    def checksum(self) -> tp.Optional[int]:
+        """最後のフレームの後のモデルの状態のチェックサム."""
+        return self._checksum
+
+    def to_bytes(self, compress: bool = True) -> bytes:
+        """バイナリに変換する.
+
+        :param compress: 本体をzlibで圧縮するか
+        """
+        if any(not 0 <= count <= 0xffff for count in self._update_counts):
+            raise ValueError('update count must be in [0, 65535].')
+        pack = _RECORD.pack
+        body = bytearray(struct.pack(f'<{len(self._update_counts)}H', *self._update_counts))
+        for (frame, params) in enumerate(self._frames):
+            for param in params:
+                position = param.position
+                if position is None:
+                    body += pack(frame, param.code.value, param.state.value, 0.0, 0.0)
+                else:
+                    body += pack(
+                        frame, param.code.value, param.state.value | POSITION_FLAG,
+                        position.x, position.y)
+
+        flags = 0
+        if compress:
+            body = zlib.compress(body)
+            flags |= COMPRESSED_FLAG
+        checksum = 0
+        if self._checksum is not None:
+            checksum = self._checksum
+            flags |= CHECKSUM_FLAG
+        header = _HEADER.pack(MAGIC, VERSION, flags, len(self._frames), self.input_count, checksum)
+        return header + bytes(body)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> InputLog:
+        """バイナリから生成する."""
+        if len(data) < _HEADER.size:
+            raise ValueError('Input log is too short.')
+        (magic, version, flags, frame_count, input_count, checksum) = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('Input log has an unknown format.')
+        if version != VERSION:
+            raise ValueError(f'Input log version({version}) is not supported.')
+
+        body = data[_HEADER.size:]
+        if flags & COMPRESSED_FLAG:
+            try:
+                body = zlib.decompress(body)
+            except zlib.error as e:
+                raise ValueError('Input log is broken.') from e
+        counts_size = frame_count * _UPDATE_COUNT.size
+        if len(body) != counts_size + input_count * _RECORD.size:
+            raise ValueError('Input log is broken.')
+        update_counts = list(struct.unpack_from(f'<{frame_count}H', body))
+
+        virtual_keys = {key.value: key for key in VirtualKey}
+        states = {state.value: state for state in InputState}
+        frames: list[list[OperationParam]] = [[] for _ in range(frame_count)]
+        for (frame, code, state, x, y) in _RECORD.iter_unpack(memoryview(body)[counts_size:]):
+            input_state = states.get(state & ~POSITION_FLAG)
+            if frame >= frame_count or input_state is None:
+                raise ValueError('Input log is broken.')
+            if state & POSITION_FLAG:
+                position = Position(x, y)
+            else:
+                position = None
+            frames[frame].append(OperationParam(
+                code=virtual_keys.get(code, VirtualKey.Dummy),
+                state=input_state,
+                position=position))
+        return cls(frames, update_counts, checksum if flags & CHECKSUM_FLAG else None)
+
+    def save(self, file_name: str, compress: bool = True) -> None:
+        """ファイルに書き出す."""
+        with open(file_name, 'wb') as file:
+            file.write(self.to_bytes(compress))
+
+    @classmethod
+    def load(cls, file_name: str) -> InputLog:
+        """ファイルから読み込む."""
+        with open(file_name, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+
+class InputRecorder:
+    """入力を記録する.
+
+    ゲームループの入力処理で、1フレームに1回record_frameを呼ぶ(InputQueueのリスナーにしてもよい)。
+    更新関数ではrecord_updateを呼び、そのフレームで実行した更新の回数を数える。
+    ブラウザでは、pyscript_appの_RECORD_INPUTを有効にするとプレイ中の入力を記録し、Pキーでダウンロードできる。
+    座標はfloat32で記録するので、ブラウザのマウス座標(整数)は誤差なく再生できる。
+    """
+
+    def __init__(self):
+        self._frames: list[list[OperationParam]] = []
+        self._update_counts: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def record_frame(self, params: tp.Iterable[OperationParam]) -> None:
+        """1フレーム分の入力を記録する.
+
+        入力はプールで使い回されることがあるので、コピーして記録する。
+        """
+        self._frames.append([OperationParam(param.code, param.state, param.position) for param in params])
+        self._update_counts.append(0)
+
+    def record_update(self, delta: float) -> None:
+        """最後のフレームで更新を1回実行したことを記録する.
+
+        更新関数と同じ引数なので、更新関数から呼ぶか、そのまま更新関数の代わりに渡せる。
+        フレームを記録する前に呼ばれた場合は、入力のないフレームを記録する。
+        """
+        if not self._frames:
+            self.record_frame(())
+        self._update_counts[-1] += 1
+
+    def dispatch(self, params: tp.Iterable[OperationParam], operate: OperateFuncType) -> None:
+        """1フレーム分の入力を記録して、順に入力処理関数に渡す."""
+        params = list(params)
+        self.record_frame(params)
+        for param in params:
+            operate(param)
+
+    def to_log(self, checksum: tp.Optional[int] = None) -> InputLog:
+        """記録した入力を得る.
+
+        :param checksum: 最後のフレームの後のモデルの状態のチェックサム
+        """
+        return InputLog(self._frames, self._update_counts, checksum)
+
+    def clear(self) -> None:
+        """記録を消す."""
+        self._frames.clear()
+        self._update_counts.clear()
+
+
+class ReplayResult(tp.NamedTuple):
+    """再生結果."""
+    #: 再生したフレーム数
+    frame_count: int
+    #: 処理した入力の数
+    input_count: int
+    #: 実行した更新回数
+    update_count: int
+    #: 実行した描画回数
+    draw_count: int
+    #: 再生にかかった実時間(秒)
+    elapsed: float
+    #: 再生後のモデルの状態のチェックサム
+    checksum: tp.Optional[int] = None
+    #: 記録したチェックサム
+    expected_checksum: tp.Optional[int] = None
+
+    @property
+    def is_reproduced(self) -> tp.Optional[bool]:
+        """記録時と同じ状態になったか。比べるチェックサムが無ければNone."""
+        if self.checksum is None or self.expected_checksum is None:
+            return None
+        return self.checksum == self.expected_checksum
+
+
+class InputReplayer:
+    """記録した入力を再生する.
+
+    フレームごとに、入力を処理してから記録した回数だけ固定ステップで更新し、1回描画する。
+    待機せずに最速で再生でき、更新の回数とデルタ秒は実行環境によらず記録時と同じになる。
+
+    :param log: 記録した入力
+    :param operate: 入力処理関数
+    :param update: 更新関数
+    :param draw: 描画関数
+    :param step: 1回の更新で進める秒数
+    :param checksum: 再生後のモデルの状態のチェックサムを求める関数
+    """
+
+    def __init__(
+            self,
+            log: InputLog,
+            operate: OperateFuncType,
+            update: tp.Callable[[float], None],
+            draw: tp.Callable[[], None],
+            step: float = 1.0 / 30,
+            checksum: tp.Callable[[], int] = None):
+        if log is None:
+            raise ValueError('log is None')
+        self._log = log
+        self._operate = operate
+        self._update = update
+        self._draw = draw
+        self._step = step
+        self._checksum = checksum
+
+    def run(self) -> ReplayResult:
+        """最後まで再生する."""
+        log = self._log
+        operate = self._operate
+        update = self._update
+        draw = self._draw
+        step = self._step
+        input_count = 0
+        update_count = 0
+
+        start = time.perf_counter()
+        for (params, count) in zip(log, log.update_counts):
+            for param in params:
+                operate(param)
+            input_count += len(params)
+            for _ in range(count):
+                update(step)
+            update_count += count
+            draw()
+        elapsed = time.perf_counter() - start
+
+        checksum = self._checksum() if self._checksum is not None else None
+        return ReplayResult(
+            len(log), input_count, update_count, len(log), elapsed, checksum, log.checksum)
@@ -0,0 +1,76 @@
+// 入力イベントのリングバッファへの書き込み.
+// ブラウザの入力イベントを整数のレコードにしてint32配列に書き込む。
+// 形式はinput_ring.pyと合わせること。
+
+const InputRing = Object.freeze({
+  HeaderSize: 4,
+  WriteIndex: 0,
+  ReadIndex: 1,
+  Capacity: 2,
+  Dropped: 3,
+  RecordSize: 5,
+  PositionFlag: 0x100,
+});
+
+/**
+ * 入力イベントをリングバッファに書き込むリスナーを登録する.
+ *
+ * @param canvas マウスイベントを登録する要素
+ * @param ringProxy int32配列(array('i'))のPyProxy。getBufferでコピーせずに書き込む
+ * @param keyMap キー→抽象キーの値
+ * @param buttonMap マウスボタン→抽象キーの値
+ * @param codes MouseMove, Dummyの抽象キーの値と、Press, Release, Repeatの入力状態の値
+ */
+function setupInputRing(canvas, ringProxy, keyMap, buttonMap, codes) {
+  let view = ringProxy.getBuffer('i32');
+
+  // wasmのメモリが拡張されると古いビューは使えなくなるので取り直す
+  function data() {
+    if (view.data.length === 0) {
+      view.release();
+      view = ringProxy.getBuffer('i32');
+    }
+    return view.data;
+  }
+
+  function write(code, state, x, y, timeStamp) {
+    const d = data();
+    const capacity = d[InputRing.Capacity];
+    const index = d[InputRing.WriteIndex];
+    if (index - d[InputRing.ReadIndex] >= capacity) {
+      d[InputRing.Dropped] += 1;
+      return;
+    }
+    const base = InputRing.HeaderSize + (index % capacity) * InputRing.RecordSize;
+    d[base] = code;
+    d[base + 1] = state;
+    d[base + 2] = x;
+    d[base + 3] = y;
+    d[base + 4] = timeStamp;
+    d[InputRing.WriteIndex] = index + 1;
+  }
+
+  function onMouseButton(state) {
+    return (e) => {
+      const code = buttonMap[e.button];
+      if (code !== undefined) {
+        write(code, state | InputRing.PositionFlag, e.x, e.y, e.timeStamp);
+      }
+    };
+  }
+
+  function onKey(e, state) {
+    const code = keyMap[e.key];
+    write(code === undefined ? codes.Dummy : code, state, 0, 0, e.timeStamp);
+  }
+
+  canvas.addEventListener('mousedown', onMouseButton(codes.Press));
+  canvas.addEventListener('mouseup', onMouseButton(codes.Release));
+  canvas.addEventListener('mousemove', (e) => {
+    write(codes.MouseMove, codes.Press | InputRing.PositionFlag, e.x, e.y, e.timeStamp);
+  });
+
+  // キーイベントはelementでは取れないのでdocumentに登録する必要がある
+  document.addEventListener('keydown', (e) => onKey(e, e.repeat ? codes.Repeat : codes.Press));
+  document.addEventListener('keyup', (e) => onKey(e, codes.Release));
+}
@@ -0,0 +1,137 @@
+"""入力イベントのリングバッファ.
+
+ブラウザの入力イベントをJS側(input_ring.js)でint32配列に書き込み、
+Python側ではフレームごとに1回まとめて読み出す。
+配列はPython側で確保し、JS側はgetBufferでコピーせずに直接書き込む。
+"""
+
+from __future__ import annotations
+
+import typing as tp
+from array import array
+
+from input import VirtualKey, InputState, OperationParam, InputQueue
+from values import Position
+
+#: ヘッダーの大きさ(int32の数)
+HEADER_SIZE = 4
+#: ヘッダー：書き込み位置
+HEADER_WRITE_INDEX = 0
+#: ヘッダー：読み込み位置
+HEADER_READ_INDEX = 1
+#: ヘッダー：保持できるレコード数
+HEADER_CAPACITY = 2
+#: ヘッダー：あふれて捨てたレコード数
+HEADER_DROPPED = 3
+
+#: 1レコードの大きさ(int32の数)。抽象キー、状態、x、y、タイムスタンプ(ミリ秒)
+RECORD_SIZE = 5
+#: 状態に付けるフラグ：座標を持つ
+POSITION_FLAG = 0x100
+
+
+class InputRingBuffer:
+    """入力イベントのリングバッファ.
+
+    :param capacity: 保持できるレコード数
+    """
+
+    def __init__(self, capacity: int = 256):
+        if capacity <= 0:
+            raise ValueError(f'capacity({capacity}) must be positive.')
+        #: ヘッダーとレコードを並べたint32配列
+        self.data = array('i', bytes(4 * (HEADER_SIZE + capacity * RECORD_SIZE)))
+        self.data[HEADER_CAPACITY] = capacity
+        self._virtual_keys = {key.value: key for key in VirtualKey}
+        self._states = {state.value: state for state in InputState}
+
+    def __len__(self) -> int:
+        return self.data[HEADER_WRITE_INDEX] - self.data[HEADER_READ_INDEX]
+
+    @property
+    def capacity(self) -> int:
+        """保持できるレコード数."""
+        return self.data[HEADER_CAPACITY]
+
+    @property
+    def dropped_count(self) -> int:
+        """あふれて捨てたレコード数."""
+        return self.data[HEADER_DROPPED]
+
+    def write(
+            self,
+            code: VirtualKey,
+            state: InputState,
+            position: tp.Optional[Position] = None,
+            timestamp: int = 0) -> None:
+        """レコードを書き込む.
+
+        ブラウザではJS側が書き込むので、主にテストやヘッドレス実行で使う。
+        """
+        data = self.data
+        capacity = data[HEADER_CAPACITY]
+        index = data[HEADER_WRITE_INDEX]
+        if index - data[HEADER_READ_INDEX] >= capacity:
+            data[HEADER_DROPPED] += 1
+            return
+
+        base = HEADER_SIZE + (index % capacity) * RECORD_SIZE
+        data[base] = code.value
+        if position is None:
+            data[base + 1] = state.value
+            data[base + 2] = 0
+            data[base + 3] = 0
+        else:
+            data[base + 1] = state.value | POSITION_FLAG
+            data[base + 2] = int(position.x)
+            data[base + 3] = int(position.y)
+        data[base + 4] = timestamp
+        data[HEADER_WRITE_INDEX] = index + 1
+
+    def read(self) -> list[OperationParam]:
+        """書き込まれたレコードを全て読み出す."""
+        return [
+            OperationParam(code=code, state=state, position=position)
+            for (code, state, position) in self._read_records()
+        ]
+
+    def read_into(self, input_queue: InputQueue) -> int:
+        """書き込まれたレコードを全て読み出して、入力キューに積む.
+
+        入力キューがプールを持っていれば、入力はプールから取り出される。
+
+        :return: 読み出したレコード数
+        """
+        count = 0
+        push_event = input_queue.push_event
+        for (code, state, position) in self._read_records():
+            push_event(code, state, position)
+            count += 1
+        return count
+
+    def _read_records(self) -> list[tuple[VirtualKey, InputState, tp.Optional[Position]]]:
+        """書き込まれたレコードを全て読み出して、(抽象キー, 状態, 座標)にする."""
+        data = self.data
+        capacity = data[HEADER_CAPACITY]
+        read_index = data[HEADER_READ_INDEX]
+        write_index = data[HEADER_WRITE_INDEX]
+        virtual_keys = self._virtual_keys
+        states = self._states
+
+        records = []
+        for index in range(read_index, write_index):
+            base = HEADER_SIZE + (index % capacity) * RECORD_SIZE
+            state = data[base + 1]
+            if state & POSITION_FLAG:
+                position = Position(data[base + 2], data[base + 3])
+            else:
+                position = None
+            records.append((
+                virtual_keys.get(data[base], VirtualKey.Dummy),
+                states[state & ~POSITION_FLAG],
+                position))
+
+        # 読み出しと書き込みは同じスレッドで交互に行われるので、位置を先頭に戻してよい
+        data[HEADER_READ_INDEX] = 0
+        data[HEADER_WRITE_INDEX] = 0
+        return records
@@ -1,4 +1,6 @@
 """インターフェースたち."""
+from __future__ import annotations
+
 import typing as tp
 
 from values import Size, Rect, Color, Position, Font
@@ -31,6 +33,31 @@ class AbstractImageLoader:
         """画像データを得る."""
         pass
 
+    def get_source_rect(self, file_name: str) -> tp.Optional[Rect]:
+        """画像データ内の範囲を得る.
+
+        アトラスから読み込んだ場合、get_imageはアトラス全体を返すので、この範囲だけを描画する。
+
+        :return: 範囲。画像全体ならNone
+        """
+        return None
+
+
+class AbstractClock:
+    """時計の抽象クラス."""
+
+    def now(self) -> float:
+        """現在時刻(秒)."""
+        pass
+
+
+def _iter_items(values: tp.Sequence[float], item_size: int) -> tp.Iterator[tuple[float, ...]]:
+    """座標列を要素ごとに分ける."""
+    if len(values) % item_size != 0:
+        raise ValueError(f'len(values)({len(values)}) is not a multiple of {item_size}.')
+    iterator = iter(values)
+    return zip(*([iterator] * item_size))
+
 
 class AbstractRenderer:
     """描画の抽象クラス."""
@@ -39,8 +66,19 @@ class AbstractRenderer:
     def size(self) -> Size:
         pass
 
-    def clear(self):
-        """画面をクリアする."""
+    def clear(self, rect: Rect = None):
+        """画面をクリアする.
+
+        :param rect: クリアする範囲。Noneなら画面全体
+        """
+        pass
+
+    def set_clip(self, rects: tp.Sequence[Rect]) -> None:
+        """描画範囲を指定した矩形の内側に制限する."""
+        pass
+
+    def reset_clip(self) -> None:
+        """描画範囲の制限を解除する."""
         pass
 
     def draw_rect(self, rect: Rect, color: Color, fill=True) -> None:
@@ -55,11 +93,90 @@ class AbstractRenderer:
         """円の描画."""
         pass
 
-    def draw_image(self, image, position: Position, size: Size) -> None:
-        """画像の描画."""
+    def draw_image(self, image, position: Position, size: Size, src_rect: Rect = None) -> None:
+        """画像の描画.
+
+        :param src_rect: 描画する画像内の範囲。Noneなら画像全体
+        """
+        pass
+
+    def draw_text(
+            self,
+            text: str,
+            position: tuple[int, int],
+            font: Font,
+            color: Color,
+            cached: bool = False) -> None:
+        """テキストの描画.
+
+        :param cached: 描画済みの画像をキャッシュして使うか。変化しない文字列に指定する
+        """
         pass
 
-    def draw_text(self, text: str, position: tuple[int, int], font: Font, color: Color) -> None:
-        """テキストの描画."""
+    def draw_rects(
+            self,
+            rects: tp.Sequence[float],
+            colors: tp.Union[Color, tp.Sequence[Color]],
+            fill=True) -> None:
+        """矩形の一括描画.
+
+        一括描画に対応していない描画クラスでは、1つずつ描画する。
+
+        :param rects: [x, y, w, h]を並べた座標列(array.array、NumPy配列など)
+        :param colors: 全要素共通の色か、要素ごとの色
+        """
+        for (i, (x, y, w, h)) in enumerate(_iter_items(rects, 4)):
+            color = colors if isinstance(colors, Color) else colors[i]
+            self.draw_rect(Rect._from_edges(x, y, x + w, y + h, Size(w, h)), color, fill)
+
+    def draw_lines(self, lines: tp.Sequence[float], colors: tp.Union[Color, tp.Sequence[Color]]) -> None:
+        """線の一括描画.
+
+        :param lines: [x1, y1, x2, y2]を並べた座標列
+        :param colors: 全要素共通の色か、要素ごとの色
+        """
+        for (i, (x1, y1, x2, y2)) in enumerate(_iter_items(lines, 4)):
+            color = colors if isinstance(colors, Color) else colors[i]
+            self.draw_line((x1, y1), (x2, y2), color)
+
+    def draw_circles(self, circles: tp.Sequence[float], colors: tp.Union[Color, tp.Sequence[Color]]) -> None:
+        """円の一括描画.
+
+        :param circles: [x, y, radius]を並べた座標列
+        :param colors: 全要素共通の色か、要素ごとの色
+        """
+        for (i, (x, y, radius)) in enumerate(_iter_items(circles, 3)):
+            color = colors if isinstance(colors, Color) else colors[i]
+            self.draw_circle((x, y), radius, color)
+
+    def draw_images(self, image, rects: tp.Sequence[float]) -> None:
+        """同じ画像の一括描画.
+
+        :param rects: [x, y, w, h]を並べた描画先の座標列
+        """
+        for (x, y, w, h) in _iter_items(rects, 4):
+            self.draw_image(image, Position(x, y), Size(w, h))
+
+    def flush(self) -> None:
+        """1フレーム分の描画命令を確定する."""
         pass
 
+    def create_offscreen(
+            self,
+            size: Size,
+            background: tp.Optional[Color] = None) -> tp.Optional[AbstractRenderer]:
+        """オフスクリーンの描画先を作る.
+
+        描画結果はsurfaceをdraw_imageに渡して、この描画クラスに描画できる。
+
+        :param size: サイズ
+        :param background: 背景色。Noneならクリアした範囲は透明になる
+        :return: オフスクリーンの描画クラス。対応していなければNone
+        """
+        return None
+
+    @property
+    def surface(self) -> object:
+        """描画先の画像データ(オフスクリーンのみ)."""
+        return None
+
@@ -0,0 +1,152 @@
+"""描画レイヤー.
+
+画面を名前付きのオフスクリーンに分けて描画し、1レイヤーにつき1回のdraw_imageで重ね合わせる。
+変化のないレイヤーは描き直さないので、静的な背景は一度描画するだけで済む。
+"""
+
+from __future__ import annotations
+
+import typing as tp
+
+from interface import AbstractRenderer
+from values import Position, Color
+
+#: 型：レイヤーを描画する関数
+LayerRedrawFunc = tp.Callable[[AbstractRenderer], None]
+
+
+class Layer:
+    """描画レイヤー.
+
+    :param name: 名前
+    :param renderer: オフスクリーンの描画クラス
+    :param redraw: レイヤーを描画する関数
+    """
+
+    def __init__(self, name: str, renderer: AbstractRenderer, redraw: LayerRedrawFunc):
+        self._name = name
+        self._renderer = renderer
+        self._redraw = redraw
+        self._is_dirty = True
+        self._visible = True
+        #: 描画した回数
+        self.redraw_count = 0
+
+    @property
+    def name(self) -> str:
+        """名前."""
+        return self._name
+
+    @property
+    def renderer(self) -> AbstractRenderer:
+        """オフスクリーンの描画クラス."""
+        return self._renderer
+
+    @property
+    def visible(self) -> bool:
+        """表示するか."""
+        return self._visible
+
+    @property
+    def is_dirty(self) -> bool:
+        """描き直しが必要か."""
+        return self._is_dirty
+
+    def invalidate(self) -> None:
+        """描き直しが必要なことを通知する."""
+        self._is_dirty = True
+
+    def redraw(self) -> None:
+        """オフスクリーンを描き直す."""
+        self._renderer.clear()
+        self._redraw(self._renderer)
+        self._renderer.flush()
+        self._is_dirty = False
+        self.redraw_count += 1
+
+
+class LayerStack:
+    """描画レイヤーの重なり.
+
+    追加した順に奥から重ねる。
+
+    :param renderer: 重ね合わせた結果の描画先
+    """
+
+    def __init__(self, renderer: AbstractRenderer):
+        if renderer is None:
+            raise ValueError('renderer is None')
+        self._renderer = renderer
+        self._layers: dict[str, Layer] = {}
+        self._needs_composite = True
+        #: 重ね合わせた回数
+        self.composite_count = 0
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+    def __iter__(self) -> tp.Iterator[Layer]:
+        return iter(self._layers.values())
+
+    def __getitem__(self, name: str) -> Layer:
+        return self._layers[name]
+
+    def add(self, name: str, redraw: LayerRedrawFunc, background: tp.Optional[Color] = None) -> Layer:
+        """レイヤーを手前に追加する.
+
+        :param name: 名前
+        :param redraw: レイヤーを描画する関数
+        :param background: 背景色。Noneなら透明
+        """
+        if name in self._layers:
+            raise ValueError(f'Layer({name}) is already exists.')
+        renderer = self._renderer.create_offscreen(self._renderer.size, background)
+        if renderer is None:
+            raise RuntimeError('Offscreen rendering is not supported.')
+        layer = Layer(name, renderer, redraw)
+        self._layers[name] = layer
+        self._needs_composite = True
+        return layer
+
+    def invalidate(self, name: str = None) -> None:
+        """描き直しが必要なことを通知する.
+
+        :param name: レイヤーの名前。Noneなら全てのレイヤー
+        """
+        if name is None:
+            for layer in self._layers.values():
+                layer.invalidate()
+        else:
+            self._layers[name].invalidate()
+
+    def set_visible(self, name: str, visible: bool) -> None:
+        """レイヤーを表示するか設定する."""
+        layer = self._layers[name]
+        if layer.visible != visible:
+            layer._visible = visible
+            self._needs_composite = True
+
+    def draw(self) -> bool:
+        """変化したレイヤーを描き直して、重ね合わせる.
+
+        重ね合わせた結果の描画先のflushは呼び出し側で行う。
+
+        :return: 重ね合わせたか。変化がなければ何もしない
+        """
+        for layer in self._layers.values():
+            # 非表示のレイヤーは表示されるまで描き直さない
+            if layer.visible and layer.is_dirty:
+                layer.redraw()
+                self._needs_composite = True
+        if not self._needs_composite:
+            return False
+
+        renderer = self._renderer
+        origin = Position(0, 0)
+        renderer.clear()
+        for layer in self._layers.values():
+            if layer.visible:
+                renderer.draw_image(layer.renderer.surface, origin, layer.renderer.size)
+        self._needs_composite = False
+        self.composite_count += 1
+        return True
@@ -0,0 +1,175 @@
+"""ゲームループ."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import typing as tp
+
+from interface import AbstractClock
+
+# 型：更新関数
+UpdateFuncType = tp.Callable[[float], None]
+# 型：描画関数
+DrawFuncType = tp.Callable[[], None]
+# 型：入力処理関数
+InputFuncType = tp.Callable[[], tp.Any]
+# 型：待機関数
+SleepFuncType = tp.Callable[[float], tp.Awaitable[None]]
+
+#: 浮動小数点誤差の許容値(秒)
+_EPSILON = 1e-9
+
+
+class SystemClock(AbstractClock):
+    """実時間の時計."""
+
+    def now(self) -> float:
+        """現在時刻(秒)."""
+        return time.perf_counter()
+
+
+class ManualClock(AbstractClock):
+    """手動で進める時計（テスト用）."""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+
+    def now(self) -> float:
+        """現在時刻(秒)."""
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        """時刻を進める."""
+        if seconds < 0:
+            raise ValueError(f'seconds({seconds}) is negative.')
+        self._now += seconds
+
+    async def sleep(self, seconds: float) -> None:
+        """待機する代わりに時刻を進める."""
+        self.advance(seconds)
+
+
+class GameLoop:
+    """固定ステップのゲームループ.
+
+    経過時間をアキュムレータに溜め、step秒ずつ更新関数を呼ぶ。
+    更新関数には常にstepが渡されるので、描画がどれだけ遅くてもゲーム時間は実時間からずれない。
+
+    :param clock: 時計
+    :param update: 更新関数。引数はデルタ秒
+    :param draw: 描画関数
+    :param step: 1回の更新で進める秒数
+    :param max_steps: 1フレームで追いつくために行う更新の最大回数
+    :param max_skip_draws: 処理落ち時に連続で描画を省略できる最大回数
+    :param process_input: 入力処理関数。フレームの最初に1回呼ばれる
+    """
+
+    def __init__(
+            self,
+            clock: AbstractClock,
+            update: UpdateFuncType,
+            draw: DrawFuncType,
+            step: float = 1.0 / 30,
+            max_steps: int = 5,
+            max_skip_draws: int = 2,
+            process_input: InputFuncType = None) -> None:
+        if clock is None:
+            raise ValueError('clock is None')
+        if step <= 0:
+            raise ValueError(f'step({step}) must be positive.')
+        if max_steps <= 0:
+            raise ValueError(f'max_steps({max_steps}) must be positive.')
+        if max_skip_draws < 0:
+            raise ValueError(f'max_skip_draws({max_skip_draws}) is negative.')
+
+        self._clock = clock
+        self._update = update
+        self._draw = draw
+        self._step = step
+        self._max_steps = max_steps
+        self._max_skip_draws = max_skip_draws
+        self._process_input = process_input
+
+        self._last_time: tp.Optional[float] = None
+        self._accumulator = 0.0
+        self._skipped_in_row = 0
+        self._draw_cost = 0.0
+        self._running = False
+
+        #: 実行した更新回数
+        self.update_count = 0
+        #: 実行した描画回数
+        self.draw_count = 0
+        #: 省略した描画回数
+        self.skipped_draw_count = 0
+        #: 追いつけずに切り捨てた時間(秒)
+        self.dropped_time = 0.0
+
+    @property
+    def step(self) -> float:
+        """1回の更新で進める秒数."""
+        return self._step
+
+    @property
+    def accumulator(self) -> float:
+        """まだ更新に使っていない経過時間(秒)."""
+        return self._accumulator
+
+    def tick(self) -> float:
+        """1フレーム分の処理を行う.
+
+        :return: 次のフレームまで待機するべき秒数
+        """
+        frame_start = self._clock.now()
+        if self._last_time is None:
+            self._last_time = frame_start
+        self._accumulator += frame_start - self._last_time
+        self._last_time = frame_start
+
+        if self._process_input is not None:
+            self._process_input()
+
+        # 固定ステップで更新
+        steps = 0
+        while self._accumulator + _EPSILON >= self._step and steps < self._max_steps:
+            self._update(self._step)
+            self._accumulator -= self._step
+            steps += 1
+        self.update_count += steps
+
+        # 追いつけない分は切り捨てる（処理落ちの連鎖を防ぐ）
+        if self._accumulator + _EPSILON >= self._step:
+            dropped = (self._accumulator + _EPSILON) // self._step * self._step
+            self.dropped_time += dropped
+            self._accumulator -= dropped
+
+        # 描画すると次の更新に間に合わない場合は描画を省略する
+        elapsed = self._clock.now() - frame_start
+        over_budget = self._accumulator + elapsed + self._draw_cost >= self._step
+        if over_budget and self._skipped_in_row < self._max_skip_draws:
+            self._skipped_in_row += 1
+            self.skipped_draw_count += 1
+        else:
+            draw_start = self._clock.now()
+            self._draw()
+            self._draw_cost = self._clock.now() - draw_start
+            self._skipped_in_row = 0
+            self.draw_count += 1
+
+        # 次の更新までの残り時間だけ待つ
+        elapsed = self._clock.now() - frame_start
+        return max(0.0, self._step - self._accumulator - elapsed)
+
+    async def run(self, sleep: SleepFuncType = asyncio.sleep) -> None:
+        """stopが呼ばれるまでループを回す.
+
+        :param sleep: 待機関数
+        """
+        self._running = True
+        while self._running:
+            await sleep(self.tick())
+
+    def stop(self) -> None:
+        """ループを止める."""
+        self._running = False
@@ -1,13 +1,500 @@
 """ゲームモデル."""
 
+from __future__ import annotations
+
+import base64
+import struct
 import typing as tp
+from array import array
 
+from collision import CollisionWorld
 from interface import AbstractRepository
+from pool import PoolStats
+from save_data import SaveData, array_to_bytes, array_from_bytes
 from values import Size
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # 型：ログ出力関数
 LogFuncType = tp.Callable[[str], None]
 
+#: エンティティのIDのうち、添え字に使うビット数。残りのビットは世代
+ENTITY_INDEX_BITS = 24
+#: エンティティのIDから添え字を取り出すマスク
+ENTITY_INDEX_MASK = (1 << ENTITY_INDEX_BITS) - 1
+
+#: セクション名：エンティティのIDの世代と空き
+ENTITIES_SECTION = 'entities'
+#: セクション名の接頭辞：アーキタイプ。後ろにコンポーネント名をカンマ区切りで付ける
+ARCHETYPE_SECTION_PREFIX = 'archetype/'
+
+_ENTITIES_HEADER = struct.Struct('<II')
+_ARCHETYPE_HEADER = struct.Struct('<IB')
+_COMPONENT_HEADER = struct.Struct('<BcB')
+
+
+class ComponentType:
+    """コンポーネントの種類.
+
+    不変。コンポーネントはフィールドごとの数値の列として持つ。
+
+    :param name: 名前
+    :param fields: フィールド名
+    :param typecode: 列の型(arrayモジュールの型コード)
+    """
+
+    __slots__ = ('_name', '_fields', '_typecode')
+
+    def __init__(self, name: str, fields: tp.Sequence[str], typecode: str = 'd'):
+        if not fields:
+            raise ValueError(f'ComponentType({name}) has no fields.')
+        self._name = name
+        self._fields = tuple(fields)
+        self._typecode = typecode
+
+    def __repr__(self):
+        return f'ComponentType(name={self._name!r}, fields={self._fields!r})'
+
+    @property
+    def name(self) -> str:
+        """名前."""
+        return self._name
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        """フィールド名."""
+        return self._fields
+
+    @property
+    def typecode(self) -> str:
+        """列の型."""
+        return self._typecode
+
+
+#: 位置(x, y)
+POSITION = ComponentType('position', ('x', 'y'))
+#: 速度(x, y)。1秒あたりの移動量
+VELOCITY = ComponentType('velocity', ('x', 'y'))
+
+
+class Archetype:
+    """同じ組み合わせのコンポーネントを持つエンティティの集まり.
+
+    コンポーネントのフィールドごとに列(array)を持ち、エンティティは各列の同じ添え字(行)に並ぶ。
+    エンティティを削除すると、最後の行を空いた行に移して詰める。
+
+    :param component_types: コンポーネントの種類
+    """
+
+    def __init__(self, component_types: tp.Iterable[ComponentType]):
+        self._component_types = {
+            component_type.name: component_type for component_type in component_types}
+        #: 行→エンティティのID
+        self.entities = array('q')
+        #: コンポーネント名→フィールドごとの列
+        self.columns: dict[str, tuple[array, ...]] = {
+            name: tuple(array(component_type.typecode) for _ in component_type.fields)
+            for (name, component_type) in self._component_types.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    @property
+    def component_names(self) -> tp.KeysView[str]:
+        """コンポーネント名."""
+        return self._component_types.keys()
+
+    def has(self, names: tp.Iterable[str]) -> bool:
+        """指定したコンポーネントを全て持つか."""
+        return all(name in self._component_types for name in names)
+
+    def check(self, components: tp.Mapping[str, tp.Sequence[float]]) -> None:
+        """コンポーネントの値の数が合っているか確かめる."""
+        for (name, columns) in self.columns.items():
+            if len(components[name]) != len(columns):
+                raise ValueError(f'Component({name}) needs {len(columns)} values.')
+
+    def append(self, entity: int, components: tp.Mapping[str, tp.Sequence[float]]) -> int:
+        """行を追加する.
+
+        :return: 追加した行
+        """
+        # 途中で失敗して列の長さがずれないように、先に全て確かめる
+        self.check(components)
+        for (name, columns) in self.columns.items():
+            for (column, value) in zip(columns, components[name]):
+                column.append(value)
+        self.entities.append(entity)
+        return len(self.entities) - 1
+
+    def remove(self, row: int) -> tp.Optional[int]:
+        """行を削除する.
+
+        :return: 空いた行に移したエンティティのID。最後の行を削除した場合はNone
+        """
+        last = len(self.entities) - 1
+        moved = None
+        if row != last:
+            moved = self.entities[row] = self.entities[last]
+            for columns in self.columns.values():
+                for column in columns:
+                    column[row] = column[last]
+        self.entities.pop()
+        for columns in self.columns.values():
+            for column in columns:
+                column.pop()
+        return moved
+
+    def get(self, row: int, name: str) -> tuple[float, ...]:
+        """行のコンポーネントの値を得る."""
+        return tuple(column[row] for column in self.columns[name])
+
+    def set(self, row: int, name: str, values: tp.Sequence[float]) -> None:
+        """行のコンポーネントの値を設定する."""
+        columns = self.columns[name]
+        if len(values) != len(columns):
+            raise ValueError(f'Component({name}) needs {len(columns)} values.')
+        for (column, value) in zip(columns, values):
+            column[row] = value
+
+
+class EntityStore:
+    """エンティティとコンポーネントの置き場所.
+
+    エンティティはコンポーネントの組み合わせ(アーキタイプ)ごとに列で持つ。
+    エンティティのIDは添え字と世代からなり、削除した添え字は空きリストから再利用する。
+    再利用すると世代が変わるので、削除済みのIDで別のエンティティを参照することはない。
+    """
+
+    def __init__(self):
+        self._component_types: dict[str, ComponentType] = {}
+        self._archetypes: dict[frozenset[str], Archetype] = {}
+        #: 添え字→(アーキタイプ, 行)。削除済みならNone
+        self._locations: list[tp.Optional[tuple[Archetype, int]]] = []
+        #: 添え字→世代
+        self._generations: list[int] = []
+        #: 空いている添え字
+        self._free_indices: list[int] = []
+        #: 添え字の再利用の統計
+        self.stats = PoolStats()
+
+    def __len__(self) -> int:
+        return len(self._locations) - len(self._free_indices)
+
+    def register(self, component_type: ComponentType) -> None:
+        """コンポーネントの種類を登録する."""
+        if component_type.name in self._component_types:
+            raise ValueError(f'Component({component_type.name}) is already registered.')
+        self._component_types[component_type.name] = component_type
+
+    def create(self, **components: tp.Sequence[float]) -> int:
+        """エンティティを生成する.
+
+        :param components: コンポーネント名→フィールドの値
+        :return: エンティティのID
+        """
+        archetype = self._get_archetype(frozenset(components))
+        archetype.check(components)
+        if self._free_indices:
+            index = self._free_indices.pop()
+            self.stats.on_acquire(True)
+        else:
+            index = len(self._locations)
+            if index > ENTITY_INDEX_MASK:
+                raise RuntimeError('Too many entities.')
+            self._locations.append(None)
+            self._generations.append(0)
+            self.stats.on_acquire(False)
+        entity = self._generations[index] << ENTITY_INDEX_BITS | index
+        row = archetype.append(entity, components)
+        self._locations[index] = (archetype, row)
+        return entity
+
+    def destroy(self, entity: int) -> None:
+        """エンティティを削除する."""
+        (archetype, row) = self._get_location(entity)
+        index = entity & ENTITY_INDEX_MASK
+        moved = archetype.remove(row)
+        if moved is not None:
+            self._locations[moved & ENTITY_INDEX_MASK] = (archetype, row)
+        self._locations[index] = None
+        self._generations[index] += 1
+        self._free_indices.append(index)
+        self.stats.on_release()
+
+    def is_alive(self, entity: int) -> bool:
+        """エンティティが削除されていないか."""
+        index = entity & ENTITY_INDEX_MASK
+        return (index < len(self._locations)
+                and self._locations[index] is not None
+                and self._generations[index] == entity >> ENTITY_INDEX_BITS)
+
+    def get(self, entity: int, name: str) -> tuple[float, ...]:
+        """エンティティのコンポーネントの値を得る."""
+        (archetype, row) = self._get_location(entity)
+        return archetype.get(row, name)
+
+    def set(self, entity: int, name: str, values: tp.Sequence[float]) -> None:
+        """エンティティのコンポーネントの値を設定する."""
+        (archetype, row) = self._get_location(entity)
+        archetype.set(row, name, values)
+
+    def dump(self) -> dict[str, bytes]:
+        """セーブデータのセクションに変換する.
+
+        アーキタイプごとに1つのセクションにするので、動いていないアーキタイプは差分に含まれない。
+        """
+        generations = array_to_bytes(array('q', self._generations))
+        free_indices = array_to_bytes(array('q', self._free_indices))
+        sections = {
+            ENTITIES_SECTION: (
+                _ENTITIES_HEADER.pack(len(self._generations), len(self._free_indices))
+                + generations + free_indices),
+        }
+        for (names, archetype) in self._archetypes.items():
+            if not archetype.entities:
+                continue
+            chunks = [_ARCHETYPE_HEADER.pack(len(archetype), len(archetype.columns))]
+            for name in archetype.component_names:
+                component_type = self._component_types[name]
+                encoded_name = name.encode('utf-8')
+                chunks.append(_COMPONENT_HEADER.pack(
+                    len(encoded_name), component_type.typecode.encode('ascii'), len(component_type.fields)))
+                chunks.append(encoded_name)
+            chunks.append(array_to_bytes(archetype.entities))
+            for columns in archetype.columns.values():
+                for column in columns:
+                    chunks.append(array_to_bytes(column))
+            sections[ARCHETYPE_SECTION_PREFIX + ','.join(sorted(names))] = b''.join(chunks)
+        return sections
+
+    def restore(self, sections: tp.Mapping[str, bytes]) -> None:
+        """セーブデータのセクションから復元する.
+
+        列はバイト列からまとめて読み込む。全て確かめてから置き換えるので、
+        壊れたセーブデータで失敗しても今の状態は変わらない。
+        """
+        body = sections.get(ENTITIES_SECTION)
+        if body is None:
+            generations: list[int] = []
+            free_indices: list[int] = []
+        else:
+            (index_count, free_count) = _ENTITIES_HEADER.unpack_from(body)
+            offset = _ENTITIES_HEADER.size
+            if len(body) != offset + 8 * (index_count + free_count):
+                raise ValueError('Entities section is broken.')
+            view = memoryview(body)
+            generations = array_from_bytes('q', view[offset:offset + 8 * index_count]).tolist()
+            free_indices = array_from_bytes('q', view[offset + 8 * index_count:]).tolist()
+
+        locations: list[tp.Optional[tuple[Archetype, int]]] = [None] * len(generations)
+        restored: list[tuple[Archetype, array, list[array]]] = []
+        for (section_name, body) in sections.items():
+            if not section_name.startswith(ARCHETYPE_SECTION_PREFIX):
+                continue
+            (archetype, entities, columns) = self._read_archetype(body)
+            for (row, entity) in enumerate(entities):
+                index = entity & ENTITY_INDEX_MASK
+                if (index >= len(locations)
+                        or locations[index] is not None
+                        or generations[index] != entity >> ENTITY_INDEX_BITS):
+                    raise ValueError(f'entity({entity}) is broken.')
+                locations[index] = (archetype, row)
+            restored.append((archetype, entities, columns))
+        if sorted(free_indices) != [index for (index, location) in enumerate(locations) if location is None]:
+            raise ValueError('Free indices are broken.')
+
+        for archetype in self._archetypes.values():
+            archetype.entities = array('q')
+            archetype.columns = {
+                name: tuple(array(column.typecode) for column in columns)
+                for (name, columns) in archetype.columns.items()
+            }
+        for (archetype, entities, columns) in restored:
+            archetype.entities = entities
+            iterator = iter(columns)
+            archetype.columns = {
+                name: tuple(next(iterator) for _ in archetype_columns)
+                for (name, archetype_columns) in archetype.columns.items()
+            }
+        self._locations = locations
+        self._generations = generations
+        self._free_indices = free_indices
+
+    def query(self, *names: str) -> tp.Iterator[Archetype]:
+        """指定したコンポーネントを全て持つ、空でないアーキタイプを列挙する."""
+        for archetype in self._archetypes.values():
+            if archetype.entities and archetype.has(names):
+                yield archetype
+
+    def _get_archetype(self, names: frozenset[str]) -> Archetype:
+        """アーキタイプを得る。なければ作る."""
+        archetype = self._archetypes.get(names)
+        if archetype is None:
+            for name in names:
+                if name not in self._component_types:
+                    raise ValueError(f'Component({name}) is not registered.')
+            archetype = Archetype(self._component_types[name] for name in sorted(names))
+            self._archetypes[names] = archetype
+        return archetype
+
+    def _read_archetype(self, body: bytes) -> tuple[Archetype, array, list[array]]:
+        """アーキタイプのセクションを読む.
+
+        :return: (アーキタイプ, エンティティのID, フィールドごとの列)
+        """
+        (row_count, component_count) = _ARCHETYPE_HEADER.unpack_from(body)
+        view = memoryview(body)
+        offset = _ARCHETYPE_HEADER.size
+        component_types: dict[str, ComponentType] = {}
+        for _ in range(component_count):
+            (name_size, typecode, field_count) = _COMPONENT_HEADER.unpack_from(body, offset)
+            offset += _COMPONENT_HEADER.size
+            name = body[offset:offset + name_size].decode('utf-8')
+            offset += name_size
+            component_type = self._component_types.get(name)
+            if component_type is None:
+                raise ValueError(f'Component({name}) is not registered.')
+            if (typecode.decode('ascii') != component_type.typecode
+                    or field_count != len(component_type.fields)):
+                raise ValueError(f'Component({name}) does not match the save data.')
+            component_types[name] = component_type
+        archetype = self._get_archetype(frozenset(component_types))
+
+        def read(typecode: str) -> array:
+            nonlocal offset
+            size = row_count * array(typecode).itemsize
+            if offset + size > len(body):
+                raise ValueError('Archetype section is broken.')
+            values = array_from_bytes(typecode, view[offset:offset + size])
+            offset += size
+            return values
+
+        entities = read('q')
+        columns = [
+            read(component_types[name].typecode)
+            for name in archetype.component_names
+            for _ in component_types[name].fields
+        ]
+        if offset != len(body):
+            raise ValueError('Archetype section is broken.')
+        return archetype, entities, columns
+
+    def _get_location(self, entity: int) -> tuple[Archetype, int]:
+        """エンティティの(アーキタイプ, 行)."""
+        if not self.is_alive(entity):
+            raise ValueError(f'entity({entity}) is not alive.')
+        return self._locations[entity & ENTITY_INDEX_MASK]
+
+
+#: 型：システム。エンティティの置き場所とデルタ秒を受け取る
+SystemFuncType = tp.Callable[[EntityStore, float], None]
+
+#: リポジトリのキー：セーブデータ
+SAVE_KEY = 'model'
+#: リポジトリのキー：セーブデータの差分
+SAVE_DELTA_KEY = 'model.delta'
+#: 差分がセーブデータ全体のこの割合を超えたら、全体を書き直す
+MAX_DELTA_RATIO = 0.5
+#: セクション名：ゲーム時間と更新回数
+MODEL_SECTION = 'model'
+
+_MODEL_STATE = struct.Struct('<dQ')
+
+
+def move_system(entities: EntityStore, delta: float) -> None:
+    """位置に速度を足す.
+
+    エンティティごとではなく、列全体をまとめて更新する。
+    numpyがあれば列をコピーせずにnumpy配列として参照し、その場で書き換える。
+
+    numpyがない場合(Pyodideでnumpyを読み込んでいない場合など)は、要素ごとの内包表記で新しい値を作って
+    列に書き戻すので、ベクトル化されない。エンティティごとのオブジェクトのメソッドを呼ぶ場合より
+    1.3倍ほど遅い(bench/bench_entities.py)。列で持つ利点は、numpyがある場合の速さと、
+    連続したメモリに値を持つことによる省メモリ、セーブデータへの一括書き出しにある。
+    """
+    for archetype in entities.query(POSITION.name, VELOCITY.name):
+        (xs, ys) = archetype.columns[POSITION.name]
+        (dxs, dys) = archetype.columns[VELOCITY.name]
+        if numpy is not None:
+            x_view = numpy.frombuffer(xs)
+            x_view += numpy.frombuffer(dxs) * delta
+            y_view = numpy.frombuffer(ys)
+            y_view += numpy.frombuffer(dys) * delta
+            # 参照が残っていると列に追加できなくなるので、すぐに手放す
+            del x_view, y_view
+        else:
+            # 列を置き換えず中身を書き換えるので、列への参照はそのまま使える
+            xs[:] = array('d', [x + dx * delta for (x, dx) in zip(xs, dxs)])
+            ys[:] = array('d', [y + dy * delta for (y, dy) in zip(ys, dys)])
+
+
+class ModelSnapshot:
+    """ある時点のゲームの状態.
+
+    更新と別のスレッドから、ロックせずに読めるように、生成時に値をコピーして持つ。
+    列(array)は読むだけにし、書き換えてはいけない。
+    GameModel.create_snapshotにreuseとして渡すと、列を確保し直さずに上書きされる。
+
+    :param time: ゲーム時間
+    :param tick: 更新回数
+    :param entities: 位置を持つエンティティのID
+    :param xs: エンティティのx座標
+    :param ys: エンティティのy座標
+    """
+
+    __slots__ = ('_time', '_tick', '_entities', '_xs', '_ys')
+
+    def __init__(
+            self,
+            time: float = 0.0,
+            tick: int = 0,
+            entities: array = None,
+            xs: array = None,
+            ys: array = None):
+        self._time = time
+        self._tick = tick
+        self._entities = array('q') if entities is None else entities
+        self._xs = array('d') if xs is None else xs
+        self._ys = array('d') if ys is None else ys
+        if not len(self._entities) == len(self._xs) == len(self._ys):
+            raise ValueError('entities, xs and ys must have the same length.')
+
+    def __repr__(self):
+        return f'ModelSnapshot(time={self._time}, tick={self._tick}, entities={len(self._entities)})'
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    @property
+    def time(self) -> float:
+        """ゲーム時間."""
+        return self._time
+
+    @property
+    def tick(self) -> int:
+        """更新回数."""
+        return self._tick
+
+    @property
+    def entities(self) -> array:
+        """位置を持つエンティティのID."""
+        return self._entities
+
+    @property
+    def xs(self) -> array:
+        """エンティティのx座標."""
+        return self._xs
+
+    @property
+    def ys(self) -> array:
+        """エンティティのy座標."""
+        return self._ys
+
 
 class GameModel:
     """ゲーム本体.
@@ -30,6 +517,18 @@ class GameModel:
             self.log = log_func
 
         self.time: float = 0
+        #: 更新回数
+        self.tick = 0
+        #: 衝突判定
+        self.collision: CollisionWorld = CollisionWorld(world_size)
+        #: エンティティ
+        self.entities = EntityStore()
+        self.entities.register(POSITION)
+        self.entities.register(VELOCITY)
+        self._systems: list[SystemFuncType] = [move_system]
+        # 差分の基にしている、リポジトリにあるセーブデータとその大きさ
+        self._save_base: tp.Optional[SaveData] = None
+        self._save_base_size = 0
 
         self.log('[GameModel] Create')
 
@@ -39,14 +538,146 @@ class GameModel:
         :param delta: デルタ秒
         """
         self.time += delta
+        self.tick += 1
+        for system in self._systems:
+            system(self.entities, delta)
+        self.collision.update()
+
+    def add_system(self, system: SystemFuncType) -> None:
+        """システムを追加する.
+
+        システムは追加した順に、更新のたびに呼ばれる。
+        """
+        self._systems.append(system)
+
+    def create_snapshot(self, reuse: ModelSnapshot = None) -> ModelSnapshot:
+        """現在の状態のスナップショットを生成する.
+
+        位置の列はアーキタイプごとにまとめてコピーする(要素ごとのループはしない)。
+
+        :param reuse: 上書きするスナップショット。列の領域を使い回すので、確保し直さない
+        """
+        if reuse is None:
+            entities = array('q')
+            xs = array('d')
+            ys = array('d')
+            for archetype in self.entities.query(POSITION.name):
+                (x, y) = archetype.columns[POSITION.name]
+                entities.extend(archetype.entities)
+                xs.extend(x)
+                ys.extend(y)
+            return ModelSnapshot(self.time, self.tick, entities, xs, ys)
+
+        entities = reuse._entities
+        xs = reuse._xs
+        ys = reuse._ys
+        start = 0
+        for archetype in self.entities.query(POSITION.name):
+            (x, y) = archetype.columns[POSITION.name]
+            end = start + len(x)
+            # 長さが同じ範囲への代入は、領域を確保し直さずにコピーするだけ
+            entities[start:end] = archetype.entities
+            xs[start:end] = x
+            ys[start:end] = y
+            start = end
+        del entities[start:]
+        del xs[start:]
+        del ys[start:]
+        reuse._time = self.time
+        reuse._tick = self.tick
+        return reuse
+
+    def to_save_data(self) -> SaveData:
+        """セーブデータに変換する."""
+        sections = {MODEL_SECTION: _MODEL_STATE.pack(self.time, self.tick)}
+        sections.update(self.entities.dump())
+        return SaveData(sections)
+
+    def restore(self, save_data: SaveData) -> None:
+        """セーブデータから復元する.
+
+        衝突判定に登録した物体はセーブデータに含まない。
+        """
+        body = save_data.get(MODEL_SECTION)
+        if body is None:
+            raise ValueError('Save data has no model section.')
+        if len(body) != _MODEL_STATE.size:
+            raise ValueError('Model section is broken.')
+        # 全て確かめてから置き換えるので、エンティティの復元より前に読んでおく
+        (time, tick) = _MODEL_STATE.unpack(body)
+        self.entities.restore(dict(save_data.items()))
+        self.time = time
+        self.tick = tick
 
     def save(self) -> None:
-        """保存."""
-        if self._repository is not None:
-            self._repository.save(key='time', value=str(self.time))
+        """保存.
+
+        リポジトリにあるセーブデータから変わったセクションだけを差分として書き込む。
+        差分が大きくなったら全体を書き直す。
+        """
+        if self._repository is None:
+            return
+        save_data = self.to_save_data()
+        if self._save_base is not None:
+            delta = save_data.to_delta_bytes(self._save_base)
+            if len(delta) <= self._save_base_size * MAX_DELTA_RATIO:
+                self._repository.save(key=SAVE_DELTA_KEY, value=_encode_save_data(delta))
+                return
+
+        data = save_data.to_bytes()
+        self._repository.save(key=SAVE_KEY, value=_encode_save_data(data))
+        self._repository.save(key=SAVE_DELTA_KEY, value='')
+        self._save_base = save_data
+        self._save_base_size = len(data)
 
     def load(self) -> None:
-        """読み込み."""
-        if self._repository is not None:
+        """読み込み.
+
+        セーブデータが壊れていればログに出し、今の状態を変えない。
+        差分だけが壊れていれば、基にしたセーブデータを読み込む。
+        """
+        if self._repository is None:
+            return
+        text = self._repository.load(key=SAVE_KEY, default='')
+        if not text:
+            # 以前の形式(時間だけを文字列で保存)
             value = self._repository.load(key='time', default=0)
-            self.time = float(value)
+            self.time = float(value or 0)
+            return
+
+        try:
+            data = _decode_save_data(text)
+            base = SaveData.from_bytes(data)
+        except ValueError as e:
+            self.log(f'[GameModel] Save data is broken: {e}')
+            return
+        save_data = base
+        delta = self._repository.load(key=SAVE_DELTA_KEY, default='')
+        if delta:
+            try:
+                save_data = SaveData.from_bytes(_decode_save_data(delta), base)
+                self.restore(save_data)
+            except ValueError as e:
+                self.log(f'[GameModel] Save delta is broken: {e}')
+                save_data = base
+        if save_data is base:
+            try:
+                self.restore(base)
+            except ValueError as e:
+                self.log(f'[GameModel] Save data is broken: {e}')
+                return
+        self._save_base = base
+        self._save_base_size = len(data)
+
+
+def _encode_save_data(data: bytes) -> str:
+    """セーブデータを文字列にする(localStorageは文字列しか保存できない)."""
+    return base64.b64encode(data).decode('ascii')
+
+
+def _decode_save_data(text: str) -> bytes:
+    """文字列からセーブデータに戻す.
+
+    不正な文字列ではValueError(binascii.Error)を送出する。
+    """
+    return base64.b64decode(text, validate=True)
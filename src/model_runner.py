@@ -0,0 +1,210 @@
+"""ゲームモデルの実行.
+
+ゲームモデルの更新を、描画と同じスレッドで行うか、別のスレッドで行うかを切り替える。
+
+別のスレッドで行う場合、更新側は2つのスナップショットを交互に使い回す(ダブルバッファ)。
+更新のたびに公開していない方(裏)に書き込み、参照を差し替えて公開する(表)。
+描画側は表の参照を1回読むだけなので、ロックは不要。参照の代入と読み出しは不可分なので、
+描画側は次の公開の次の更新まで(1ステップの間)に読み終えれば、書きかけの状態を見ることはない。
+
+同じスレッドで行う場合、スナップショットは読まれたときに作る。
+ゲーム時間だけが必要ならtimeを読めば、スナップショットは作らない。
+
+モデルへの操作(保存、読み込みなど)はpostで依頼し、更新側のスレッドで更新の合間に実行する。
+
+ブラウザ(Pyodide)ではスレッドを起動できないので、InThreadModelRunnerを使う。
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import typing as tp
+
+from interface import AbstractClock
+from loop import GameLoop, SystemClock
+from model import GameModel, ModelSnapshot
+
+#: 型：モデルへの操作
+ModelFuncType = tp.Callable[[GameModel], tp.Any]
+
+
+class AbstractModelRunner:
+    """ゲームモデルの実行の抽象クラス."""
+
+    @property
+    def snapshot(self) -> ModelSnapshot:
+        """最新のスナップショット."""
+        pass
+
+    @property
+    def time(self) -> float:
+        """最新のゲーム時間."""
+        pass
+
+    def start(self) -> None:
+        """実行を開始する."""
+        pass
+
+    def stop(self) -> None:
+        """実行を終了する."""
+        pass
+
+    def update(self, delta: float) -> None:
+        """描画側のゲームループから呼ばれる更新関数.
+
+        :param delta: デルタ秒
+        """
+        pass
+
+    def post(self, func: ModelFuncType) -> None:
+        """モデルへの操作を依頼する."""
+        pass
+
+
+class InThreadModelRunner(AbstractModelRunner):
+    """描画と同じスレッドでゲームモデルを更新する.
+
+    スナップショットは更新のたびには作らず、更新後に初めて読まれたときに作る。
+
+    :param model: ゲームモデル
+    """
+
+    def __init__(self, model: GameModel):
+        if model is None:
+            raise ValueError('model is None')
+        self._model = model
+        # 最後の更新より後に作ったスナップショット。Noneなら読まれたときに作る
+        self._snapshot: tp.Optional[ModelSnapshot] = None
+
+    @property
+    def snapshot(self) -> ModelSnapshot:
+        """最新のスナップショット."""
+        if self._snapshot is None:
+            self._snapshot = self._model.create_snapshot()
+        return self._snapshot
+
+    @property
+    def time(self) -> float:
+        """最新のゲーム時間."""
+        return self._model.time
+
+    def update(self, delta: float) -> None:
+        """モデルを更新する."""
+        self._model.update(delta)
+        self._snapshot = None
+
+    def post(self, func: ModelFuncType) -> None:
+        """モデルへの操作をすぐに実行する."""
+        func(self._model)
+        self._snapshot = None
+
+
+class ThreadedModelRunner(AbstractModelRunner):
+    """別のスレッドでゲームモデルを固定ステップで更新する.
+
+    描画側のゲームループの更新関数(update)は何もしない。
+    更新側のスレッドで例外が起きた場合、スレッドは止まり、次のupdateで描画側に伝える。
+
+    :param model: ゲームモデル
+    :param step: 1回の更新で進める秒数
+    :param max_steps: 1回で追いつくために行う更新の最大回数
+    :param clock: 時計
+    """
+
+    def __init__(
+            self,
+            model: GameModel,
+            step: float = 1.0 / 30,
+            max_steps: int = 5,
+            clock: AbstractClock = None):
+        if model is None:
+            raise ValueError('model is None')
+        self._model = model
+        self._loop = GameLoop(
+            clock if clock is not None else SystemClock(),
+            model.update, self._publish,
+            step=step, max_steps=max_steps, max_skip_draws=0,
+            process_input=self._process_commands)
+        self._commands: queue.SimpleQueue[ModelFuncType] = queue.SimpleQueue()
+        self._stop_event = threading.Event()
+        self._thread: tp.Optional[threading.Thread] = None
+        self._error: tp.Optional[BaseException] = None
+        # 表と裏のスナップショット。更新側だけが書き換える
+        self._front = model.create_snapshot()
+        self._back = model.create_snapshot()
+
+        #: 公開したスナップショットの数
+        self.publish_count = 0
+
+    @property
+    def snapshot(self) -> ModelSnapshot:
+        """最新のスナップショット."""
+        return self._front
+
+    @property
+    def time(self) -> float:
+        """最新のゲーム時間."""
+        return self._front.time
+
+    @property
+    def is_running(self) -> bool:
+        """更新側のスレッドが動いているか."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """更新側のスレッドを起動する."""
+        if self._thread is not None:
+            raise RuntimeError('ThreadedModelRunner is already started.')
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='GameModel', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: tp.Optional[float] = None) -> None:
+        """更新側のスレッドを止めて、終わるまで待つ.
+
+        :param timeout: 待機する最大秒数
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop_event.set()
+        thread.join(timeout)
+        if thread.is_alive():
+            raise RuntimeError('GameModel thread did not stop.')
+        self._thread = None
+
+    def update(self, delta: float) -> None:
+        """更新側のスレッドで起きた例外を伝える."""
+        if self._error is not None:
+            raise RuntimeError('GameModel thread failed.') from self._error
+
+    def post(self, func: ModelFuncType) -> None:
+        """モデルへの操作を依頼する.
+
+        操作は更新側のスレッドで、次の更新の前に実行される。
+        """
+        self._commands.put(func)
+
+    def _run(self) -> None:
+        """更新側のスレッドの処理."""
+        loop = self._loop
+        wait = self._stop_event.wait
+        try:
+            while not wait(loop.tick()):
+                pass
+        except BaseException as e:
+            self._error = e
+
+    def _process_commands(self) -> None:
+        """依頼された操作を実行する."""
+        commands = self._commands
+        while not commands.empty():
+            commands.get_nowait()(self._model)
+
+    def _publish(self) -> None:
+        """裏のスナップショットに書き込んで、表と入れ替える."""
+        back = self._model.create_snapshot(reuse=self._back)
+        self._back = self._front
+        self._front = back
+        self.publish_count += 1
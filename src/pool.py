@@ -0,0 +1,147 @@
+"""オブジェクトプール.
+
+使い終わったオブジェクトを捨てずに取っておき、次に必要になった時に使い回す。
+毎フレーム大量に生成・破棄されるオブジェクトを減らし、GCによる引っかかりを抑える。
+
+使い回せるのは可変のオブジェクトだけ。Position、Rectなどの不変の値オブジェクトは、
+使い回すと共有している側の値が変わってしまうので対象にしない(Color、Fontは生成時に共有される)。
+"""
+
+from __future__ import annotations
+
+import typing as tp
+
+T = tp.TypeVar('T')
+
+
+class PoolStats:
+    """プールの統計."""
+
+    def __init__(self):
+        #: 取り出した回数
+        self.acquire_count = 0
+        #: 取り出す時に空きがなく、新しく生成した回数
+        self.miss_count = 0
+        #: 返却された回数
+        self.release_count = 0
+        #: 使用中の数
+        self.in_use = 0
+        #: 使用中の数の最大
+        self.high_water_mark = 0
+
+    @property
+    def reuse_count(self) -> int:
+        """使い回した回数."""
+        return self.acquire_count - self.miss_count
+
+    @property
+    def reuse_ratio(self) -> float:
+        """取り出したうち、使い回した割合."""
+        if self.acquire_count == 0:
+            return 0.0
+        return self.reuse_count / self.acquire_count
+
+    def on_acquire(self, reused: bool) -> None:
+        """取り出したことを記録する."""
+        self.acquire_count += 1
+        if not reused:
+            self.miss_count += 1
+        self.in_use += 1
+        if self.in_use > self.high_water_mark:
+            self.high_water_mark = self.in_use
+
+    def on_release(self) -> None:
+        """返却されたことを記録する."""
+        self.release_count += 1
+        self.in_use -= 1
+
+    def reset_counts(self) -> None:
+        """回数をリセットする.
+
+        使用中の数はそのままにし、最大はその値から数え直す。
+        """
+        self.acquire_count = 0
+        self.miss_count = 0
+        self.release_count = 0
+        self.high_water_mark = self.in_use
+
+
+class ObjectPool(tp.Generic[T]):
+    """オブジェクトプール.
+
+    返却時にresetを呼んで、オブジェクトが持つ参照を手放させる。
+    取り出したオブジェクトの中身は、呼び出し側で設定する。
+    取り出したオブジェクトは返却されるまでプールも参照を持ち、二重の返却や
+    プールから取り出していないオブジェクトの返却を防ぐ。
+
+    :param factory: 空きがない時にオブジェクトを生成する関数
+    :param reset: 返却時にオブジェクトを初期状態に戻す関数
+    :param capacity: 取っておくオブジェクトの最大数。超えて返却されたものは捨てる
+    """
+
+    def __init__(
+            self,
+            factory: tp.Callable[[], T],
+            reset: tp.Callable[[T], None] = None,
+            capacity: int = 1024):
+        if factory is None:
+            raise ValueError('factory is None')
+        if capacity <= 0:
+            raise ValueError(f'capacity({capacity}) must be positive.')
+        self._factory = factory
+        self._reset = reset
+        self._capacity = capacity
+        self._free: list[T] = []
+        #: id→使用中のオブジェクト
+        self._in_use: dict[int, T] = {}
+        #: 統計
+        self.stats = PoolStats()
+
+    def __len__(self) -> int:
+        """取っておいているオブジェクトの数."""
+        return len(self._free)
+
+    @property
+    def capacity(self) -> int:
+        """取っておくオブジェクトの最大数."""
+        return self._capacity
+
+    def acquire(self) -> T:
+        """オブジェクトを取り出す."""
+        free = self._free
+        if free:
+            item = free.pop()
+            self.stats.on_acquire(True)
+        else:
+            item = self._factory()
+            self.stats.on_acquire(False)
+        self._in_use[id(item)] = item
+        return item
+
+    def is_in_use(self, item: T) -> bool:
+        """プールから取り出して、まだ返却されていないか."""
+        return id(item) in self._in_use
+
+    def release(self, item: T) -> None:
+        """オブジェクトを返却する.
+
+        返却したオブジェクトは、呼び出し側で参照を持ち続けてはいけない。
+        """
+        if self._in_use.pop(id(item), None) is not item:
+            raise ValueError('item is not in use.')
+        self.stats.on_release()
+        if self._reset is not None:
+            self._reset(item)
+        if len(self._free) < self._capacity:
+            self._free.append(item)
+
+    def release_all(self, items: tp.Iterable[T]) -> None:
+        """複数のオブジェクトを返却する."""
+        for item in items:
+            self.release(item)
+
+    def prefill(self, count: int) -> None:
+        """オブジェクトを前もって生成して取っておく."""
+        free = self._free
+        while len(free) < min(count, self._capacity):
+            free.append(self._factory())
@@ -1,17 +1,24 @@
 """アプリケーション."""
 
 import asyncio
+import typing as tp
 
 from js import (
     console,
     document,
     Element,
 )
+from pyodide.http import open_url
 
 import pyscript_util
-from pyscript_controller import GameController
+from atlas import AtlasManifest
+from pyscript_controller import RingBufferGameController
+from input import VirtualKey, InputQueue, create_param_pool
+from input_record import InputRecorder
+from loop import GameLoop, SystemClock
 from model import GameModel
-from pyscript_view import PyScriptRenderer, PyScriptImageLoader
+from model_runner import AbstractModelRunner, InThreadModelRunner, ThreadedModelRunner
+from pyscript_view import PyScriptBufferedRenderer, PyScriptImageLoader
 from pyscript_repository import PyScriptRepository
 from values import Size
 from view import GameView
@@ -27,6 +34,17 @@ SCREEN_HEIGHT = 400
 _PRELOAD_IMAGE_FILES: list[str] = [
     'image.png',
 ]
+#: アトラスの目録ファイル名。指定すると画像をアトラスから読み込む(tools/pack_atlas.pyで作成)
+_ATLAS_MANIFEST_FILE: tp.Optional[str] = None
+#: ゲームモデルを別スレッドで更新するか。Pyodideはスレッドを起動できないので、ブラウザではFalseにする
+_THREADED_MODEL = False
+#: プレイ中の入力を記録するか。記録した入力はbench/bench_replay.pyで再生できる。
+#: 更新の回数も記録するので、ゲームモデルを同じスレッドで更新する場合(_THREADED_MODEL = False)だけ再現できる
+_RECORD_INPUT = False
+#: 記録した入力をファイルとしてダウンロードするキー
+_DUMP_INPUT_KEY = VirtualKey.P
+#: 記録した入力のファイル名
+_INPUT_LOG_FILE = 'input.psir'
 
 
 async def main() -> None:
@@ -39,18 +57,57 @@ async def main() -> None:
             world_size=Size(SCREEN_WIDTH, SCREEN_HEIGHT),
             log_func=pyscript_util.log,
             repository=repository)
-        renderer = PyScriptRenderer(canvas)
-        loader = PyScriptImageLoader(_PRELOAD_IMAGE_FILES)
-        view = GameView(model, renderer, loader, log_func=pyscript_util.log)
-        controller = GameController(view, canvas)
+        renderer = PyScriptBufferedRenderer(canvas)
+        atlas = None
+        if _ATLAS_MANIFEST_FILE is not None:
+            atlas = AtlasManifest.from_json(open_url(_ATLAS_MANIFEST_FILE).read())
+        loader = PyScriptImageLoader(_PRELOAD_IMAGE_FILES, atlas)
+        runner: AbstractModelRunner
+        if _THREADED_MODEL:
+            runner = ThreadedModelRunner(model, step=_FPS)
+        else:
+            runner = InThreadModelRunner(model)
+        view = GameView(
+            model, renderer, loader, log_func=pyscript_util.log, layered=True, runner=runner)
+        input_queue = InputQueue(pool=create_param_pool())
+        input_queue.add_listener(view.input_snapshot.update)
+        recorder = None
+        if _RECORD_INPUT:
+            recorder = InputRecorder()
+            input_queue.add_listener(recorder.record_frame)
+        controller = RingBufferGameController(input_queue, canvas)
     except ValueError as e:
         console.error(f'Failed to create GameObjects:{e}')
         return
 
-    while True:
-        model.update(_FPS)
-        view.draw()
-        await asyncio.sleep(_FPS)
+    dump_requested = False
+
+    def process_input() -> None:
+        nonlocal dump_requested
+        if dump_requested:
+            # 前のフレームの更新まで終わってから、その時点の状態のチェックサムを付けて書き出す
+            dump_requested = False
+            log = recorder.to_log(checksum=model.to_save_data().checksum)
+            pyscript_util.download(_INPUT_LOG_FILE, log.to_bytes())
+            pyscript_util.log(f'[InputRecorder] {len(recorder)} frames')
+        controller.poll()
+        input_queue.dispatch(view.operate)
+        if recorder is not None and view.input_snapshot.pressed_this_frame(_DUMP_INPUT_KEY):
+            dump_requested = True
+
+    def update(delta: float) -> None:
+        runner.update(delta)
+        if recorder is not None:
+            recorder.record_update(delta)
+
+    runner.start()
+    loop = GameLoop(
+        SystemClock(), update, view.draw, step=_FPS,
+        process_input=process_input)
+    try:
+        await loop.run(asyncio.sleep)
+    finally:
+        runner.stop()
 
 
 def _setup_canvas() -> Element:
@@ -1,6 +1,6 @@
 """ゲームコントローラー(pyscript).
 
-html側の入力イベントを抽象コードに変換してModelに渡す.
+html側の入力イベントを抽象コードに変換して入力キューに積む.
 """
 
 from js import (
@@ -9,12 +9,14 @@ from js import (
     Element,
     MouseEvent,
     KeyboardEvent,
+    Object,
+    setupInputRing,
 )
-from pyodide import create_proxy
+from pyodide import create_proxy, to_js
 
-from view import GameView
 from values import Position
-from input import VirtualKey, InputState, OperationParam
+from input import VirtualKey, InputState, InputQueue
+from input_ring import InputRingBuffer
 
 
 # マウスボタン→抽象キーへの変換テーブル
@@ -94,16 +96,18 @@ def key_to_vk(key) -> VirtualKey:
 class GameController:
     """ゲームのコントローラー.
 
-    :param view: ビュー
+    入力はその場で処理せずに入力キューに積み、ゲームループでまとめて処理する。
+
+    :param input_queue: 入力キュー
     :param canvas: 入力イベントを登録するためのCanvas
     """
 
-    def __init__(self, view: GameView, canvas: Element) -> None:
+    def __init__(self, input_queue: InputQueue, canvas: Element) -> None:
         console.log('[GameController] Create')
 
-        if view is None:
-            raise ValueError('view is None')
-        self._view = view
+        if input_queue is None:
+            raise ValueError('input_queue is None')
+        self._input_queue = input_queue
 
         if canvas is None:
             raise ValueError('canvas is None')
@@ -112,28 +116,16 @@ class GameController:
     def mousedown(self, event: MouseEvent) -> None:
         """マウスボタンが押された."""
         virtual_key = MOUSE_BUTTON_TO_VK_DICT[event.button]
-        param = OperationParam(
-            code=virtual_key,
-            state=InputState.Press,
-            position=Position(event.x, event.y))
-        self._view.operate(param)
+        self._input_queue.push_event(virtual_key, InputState.Press, Position(event.x, event.y))
 
     def mouseup(self, event: MouseEvent) -> None:
         """マウスボタンが離された."""
         virtual_key = MOUSE_BUTTON_TO_VK_DICT[event.button]
-        param = OperationParam(
-            code=virtual_key,
-            state=InputState.Release,
-            position=Position(event.x, event.y))
-        self._view.operate(param)
+        self._input_queue.push_event(virtual_key, InputState.Release, Position(event.x, event.y))
 
     def mousemove(self, event: MouseEvent) -> None:
         """マウスカーソルが移動した."""
-        param = OperationParam(
-            code=VirtualKey.MouseMove,
-            state=InputState.Press,
-            position=Position(event.x, event.y))
-        self._view.operate(param)
+        self._input_queue.push_event(VirtualKey.MouseMove, InputState.Press, Position(event.x, event.y))
 
     def keydown(self, event: KeyboardEvent) -> None:
         """キーが押された."""
@@ -143,14 +135,12 @@ class GameController:
         else:
             console.log(f'[GameController] keydown(key={event.key} -> VK={virtual_key})')
             state = InputState.Press
-        param = OperationParam(code=virtual_key, state=state)
-        self._view.operate(param)
+        self._input_queue.push_event(virtual_key, state)
 
     def keyup(self, event: KeyboardEvent) -> None:
         """キーが離された."""
         virtual_key = key_to_vk(event.key)
-        param = OperationParam(code=virtual_key, state=InputState.Release)
-        self._view.operate(param)
+        self._input_queue.push_event(virtual_key, InputState.Release)
 
     def _register_input_events(self, canvas: Element) -> None:
         """入力イベントを登録する."""
@@ -161,3 +151,59 @@ class GameController:
         # キーイベントはelementでは取れないのでdocumentに登録する必要がある
         document.addEventListener("keydown", create_proxy(self.keydown))
         document.addEventListener("keyup", create_proxy(self.keyup))
+
+
+class RingBufferGameController:
+    """リングバッファを使うゲームのコントローラー.
+
+    入力イベントはJS側でリングバッファに書き込まれ、Pythonのコールバックは呼ばれない。
+    pollでまとめて読み出して入力キューに積む。
+
+    :param input_queue: 入力キュー
+    :param canvas: 入力イベントを登録するためのCanvas
+    :param capacity: 1フレームに保持できる入力の数
+    """
+
+    def __init__(self, input_queue: InputQueue, canvas: Element, capacity: int = 256) -> None:
+        console.log('[RingBufferGameController] Create')
+
+        if input_queue is None:
+            raise ValueError('input_queue is None')
+        self._input_queue = input_queue
+
+        if canvas is None:
+            raise ValueError('canvas is None')
+        self._ring = InputRingBuffer(capacity)
+        self._register_input_events(canvas)
+
+    @property
+    def dropped_count(self) -> int:
+        """あふれて捨てた入力の数."""
+        return self._ring.dropped_count
+
+    def poll(self) -> int:
+        """書き込まれた入力を入力キューに積む.
+
+        :return: 積んだ入力の数
+        """
+        return self._ring.read_into(self._input_queue)
+
+    def _register_input_events(self, canvas: Element) -> None:
+        """入力イベントを登録する."""
+        key_map = {key: vk.value for (key, vk) in KEY_TO_VK_DICT.items()}
+        button_map = {button: vk.value for (button, vk) in MOUSE_BUTTON_TO_VK_DICT.items()}
+        codes = {
+            'MouseMove': VirtualKey.MouseMove.value,
+            'Dummy': VirtualKey.Dummy.value,
+            'Press': InputState.Press.value,
+            'Release': InputState.Release.value,
+            'Repeat': InputState.Repeat.value,
+        }
+        # 配列はJS側から参照され続けるので、プロキシを保持しておく
+        self._ring_proxy = create_proxy(self._ring.data)
+        setupInputRing(
+            canvas,
+            self._ring_proxy,
+            to_js(key_map, dict_converter=Object.fromEntries),
+            to_js(button_map, dict_converter=Object.fromEntries),
+            to_js(codes, dict_converter=Object.fromEntries))
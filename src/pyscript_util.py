@@ -1,7 +1,30 @@
 """PyScript環境でのみ使える便利機能."""
 
-from js import console
+from js import (
+    console,
+    document,
+    setTimeout,
+    Blob,
+    Object,
+    URL,
+)
+from pyodide import create_once_callable, to_js
+
+#: ダウンロード用のURLを解放するまでの時間(ミリ秒)。クリック直後に解放するとダウンロードが中断されるブラウザがある
+_REVOKE_DELAY_MS = 1000
 
 
 def log(mes: str):
     console.log(mes)
+
+
+def download(file_name: str, data: bytes) -> None:
+    """バイナリをファイルとしてブラウザにダウンロードさせる."""
+    options = to_js({'type': 'application/octet-stream'}, dict_converter=Object.fromEntries)
+    blob = Blob.new(to_js([to_js(data)]), options)
+    url = URL.createObjectURL(blob)
+    anchor = document.createElement('a')
+    anchor.href = url
+    anchor.download = file_name
+    anchor.click()
+    setTimeout(create_once_callable(lambda: URL.revokeObjectURL(url)), _REVOKE_DELAY_MS)
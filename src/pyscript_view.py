@@ -1,4 +1,6 @@
 """ゲームビュー(pyscript)."""
+from __future__ import annotations
+
 import math
 import os.path
 
@@ -7,74 +9,205 @@ from js import (
     Element,
     CanvasRenderingContext2D,
     Image,
+    document,
+    drawRenderBatch,
+    executeRenderCommands,
 )
+from pyodide import create_proxy, to_js
 
 import typing as tp
+from atlas import AtlasManifest
 from model import GameModel
+from render_command import (
+    CommandRecordingRenderer,
+    RenderCommandBuffer,
+    RenderOp,
+    BATCH_ITEM_SIZE,
+    BatchValues,
+    BatchColors,
+    get_batch_bounds,
+    split_batch,
+    to_float_array,
+)
+from culling import (
+    ViewportCuller,
+    get_line_bounds,
+    get_stroke_rect_bounds,
+    get_circle_bounds,
+    get_text_bounds,
+)
+from render_state import CanvasState
+from text_cache import TextSurface, TextSurfaceCache
 from values import *
 from view import AbstractRenderer, AbstractImageLoader, Font
 
 
-class PyScriptFont(Font):
-    """PyScript用フォント設定."""
+def create_canvas(size: Size) -> Element:
+    """オフスクリーンのCanvasを作る."""
+    canvas = document.createElement('canvas')
+    canvas.width = size.width
+    canvas.height = size.height
+    return canvas
+
 
-    def __init__(self, size: int, name: str, bold: bool = False):
-        super().__init__(size, name, bold)
+def rasterize_text(text: str, font: Font, color: Color) -> TextSurface:
+    """文字列をオフスクリーンのCanvasに描画する."""
+    canvas = document.createElement('canvas')
+    ctx = canvas.getContext('2d')
+    ctx.font = font.css
+    metrics = ctx.measureText(text)
+    ascent = math.ceil(metrics.actualBoundingBoxAscent)
+    descent = math.ceil(metrics.actualBoundingBoxDescent)
+    width = max(1, math.ceil(metrics.width))
+    height = max(1, ascent + descent)
 
-    def __str__(self):
-        result = f'{self.size}px '
-        if self.bold:
-            result += 'bold '
-        result += self.name
-        return result
+    # サイズを変えるとコンテキストの状態が初期化されるので、設定し直す
+    canvas.width = width
+    canvas.height = height
+    ctx.font = font.css
+    ctx.fillStyle = color.css
+    ctx.fillText(text, 0, ascent)
+    return TextSurface(canvas, width, height, ascent)
 
 
 class PyScriptRenderer(AbstractRenderer):
-    """PyScript用の描画クラス."""
+    """PyScript用の描画クラス.
+
+    コンテキストの状態はPython側で追跡し、値が変わらない場合は設定を省略する。
+
+    :param canvas: 描画先のCanvas
+    :param background: 背景色。Noneならクリアした範囲は透明になる
+    :param cull: 画面外の描画を省略するか
+    """
 
     #: 背景色
-    BACK_GROUND_COLOR = 'rgb(200, 200, 200)'
+    BACK_GROUND_COLOR = Color(200, 200, 200)
 
     def __init__(
             self,
-            canvas: Element) -> None:
+            canvas: Element,
+            background: tp.Optional[Color] = BACK_GROUND_COLOR,
+            cull: bool = False) -> None:
         if canvas is None:
             raise ValueError('canvas is None')
         self._canvas = canvas
+        self._background = background
+        self._culler: tp.Optional[ViewportCuller] = None
+        if cull:
+            self._culler = ViewportCuller(Rect(Position(0, 0), Size(canvas.width, canvas.height)))
         self._ctx = canvas.getContext('2d')
+        self._state = CanvasState()
+        self._text_cache = TextSurfaceCache(rasterize_text)
 
     @property
     def size(self) -> Size:
         """サイズ."""
         return Size(self._canvas.width, self._canvas.height)
 
-    def clear(self):
-        """画面をクリアする."""
-        self._ctx.fillStyle = self.BACK_GROUND_COLOR
-        self._ctx.fillRect(0, 0, self.size.width, self.size.height)
+    @property
+    def state(self) -> CanvasState:
+        """コンテキストの状態."""
+        return self._state
+
+    @property
+    def text_cache(self) -> TextSurfaceCache:
+        """描画済み文字列のキャッシュ."""
+        return self._text_cache
+
+    @property
+    def culler(self) -> tp.Optional[ViewportCuller]:
+        """画面外の描画の省略。省略しないならNone."""
+        return self._culler
+
+    @property
+    def surface(self) -> Element:
+        """描画先のCanvas."""
+        return self._canvas
+
+    def create_offscreen(
+            self,
+            size: Size,
+            background: tp.Optional[Color] = None) -> PyScriptRenderer:
+        """オフスクリーンの描画先を作る."""
+        offscreen = PyScriptRenderer(create_canvas(size), background, self._culler is not None)
+        offscreen._text_cache = self._text_cache
+        return offscreen
 
-    def draw_text(self, text: str, position: tuple[int, int], font: Font, color: Color) -> None:
-        """テキストの描画."""
+    def clear(self, rect: Rect = None):
+        """画面をクリアする.
+
+        :param rect: クリアする範囲。Noneなら画面全体
+        """
+        if self._background is None:
+            if rect is None:
+                self._ctx.clearRect(0, 0, self._canvas.width, self._canvas.height)
+            else:
+                self._ctx.clearRect(rect.position.x, rect.position.y, rect.size.width, rect.size.height)
+            return
+
+        self._set_fill_style(self._background.css)
+        if rect is None:
+            self._ctx.fillRect(0, 0, self.size.width, self.size.height)
+        else:
+            self._ctx.fillRect(rect.position.x, rect.position.y, rect.size.width, rect.size.height)
+
+    def set_clip(self, rects: tp.Sequence[Rect]) -> None:
+        """描画範囲を指定した矩形の内側に制限する."""
+        self._ctx.save()
+        self._state.save()
+        self._ctx.beginPath()
+        for rect in rects:
+            self._ctx.rect(rect.position.x, rect.position.y, rect.size.width, rect.size.height)
+        self._ctx.clip()
+
+    def reset_clip(self) -> None:
+        """描画範囲の制限を解除する."""
+        self._ctx.restore()
+        self._state.restore()
+
+    def draw_text(
+            self,
+            text: str,
+            position: tuple[int, int],
+            font: Font,
+            color: Color,
+            cached: bool = False) -> None:
+        """テキストの描画.
+
+        :param cached: 描画済みの画像をキャッシュして使うか。変化しない文字列に指定する
+        """
         (x, y) = position
-        text = text
-        pyscript_font = PyScriptFont(font.size, font.name, font.bold)
-        self._ctx.font = str(pyscript_font)
-        self._ctx.fillStyle = self._color_to_style(color)
+        if cached:
+            surface = self._text_cache.get(text, font, color)
+            self.draw_image(
+                surface.image,
+                Position(x, y - surface.baseline),
+                Size(surface.width, surface.height))
+            return
+        if not self._is_visible(get_text_bounds(text, x, y, font)):
+            return
+        if self._state.set_font(font.css):
+            self._ctx.font = font.css
+        self._set_fill_style(color.css)
         self._ctx.fillText(text, x, y)
 
     def draw_rect(self, rect: Rect, color: Color, fill=True) -> None:
         """矩形の描画."""
+        if not self._is_visible(rect if fill else get_stroke_rect_bounds(rect)):
+            return
         if fill:
-            self._ctx.fillStyle = self._color_to_style(color)
+            self._set_fill_style(color.css)
             self._ctx.fillRect(rect.position.x, rect.position.y, rect.size.width, rect.size.height)
         else:
-            self._ctx.strokeStyle = self._color_to_style(color)
+            self._set_stroke_style(color.css)
             self._ctx.strokeRect(rect.position.x, rect.position.y, rect.size.width, rect.size.height)
 
     def draw_line(self, start_pos: tuple[int, int], end_pos: tuple[int, int], color: Color) -> None:
         """線の描画."""
+        if not self._is_visible(get_line_bounds(*start_pos, *end_pos)):
+            return
         self._ctx.beginPath()
-        self._ctx.strokeStyle = self._color_to_style(color)
+        self._set_stroke_style(color.css)
         self._ctx.moveTo(*start_pos)
         self._ctx.lineTo(*end_pos)
         self._ctx.stroke()
@@ -86,32 +219,178 @@ class PyScriptRenderer(AbstractRenderer):
         angle_end = 360 * math.pi / 180
 
         (x, y) = center
+        if not self._is_visible(get_circle_bounds(x, y, radius)):
+            return
         self._ctx.beginPath()
-        self._ctx.fillStyle = self._color_to_style(color)
+        self._set_fill_style(color.css)
         self._ctx.arc(x, y, radius, angle_start, angle_end)
         self._ctx.fill()
         self._ctx.closePath()
 
-    def draw_image(self, image: Image, position: Position, size: Size) -> None:
-        """画像の描画."""
-        self._ctx.drawImage(image, position.x, position.y, size.width, size.height)
+    def draw_image(self, image: Image, position: Position, size: Size, src_rect: Rect = None) -> None:
+        """画像の描画.
+
+        :param src_rect: 描画する画像内の範囲。Noneなら画像全体
+        """
+        if not self._is_visible(Rect(position, size)):
+            return
+        if src_rect is None:
+            self._ctx.drawImage(image, position.x, position.y, size.width, size.height)
+        else:
+            self._ctx.drawImage(
+                image,
+                src_rect.position.x, src_rect.position.y, src_rect.size.width, src_rect.size.height,
+                position.x, position.y, size.width, size.height)
+
+    def draw_rects(self, rects: BatchValues, colors: BatchColors, fill=True) -> None:
+        """矩形の一括描画.
+
+        :param rects: [x, y, w, h]を並べた座標列
+        :param colors: 全要素共通の色か、要素ごとの色
+        """
+        self._draw_batch(RenderOp.FillRects if fill else RenderOp.StrokeRects, rects, colors, fill)
 
-    @staticmethod
-    def _color_to_style(color: Color) -> str:
-        return f'rgb({color.r},{color.g},{color.b})'
+    def draw_lines(self, lines: BatchValues, colors: BatchColors) -> None:
+        """線の一括描画.
+
+        :param lines: [x1, y1, x2, y2]を並べた座標列
+        :param colors: 全要素共通の色か、要素ごとの色
+        """
+        self._draw_batch(RenderOp.Lines, lines, colors, fill=False)
+
+    def draw_circles(self, circles: BatchValues, colors: BatchColors) -> None:
+        """円の一括描画.
+
+        :param circles: [x, y, radius]を並べた座標列
+        :param colors: 全要素共通の色か、要素ごとの色
+        """
+        self._draw_batch(RenderOp.Circles, circles, colors, fill=True)
+
+    def draw_images(self, image: Image, rects: BatchValues) -> None:
+        """同じ画像の一括描画.
+
+        :param rects: [x, y, w, h]を並べた描画先の座標列
+        """
+        values = to_float_array(rects)
+        if len(values) % 4 != 0:
+            raise ValueError(f'len(rects)({len(values)}) is not a multiple of 4.')
+        if len(values) == 0 or not self._is_visible(get_batch_bounds(RenderOp.Images, values)):
+            return
+        drawRenderBatch(self._ctx, RenderOp.Images, to_js(values), 0, len(values) // 4, image)
+
+    def _draw_batch(self, op: RenderOp, values: BatchValues, colors: BatchColors, fill: bool) -> None:
+        """一括描画を色ごとにJS側で実行する."""
+        item_size = BATCH_ITEM_SIZE[op]
+        for (color, run) in split_batch(values, item_size, colors):
+            if self._culler is not None and not self._culler.is_visible(get_batch_bounds(op, run)):
+                continue
+            if fill:
+                self._set_fill_style(color.css)
+            else:
+                self._set_stroke_style(color.css)
+            drawRenderBatch(self._ctx, op, to_js(run), 0, len(run) // item_size, None)
+
+    def flush(self) -> None:
+        """1フレーム分の描画命令を確定する."""
+        if self._culler is not None:
+            self._culler.end_frame()
+
+    def _is_visible(self, bounds: Rect) -> bool:
+        """描画する必要があるか."""
+        return self._culler is None or self._culler.is_visible(bounds)
+
+    def _set_fill_style(self, style: str) -> None:
+        """塗りつぶしスタイルを設定する."""
+        if self._state.set_fill_style(style):
+            self._ctx.fillStyle = style
+
+    def _set_stroke_style(self, style: str) -> None:
+        """線スタイルを設定する."""
+        if self._state.set_stroke_style(style):
+            self._ctx.strokeStyle = style
+
+
+class PyScriptBufferedRenderer(CommandRecordingRenderer):
+    """PyScript用の描画クラス(コマンドバッファ版).
+
+    描画命令をコマンドバッファに記録し、flush時にJS側の実行器へ1回で渡す。
+
+    :param canvas: 描画先のCanvas
+    :param sort_by_state: 描画状態ごとに描画命令を並べ替えるか
+    :param background: 背景色。Noneならクリアした範囲は透明になる
+    :param text_cache: 描画済み文字列のキャッシュ。Noneなら新しく作る
+    :param cull: 画面外の描画命令を記録しないか
+    """
+
+    def __init__(
+            self,
+            canvas: Element,
+            sort_by_state: bool = False,
+            background: tp.Optional[Color] = Color(200, 200, 200),
+            text_cache: tp.Optional[TextSurfaceCache] = None,
+            cull: bool = False) -> None:
+        if canvas is None:
+            raise ValueError('canvas is None')
+        if text_cache is None:
+            text_cache = TextSurfaceCache(rasterize_text)
+        super().__init__(
+            Size(canvas.width, canvas.height),
+            background=background,
+            sort_by_state=sort_by_state,
+            text_cache=text_cache,
+            cull=cull)
+        self._canvas = canvas
+        self._ctx = canvas.getContext('2d')
+        # JS側でgetBufferを使ってコピーせずに読めるよう、配列のプロキシを保持しておく
+        self._commands_proxy = create_proxy(self.buffer.commands)
+
+    @property
+    def surface(self) -> Element:
+        """描画先のCanvas."""
+        return self._canvas
+
+    def create_offscreen(
+            self,
+            size: Size,
+            background: tp.Optional[Color] = None) -> PyScriptBufferedRenderer:
+        """オフスクリーンの描画先を作る."""
+        return PyScriptBufferedRenderer(
+            create_canvas(size),
+            self._sort_by_state,
+            background,
+            self._text_cache,
+            self._culler is not None)
+
+    def execute(self, buffer: RenderCommandBuffer) -> None:
+        """コマンドバッファをJS側で実行する."""
+        executeRenderCommands(
+            self._ctx,
+            self._commands_proxy,
+            to_js(buffer.strings),
+            to_js(buffer.images))
 
 
 class PyScriptImageLoader(AbstractImageLoader):
-    """PyScript用の画像読み込みクラス."""
+    """PyScript用の画像読み込みクラス.
+
+    アトラスの目録を渡すと、個々のファイルではなくアトラスの画像を1つだけ読み込む。
+
+    :param file_names: 読み込む画像ファイル名
+    :param atlas: アトラスの目録
+    """
 
-    def __init__(self, file_names: tp.Collection[str]):
+    def __init__(self, file_names: tp.Collection[str], atlas: tp.Optional[AtlasManifest] = None):
         super().__init__(file_names)
         self._file_names = file_names
+        self._atlas = atlas
         self._img_dict: dict[str, Image] = {}
 
     def load(self) -> None:
         """読み込む."""
-        for file_name in self._file_names:
+        file_names = self._file_names
+        if self._atlas is not None:
+            file_names = [self._atlas.image_file]
+        for file_name in file_names:
             console.log(f'Load image({file_name})')
             self._img_dict[file_name] = None
             image = Image.new()  # pythonではnew Image()とできないので、特殊な書き方になる
@@ -131,5 +410,12 @@ class PyScriptImageLoader(AbstractImageLoader):
 
     def get_image(self, file_name: str) -> Image:
         """画像データを得る."""
+        if self._atlas is not None and file_name in self._atlas:
+            return self._img_dict[self._atlas.image_file]
         return self._img_dict[file_name]
 
+    def get_source_rect(self, file_name: str) -> tp.Optional[Rect]:
+        """画像データ内の範囲を得る."""
+        if self._atlas is None:
+            return None
+        return self._atlas.get(file_name)
@@ -0,0 +1,227 @@
+"""位置、矩形の配列.
+
+多数の位置、矩形を、要素ごとのオブジェクトではなく列ごとの配列で持ち、判定をまとめて行う。
+numpyがあれば列をnumpy配列で持って判定をベクトル化する。
+なければ列をfloatのリストで持ち、判定は内包表記で行う。
+(arrayモジュールの配列は、要素を取り出すたびにfloatを生成するのでリストより遅い)
+
+判定の結果は要素ごとの真偽を並べたマスクで返す。
+numpyがあればbool配列、なければ0/1のbytearrayになる。どちらも添え字で参照でき、count_maskで数えられる。
+"""
+
+from __future__ import annotations
+
+import typing as tp
+
+from values import Position, Rect
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#: 型：列
+Column = tp.Union[list[float], 'numpy.ndarray']
+#: 型：マスク
+Mask = tp.Union[bytearray, 'numpy.ndarray']
+
+
+def count_mask(mask: Mask) -> int:
+    """マスクの真の数を数える(要素ごとのループはしない)."""
+    if isinstance(mask, bytearray):
+        return mask.count(1)
+    return int(numpy.count_nonzero(mask))
+
+
+def _to_column(values: tp.Iterable[float]) -> Column:
+    """列に変換する."""
+    if numpy is not None:
+        return numpy.array(values if isinstance(values, tp.Sized) else list(values), dtype=numpy.float64)
+    return [float(value) for value in values]
+
+
+def _to_list(column: Column) -> list[float]:
+    """列をfloatのリストに変換する."""
+    if numpy is not None:
+        return column.tolist()
+    return column
+
+
+def _add(column: Column, value: float) -> Column:
+    """列の全ての値に足す."""
+    if numpy is not None:
+        return column + value
+    return [x + value for x in column]
+
+
+def _add_each(column: Column, values: Column) -> Column:
+    """列の値に同じ添え字の値を足す."""
+    if numpy is not None:
+        return column + values
+    return [x + value for (x, value) in zip(column, values)]
+
+
+class PositionArray:
+    """位置の配列.
+
+    :param positions: 位置
+    """
+
+    def __init__(self, positions: tp.Iterable[Position] = ()):
+        positions = list(positions)
+        #: x座標の列
+        self.x: Column = _to_column([position.x for position in positions])
+        #: y座標の列
+        self.y: Column = _to_column([position.y for position in positions])
+
+    @classmethod
+    def from_columns(cls, x: tp.Iterable[float], y: tp.Iterable[float]) -> PositionArray:
+        """列から生成する."""
+        positions = cls()
+        positions.x = _to_column(x)
+        positions.y = _to_column(y)
+        if len(positions.x) != len(positions.y):
+            raise ValueError('Columns must have the same length.')
+        return positions
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, index: int) -> Position:
+        return Position(float(self.x[index]), float(self.y[index]))
+
+    def to_positions(self) -> list[Position]:
+        """Positionのリストに変換する."""
+        return [Position(x, y) for (x, y) in zip(_to_list(self.x), _to_list(self.y))]
+
+    def translate(self, dx: float, dy: float) -> None:
+        """全ての位置を移動する."""
+        self.x = _add(self.x, dx)
+        self.y = _add(self.y, dy)
+
+
+class RectArray:
+    """矩形の配列.
+
+    Rectと同じく、上下左右の座標を列で持つ。
+    判定の境界の扱いはRect.contains_point、Rect.intersects_with_rectと同じ(辺上も含む)。
+
+    :param rects: 矩形
+    """
+
+    def __init__(self, rects: tp.Iterable[Rect] = ()):
+        rects = list(rects)
+        #: 左端の列
+        self.left: Column = _to_column([rect.left for rect in rects])
+        #: 上端の列
+        self.top: Column = _to_column([rect.top for rect in rects])
+        #: 右端の列
+        self.right: Column = _to_column([rect.right for rect in rects])
+        #: 下端の列
+        self.bottom: Column = _to_column([rect.bottom for rect in rects])
+
+    @classmethod
+    def from_columns(
+            cls,
+            x: tp.Iterable[float],
+            y: tp.Iterable[float],
+            width: tp.Iterable[float],
+            height: tp.Iterable[float]) -> RectArray:
+        """位置と大きさの列から生成する."""
+        rects = cls()
+        rects.left = _to_column(x)
+        rects.top = _to_column(y)
+        width = _to_column(width)
+        height = _to_column(height)
+        if not len(rects.left) == len(rects.top) == len(width) == len(height):
+            raise ValueError('Columns must have the same length.')
+        rects.right = _add_each(rects.left, width)
+        rects.bottom = _add_each(rects.top, height)
+        return rects
+
+    def __len__(self) -> int:
+        return len(self.left)
+
+    def __getitem__(self, index: int) -> Rect:
+        return Rect._from_edges(
+            float(self.left[index]), float(self.top[index]),
+            float(self.right[index]), float(self.bottom[index]))
+
+    def to_rects(self) -> list[Rect]:
+        """Rectのリストに変換する."""
+        return [
+            Rect._from_edges(left, top, right, bottom)
+            for (left, top, right, bottom)
+            in zip(_to_list(self.left), _to_list(self.top), _to_list(self.right), _to_list(self.bottom))
+        ]
+
+    def translate(self, dx: float, dy: float) -> None:
+        """全ての矩形を移動する."""
+        self.left = _add(self.left, dx)
+        self.right = _add(self.right, dx)
+        self.top = _add(self.top, dy)
+        self.bottom = _add(self.bottom, dy)
+
+    def translate_each(self, offsets: PositionArray) -> None:
+        """矩形ごとに移動する.
+
+        :param offsets: 矩形ごとの移動量
+        """
+        if len(offsets) != len(self):
+            raise ValueError(f'offsets length({len(offsets)}) must be {len(self)}.')
+        self.left = _add_each(self.left, offsets.x)
+        self.right = _add_each(self.right, offsets.x)
+        self.top = _add_each(self.top, offsets.y)
+        self.bottom = _add_each(self.bottom, offsets.y)
+
+    def contains_point(self, point: Position) -> Mask:
+        """各矩形が指定した点を含むか."""
+        px = point.x
+        py = point.y
+        if numpy is not None:
+            return (self.left <= px) & (px <= self.right) & (self.top <= py) & (py <= self.bottom)
+        return bytearray([
+            left <= px <= right and top <= py <= bottom
+            for (left, top, right, bottom) in zip(self.left, self.top, self.right, self.bottom)
+        ])
+
+    def contains_points(self, points: PositionArray) -> Mask:
+        """各矩形が同じ添え字の点を含むか."""
+        if len(points) != len(self):
+            raise ValueError(f'points length({len(points)}) must be {len(self)}.')
+        if numpy is not None:
+            (px, py) = (points.x, points.y)
+            return (self.left <= px) & (px <= self.right) & (self.top <= py) & (py <= self.bottom)
+        return bytearray([
+            left <= px <= right and top <= py <= bottom
+            for (left, top, right, bottom, px, py)
+            in zip(self.left, self.top, self.right, self.bottom, points.x, points.y)
+        ])
+
+    def intersects_rect(self, rect: Rect) -> Mask:
+        """各矩形が指定した矩形と交差するか."""
+        (left, top, right, bottom) = (rect.left, rect.top, rect.right, rect.bottom)
+        if numpy is not None:
+            return (left <= self.right) & (self.left <= right) & (top <= self.bottom) & (self.top <= bottom)
+        return bytearray([
+            left <= other_right and other_left <= right and top <= other_bottom and other_top <= bottom
+            for (other_left, other_top, other_right, other_bottom)
+            in zip(self.left, self.top, self.right, self.bottom)
+        ])
+
+    def intersects(self, other: RectArray) -> tp.Sequence[Mask]:
+        """各矩形が、指定した配列の各矩形と交差するか.
+
+        :return: 自分の矩形ごとに、otherの矩形と交差するかを並べたマスク(N×M)
+        """
+        if numpy is not None:
+            return ((other.left <= self.right[:, None]) & (self.left[:, None] <= other.right)
+                    & (other.top <= self.bottom[:, None]) & (self.top[:, None] <= other.bottom))
+        columns = list(zip(other.left, other.top, other.right, other.bottom))
+        masks = []
+        for (left, top, right, bottom) in zip(self.left, self.top, self.right, self.bottom):
+            masks.append(bytearray([
+                other_left <= right and left <= other_right and other_top <= bottom and top <= other_bottom
+                for (other_left, other_top, other_right, other_bottom) in columns
+            ]))
+        return masks
@@ -0,0 +1,197 @@
+// 描画コマンドの実行器.
+// render_command.pyで記録したコマンドバッファを1回の呼び出しでまとめて実行する。
+// opの値はrender_command.RenderOpと合わせること。
+
+const RenderOp = Object.freeze({
+  Clear: 1,
+  FillRect: 2,
+  StrokeRect: 3,
+  Line: 4,
+  Circle: 5,
+  Image: 6,
+  Text: 7,
+  SetFillStyle: 8,
+  SetStrokeStyle: 9,
+  SetFont: 10,
+  ClearRect: 11,
+  BeginClip: 12,
+  ClipRect: 13,
+  ApplyClip: 14,
+  ResetClip: 15,
+  EraseRect: 16,
+  ImageRect: 17,
+  FillRects: 18,
+  StrokeRects: 19,
+  Lines: 20,
+  Circles: 21,
+  Images: 22,
+});
+
+/**
+ * 一括描画を実行する.
+ *
+ * 画像以外は1つのパスにまとめて、1回のfill/strokeで描画する。
+ *
+ * @param ctx CanvasRenderingContext2D
+ * @param op 一括描画コマンドの種類
+ * @param c 座標列
+ * @param start 座標列の開始位置
+ * @param count 要素数
+ * @param image 画像(Imagesのみ)
+ * @return 座標列の終了位置
+ */
+function drawRenderBatch(ctx, op, c, start, count, image) {
+  let i = start;
+  switch (op) {
+    case RenderOp.FillRects:
+    case RenderOp.StrokeRects:
+      ctx.beginPath();
+      for (let k = 0; k < count; k++, i += 4) {
+        ctx.rect(c[i], c[i + 1], c[i + 2], c[i + 3]);
+      }
+      if (op === RenderOp.FillRects) {
+        ctx.fill();
+      } else {
+        ctx.stroke();
+      }
+      break;
+    case RenderOp.Lines:
+      ctx.beginPath();
+      for (let k = 0; k < count; k++, i += 4) {
+        ctx.moveTo(c[i], c[i + 1]);
+        ctx.lineTo(c[i + 2], c[i + 3]);
+      }
+      ctx.stroke();
+      break;
+    case RenderOp.Circles:
+      ctx.beginPath();
+      for (let k = 0; k < count; k++, i += 3) {
+        // 前の円とつながらないように、円周上の開始点へ移動する
+        ctx.moveTo(c[i] + c[i + 2], c[i + 1]);
+        ctx.arc(c[i], c[i + 1], c[i + 2], 0, Math.PI * 2);
+      }
+      ctx.fill();
+      break;
+    case RenderOp.Images:
+      for (let k = 0; k < count; k++, i += 4) {
+        ctx.drawImage(image, c[i], c[i + 1], c[i + 2], c[i + 3]);
+      }
+      break;
+    default:
+      throw new Error(`Unknown batch op(${op})`);
+  }
+  return i;
+}
+
+/**
+ * コマンドバッファを実行する.
+ *
+ * @param ctx CanvasRenderingContext2D
+ * @param commandsProxy コマンド列(array('d'))のPyProxy。getBufferでコピーせずに読む
+ * @param strings 文字列テーブル
+ * @param images 画像テーブル
+ */
+function executeRenderCommands(ctx, commandsProxy, strings, images) {
+  const buffer = commandsProxy.getBuffer('f64');
+  try {
+    const c = buffer.data;
+    const n = c.length;
+    let i = 0;
+    while (i < n) {
+      switch (c[i]) {
+        case RenderOp.Clear:
+          ctx.fillStyle = strings[c[i + 1]];
+          ctx.fillRect(0, 0, ctx.canvas.width, ctx.canvas.height);
+          i += 2;
+          break;
+        case RenderOp.FillRect:
+          ctx.fillRect(c[i + 1], c[i + 2], c[i + 3], c[i + 4]);
+          i += 5;
+          break;
+        case RenderOp.StrokeRect:
+          ctx.strokeRect(c[i + 1], c[i + 2], c[i + 3], c[i + 4]);
+          i += 5;
+          break;
+        case RenderOp.Line:
+          ctx.beginPath();
+          ctx.moveTo(c[i + 1], c[i + 2]);
+          ctx.lineTo(c[i + 3], c[i + 4]);
+          ctx.stroke();
+          i += 5;
+          break;
+        case RenderOp.Circle:
+          ctx.beginPath();
+          ctx.arc(c[i + 1], c[i + 2], c[i + 3], 0, Math.PI * 2);
+          ctx.fill();
+          i += 4;
+          break;
+        case RenderOp.Image:
+          ctx.drawImage(images[c[i + 1]], c[i + 2], c[i + 3], c[i + 4], c[i + 5]);
+          i += 6;
+          break;
+        case RenderOp.Text:
+          ctx.fillText(strings[c[i + 1]], c[i + 2], c[i + 3]);
+          i += 4;
+          break;
+        case RenderOp.SetFillStyle:
+          ctx.fillStyle = strings[c[i + 1]];
+          i += 2;
+          break;
+        case RenderOp.SetStrokeStyle:
+          ctx.strokeStyle = strings[c[i + 1]];
+          i += 2;
+          break;
+        case RenderOp.SetFont:
+          ctx.font = strings[c[i + 1]];
+          i += 2;
+          break;
+        case RenderOp.ClearRect:
+          ctx.fillStyle = strings[c[i + 1]];
+          ctx.fillRect(c[i + 2], c[i + 3], c[i + 4], c[i + 5]);
+          i += 6;
+          break;
+        case RenderOp.BeginClip:
+          ctx.save();
+          ctx.beginPath();
+          i += 1;
+          break;
+        case RenderOp.ClipRect:
+          ctx.rect(c[i + 1], c[i + 2], c[i + 3], c[i + 4]);
+          i += 5;
+          break;
+        case RenderOp.ApplyClip:
+          ctx.clip();
+          i += 1;
+          break;
+        case RenderOp.ResetClip:
+          ctx.restore();
+          i += 1;
+          break;
+        case RenderOp.EraseRect:
+          ctx.clearRect(c[i + 1], c[i + 2], c[i + 3], c[i + 4]);
+          i += 5;
+          break;
+        case RenderOp.FillRects:
+        case RenderOp.StrokeRects:
+        case RenderOp.Lines:
+        case RenderOp.Circles:
+          i = drawRenderBatch(ctx, c[i], c, i + 2, c[i + 1], null);
+          break;
+        case RenderOp.Images:
+          i = drawRenderBatch(ctx, c[i], c, i + 3, c[i + 2], images[c[i + 1]]);
+          break;
+        case RenderOp.ImageRect:
+          ctx.drawImage(
+            images[c[i + 1]],
+            c[i + 2], c[i + 3], c[i + 4], c[i + 5],
+            c[i + 6], c[i + 7], c[i + 8], c[i + 9]);
+          i += 10;
+          break;
+        default:
+          throw new Error(`Unknown render op(${c[i]}) at ${i}`);
+      }
+    }
+  } finally {
+    buffer.release();
+  }
+}
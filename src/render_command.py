@@ -0,0 +1,593 @@
+"""描画コマンドバッファ.
+
+描画命令をfloat配列に詰めて記録し、1フレームに1回まとめて実行できるようにする。
+コマンドの形式はrender_command.jsの実行器と対応している。
+"""
+
+from __future__ import annotations
+
+import typing as tp
+from array import array
+from enum import IntEnum
+
+from interface import AbstractRenderer
+from culling import (
+    ViewportCuller,
+    get_line_bounds,
+    get_stroke_rect_bounds,
+    get_circle_bounds,
+    get_text_bounds,
+)
+from render_state import CanvasState
+from text_cache import TextSurfaceCache
+from values import Size, Rect, Color, Position, Font
+
+
+class RenderOp(IntEnum):
+    """描画コマンドの種類.
+
+    値はrender_command.jsと合わせること。
+    """
+    #: 背景色で全体を塗る(style)
+    Clear = 1
+    #: 塗りつぶし矩形(x, y, w, h)
+    FillRect = 2
+    #: 枠線矩形(x, y, w, h)
+    StrokeRect = 3
+    #: 線(x1, y1, x2, y2)
+    Line = 4
+    #: 塗りつぶし円(x, y, radius)
+    Circle = 5
+    #: 画像(image, x, y, w, h)
+    Image = 6
+    #: テキスト(text, x, y)
+    Text = 7
+    #: 塗りつぶしスタイルの設定(style)
+    SetFillStyle = 8
+    #: 線スタイルの設定(style)
+    SetStrokeStyle = 9
+    #: フォントの設定(font)
+    SetFont = 10
+    #: 背景色で範囲を塗る(style, x, y, w, h)
+    ClearRect = 11
+    #: 描画範囲の指定を開始する(ctx.save)
+    BeginClip = 12
+    #: 描画範囲に矩形を加える(x, y, w, h)
+    ClipRect = 13
+    #: 描画範囲を適用する
+    ApplyClip = 14
+    #: 描画範囲の制限を解除する(ctx.restore)
+    ResetClip = 15
+    #: 範囲を透明にする(x, y, w, h)
+    EraseRect = 16
+    #: 画像の一部(image, sx, sy, sw, sh, x, y, w, h)
+    ImageRect = 17
+    #: 塗りつぶし矩形の一括描画(count, [x, y, w, h] * count)
+    FillRects = 18
+    #: 枠線矩形の一括描画(count, [x, y, w, h] * count)
+    StrokeRects = 19
+    #: 線の一括描画(count, [x1, y1, x2, y2] * count)
+    Lines = 20
+    #: 塗りつぶし円の一括描画(count, [x, y, radius] * count)
+    Circles = 21
+    #: 画像の一括描画(image, count, [x, y, w, h] * count)
+    Images = 22
+
+
+#: コマンドごとの引数の数
+OP_ARG_COUNT: dict[RenderOp, int] = {
+    RenderOp.Clear: 1,
+    RenderOp.FillRect: 4,
+    RenderOp.StrokeRect: 4,
+    RenderOp.Line: 4,
+    RenderOp.Circle: 3,
+    RenderOp.Image: 5,
+    RenderOp.Text: 3,
+    RenderOp.SetFillStyle: 1,
+    RenderOp.SetStrokeStyle: 1,
+    RenderOp.SetFont: 1,
+    RenderOp.ClearRect: 5,
+    RenderOp.BeginClip: 0,
+    RenderOp.ClipRect: 4,
+    RenderOp.ApplyClip: 0,
+    RenderOp.ResetClip: 0,
+    RenderOp.EraseRect: 4,
+    RenderOp.ImageRect: 9,
+    RenderOp.FillRects: 1,
+    RenderOp.StrokeRects: 1,
+    RenderOp.Lines: 1,
+    RenderOp.Circles: 1,
+    RenderOp.Images: 2,
+}
+
+#: 一括描画コマンドの1要素あたりの値の数。要素数は固定の引数の最後に入る
+BATCH_ITEM_SIZE: dict[RenderOp, int] = {
+    RenderOp.FillRects: 4,
+    RenderOp.StrokeRects: 4,
+    RenderOp.Lines: 4,
+    RenderOp.Circles: 3,
+    RenderOp.Images: 4,
+}
+
+#: 型：一括描画の座標列。array.array、NumPy配列、floatのシーケンス
+BatchValues = tp.Union[array, tp.Sequence[float]]
+#: 型：一括描画の色。全要素共通の色か、要素ごとの色
+BatchColors = tp.Union[Color, tp.Sequence[Color]]
+
+
+def get_arg_count(commands: tp.Sequence[float], index: int) -> int:
+    """コマンドの引数の数を得る.
+
+    :param commands: コマンド列
+    :param index: コマンドの先頭の位置
+    """
+    op = RenderOp(int(commands[index]))
+    count = OP_ARG_COUNT[op]
+    item_size = BATCH_ITEM_SIZE.get(op)
+    if item_size is not None:
+        count += int(commands[index + count]) * item_size
+    return count
+
+
+def to_float_array(values: BatchValues) -> array:
+    """座標列をfloat64配列にする."""
+    if isinstance(values, array) and values.typecode == 'd':
+        return values
+    if hasattr(values, 'tolist'):
+        # array.arrayとNumPy配列は一度listにするのが速い
+        values = values.tolist()
+    return array('d', values)
+
+
+def split_batch(
+        values: BatchValues,
+        item_size: int,
+        colors: BatchColors) -> tp.Iterator[tuple[Color, array]]:
+    """一括描画を同じ色の連続した範囲に分ける.
+
+    描画順を保つため、並べ替えはせずに色が変わる所で区切る。
+
+    :param values: 座標列
+    :param item_size: 1要素あたりの値の数
+    :param colors: 全要素共通の色か、要素ごとの色
+    :return: (色, 座標列)の列挙
+    """
+    values = to_float_array(values)
+    (count, remainder) = divmod(len(values), item_size)
+    if remainder != 0:
+        raise ValueError(f'len(values)({len(values)}) is not a multiple of {item_size}.')
+    if isinstance(colors, Color):
+        if count > 0:
+            yield colors, values
+        return
+
+    if len(colors) != count:
+        raise ValueError(f'len(colors)({len(colors)}) does not match the number of items({count}).')
+    start = 0
+    for index in range(1, count + 1):
+        # Colorはインターンされているので同一性で比べる。別物と判定されても分割が増えるだけ
+        if index == count or colors[index] is not colors[start]:
+            yield colors[start], values[start * item_size:index * item_size]
+            start = index
+
+
+class RenderCommandBuffer:
+    """描画コマンドバッファ.
+
+    コマンドは[op, 引数...]の並びでfloat64配列に格納する。
+    文字列と画像は引数に直接入れられないので、テーブルに登録してその番号を入れる。
+    """
+
+    def __init__(self):
+        #: コマンド列
+        self.commands = array('d')
+        #: 文字列テーブル
+        self.strings: list[str] = []
+        #: 画像テーブル
+        self.images: list[object] = []
+
+        self._string_ids: dict[str, int] = {}
+        self._image_ids: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def reset(self) -> None:
+        """記録内容を破棄する."""
+        del self.commands[:]
+        self.strings.clear()
+        self.images.clear()
+        self._string_ids.clear()
+        self._image_ids.clear()
+
+    def push(self, op: RenderOp, *args: float) -> None:
+        """コマンドを追加する."""
+        self.commands.append(op)
+        self.commands.extend(args)
+
+    def string_id(self, value: str) -> int:
+        """文字列をテーブルに登録して番号を得る."""
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def image_id(self, image: object) -> int:
+        """画像をテーブルに登録して番号を得る."""
+        key = id(image)
+        image_id = self._image_ids.get(key)
+        if image_id is None:
+            image_id = len(self.images)
+            self.images.append(image)
+            self._image_ids[key] = image_id
+        return image_id
+
+    def iter_commands(self) -> tp.Iterator[tuple[RenderOp, tuple[float, ...]]]:
+        """記録されたコマンドを(op, 引数)の形で列挙する."""
+        commands = self.commands
+        index = 0
+        while index < len(commands):
+            op = RenderOp(int(commands[index]))
+            count = get_arg_count(commands, index)
+            yield op, tuple(commands[index + 1:index + 1 + count])
+            index += 1 + count
+
+
+def get_batch_bounds(op: RenderOp, values: array) -> Rect:
+    """一括描画の範囲を大きめに見積もる.
+
+    要素ごとに計算すると遅いので、座標ごとの最小、最大から求める。
+    """
+    if op == RenderOp.Circles:
+        radius = max(values[2::3])
+        left = min(values[0::3]) - radius
+        top = min(values[1::3]) - radius
+        right = max(values[0::3]) + radius
+        bottom = max(values[1::3]) + radius
+    elif op == RenderOp.Lines:
+        xs = values[0::4] + values[2::4]
+        ys = values[1::4] + values[3::4]
+        (left, top, right, bottom) = (min(xs) - 1, min(ys) - 1, max(xs) + 1, max(ys) + 1)
+    else:
+        left = min(values[0::4])
+        top = min(values[1::4])
+        right = max(values[0::4]) + max(values[2::4])
+        bottom = max(values[1::4]) + max(values[3::4])
+        if op == RenderOp.StrokeRects:
+            (left, top, right, bottom) = (left - 1, top - 1, right + 1, bottom + 1)
+    return Rect._from_edges(left, top, right, bottom)
+
+
+class _DrawItem:
+    """並べ替え待ちの描画命令."""
+
+    __slots__ = ('fill_style', 'stroke_style', 'font', 'op', 'args', 'values', 'bounds')
+
+    def __init__(
+            self,
+            op: RenderOp,
+            args: tuple[float, ...],
+            bounds: Rect,
+            fill_style: tp.Optional[str] = None,
+            stroke_style: tp.Optional[str] = None,
+            font: tp.Optional[str] = None,
+            values: tp.Optional[array] = None):
+        self.op = op
+        self.args = args
+        #: 一括描画の座標列
+        self.values = values
+        self.bounds = bounds
+        self.fill_style = fill_style
+        self.stroke_style = stroke_style
+        self.font = font
+
+    @property
+    def state_key(self) -> tuple[tp.Optional[str], ...]:
+        """必要とする描画状態."""
+        return self.fill_style, self.stroke_style, self.font
+
+
+class _DrawGroup:
+    """同じ描画状態を使う描画命令のまとまり."""
+
+    __slots__ = ('state_key', 'items')
+
+    def __init__(self, item: _DrawItem):
+        self.state_key = item.state_key
+        self.items = [item]
+
+    def overlaps(self, bounds: Rect) -> bool:
+        """指定した範囲と重なる命令を含むか."""
+        return any(item.bounds.intersects_with_rect(bounds) for item in self.items)
+
+
+class CommandRecordingRenderer(AbstractRenderer):
+    """描画命令をコマンドバッファに記録する描画クラス.
+
+    flushで記録内容をexecuteに渡し、バッファを空にする。
+    実際の描画はexecuteを実装した派生クラスで行う。
+    コンテキストの状態はPython側で追跡し、値が変わらない状態変更は記録しない。
+
+    sort_by_stateを有効にすると、clear、set_clip、reset_clip、flushで区切られた範囲の描画命令を
+    描画状態ごとにまとめる。
+    重なっている命令同士の順序は入れ替えないので、描画結果は変わらない。
+
+    :param size: 画面サイズ
+    :param background: 背景色。Noneならクリアした範囲は透明になる
+    :param sort_by_state: 描画状態ごとに描画命令を並べ替えるか
+    :param text_cache: 描画済み文字列のキャッシュ。Noneならcachedを指定しても毎回文字列を描画する
+    :param cull: 画面外の描画命令を記録しないか
+    """
+
+    def __init__(
+            self,
+            size: Size,
+            background: tp.Optional[Color] = Color(200, 200, 200),
+            sort_by_state: bool = False,
+            text_cache: tp.Optional[TextSurfaceCache] = None,
+            cull: bool = False) -> None:
+        if size is None:
+            raise ValueError('size is None')
+        self._size = size
+        self._background = background
+        self._sort_by_state = sort_by_state
+        self._text_cache = text_cache
+        self._culler = ViewportCuller(Rect(Position(0, 0), size)) if cull else None
+        self._buffer = RenderCommandBuffer()
+        self._state = CanvasState()
+        self._groups: list[_DrawGroup] = []
+
+    @property
+    def size(self) -> Size:
+        """サイズ."""
+        return self._size
+
+    @property
+    def buffer(self) -> RenderCommandBuffer:
+        """コマンドバッファ."""
+        return self._buffer
+
+    @property
+    def state(self) -> CanvasState:
+        """コンテキストの状態."""
+        return self._state
+
+    @property
+    def text_cache(self) -> tp.Optional[TextSurfaceCache]:
+        """描画済み文字列のキャッシュ."""
+        return self._text_cache
+
+    @property
+    def culler(self) -> tp.Optional[ViewportCuller]:
+        """画面外の描画の省略。省略しないならNone."""
+        return self._culler
+
+    def clear(self, rect: Rect = None):
+        """画面をクリアする.
+
+        :param rect: クリアする範囲。Noneなら画面全体
+        """
+        self._flush_groups()
+        if self._background is None:
+            if rect is None:
+                rect = Rect(Position(0, 0), self._size)
+            self._buffer.push(
+                RenderOp.EraseRect,
+                rect.position.x, rect.position.y, rect.size.width, rect.size.height)
+            return
+
+        style = self._background.css
+        style_id = self._buffer.string_id(style)
+        if rect is None:
+            self._buffer.push(RenderOp.Clear, style_id)
+        else:
+            self._buffer.push(
+                RenderOp.ClearRect, style_id,
+                rect.position.x, rect.position.y, rect.size.width, rect.size.height)
+        # クリアは塗りつぶしスタイルを変更する
+        self._state.fill_style = style
+
+    def set_clip(self, rects: tp.Sequence[Rect]) -> None:
+        """描画範囲を指定した矩形の内側に制限する."""
+        self._flush_groups()
+        buffer = self._buffer
+        buffer.push(RenderOp.BeginClip)
+        for rect in rects:
+            buffer.push(
+                RenderOp.ClipRect,
+                rect.position.x, rect.position.y, rect.size.width, rect.size.height)
+        buffer.push(RenderOp.ApplyClip)
+        self._state.save()
+
+    def reset_clip(self) -> None:
+        """描画範囲の制限を解除する."""
+        self._flush_groups()
+        self._buffer.push(RenderOp.ResetClip)
+        self._state.restore()
+
+    def draw_rect(self, rect: Rect, color: Color, fill=True) -> None:
+        """矩形の描画."""
+        style = color.css
+        args = (rect.position.x, rect.position.y, rect.size.width, rect.size.height)
+        if fill:
+            self._record(_DrawItem(RenderOp.FillRect, args, rect, fill_style=style))
+        else:
+            bounds = get_stroke_rect_bounds(rect)
+            self._record(_DrawItem(RenderOp.StrokeRect, args, bounds, stroke_style=style))
+
+    def draw_line(self, start_pos: tuple[int, int], end_pos: tuple[int, int], color: Color) -> None:
+        """線の描画."""
+        (x1, y1) = start_pos
+        (x2, y2) = end_pos
+        bounds = get_line_bounds(x1, y1, x2, y2)
+        self._record(_DrawItem(
+            RenderOp.Line, (x1, y1, x2, y2), bounds,
+            stroke_style=color.css))
+
+    def draw_circle(self, center: tuple[int, int], radius: int, color: Color) -> None:
+        """円の描画."""
+        (x, y) = center
+        bounds = get_circle_bounds(x, y, radius)
+        self._record(_DrawItem(
+            RenderOp.Circle, (x, y, radius), bounds,
+            fill_style=color.css))
+
+    def draw_image(self, image, position: Position, size: Size, src_rect: Rect = None) -> None:
+        """画像の描画.
+
+        :param src_rect: 描画する画像内の範囲。Noneなら画像全体
+        """
+        image_id = self._buffer.image_id(image)
+        if src_rect is None:
+            args = (image_id, position.x, position.y, size.width, size.height)
+            self._record(_DrawItem(RenderOp.Image, args, Rect(position, size)))
+        else:
+            args = (
+                image_id,
+                src_rect.position.x, src_rect.position.y, src_rect.size.width, src_rect.size.height,
+                position.x, position.y, size.width, size.height)
+            self._record(_DrawItem(RenderOp.ImageRect, args, Rect(position, size)))
+
+    def draw_text(
+            self,
+            text: str,
+            position: tuple[int, int],
+            font: Font,
+            color: Color,
+            cached: bool = False) -> None:
+        """テキストの描画.
+
+        :param cached: 描画済みの画像をキャッシュして使うか。変化しない文字列に指定する
+        """
+        (x, y) = position
+        if cached and self._text_cache is not None:
+            surface = self._text_cache.get(text, font, color)
+            self.draw_image(
+                surface.image,
+                Position(x, y - surface.baseline),
+                Size(surface.width, surface.height))
+            return
+
+        bounds = get_text_bounds(text, x, y, font)
+        self._record(_DrawItem(
+            RenderOp.Text, (self._buffer.string_id(text), x, y), bounds,
+            fill_style=color.css,
+            font=font.css))
+
+    def draw_rects(self, rects: BatchValues, colors: BatchColors, fill=True) -> None:
+        """矩形の一括描画.
+
+        :param rects: [x, y, w, h]を並べた座標列
+        :param colors: 全要素共通の色か、要素ごとの色
+        """
+        if fill:
+            self._record_batch(RenderOp.FillRects, rects, colors, fill=True)
+        else:
+            self._record_batch(RenderOp.StrokeRects, rects, colors, fill=False)
+
+    def draw_lines(self, lines: BatchValues, colors: BatchColors) -> None:
+        """線の一括描画.
+
+        :param lines: [x1, y1, x2, y2]を並べた座標列
+        :param colors: 全要素共通の色か、要素ごとの色
+        """
+        self._record_batch(RenderOp.Lines, lines, colors, fill=False)
+
+    def draw_circles(self, circles: BatchValues, colors: BatchColors) -> None:
+        """円の一括描画.
+
+        :param circles: [x, y, radius]を並べた座標列
+        :param colors: 全要素共通の色か、要素ごとの色
+        """
+        self._record_batch(RenderOp.Circles, circles, colors, fill=True)
+
+    def draw_images(self, image, rects: BatchValues) -> None:
+        """同じ画像の一括描画.
+
+        :param rects: [x, y, w, h]を並べた描画先の座標列
+        """
+        values = to_float_array(rects)
+        (count, remainder) = divmod(len(values), 4)
+        if remainder != 0:
+            raise ValueError(f'len(rects)({len(values)}) is not a multiple of 4.')
+        if count == 0:
+            return
+        bounds = None
+        if self._sort_by_state or self._culler is not None:
+            bounds = get_batch_bounds(RenderOp.Images, values)
+        self._record(_DrawItem(
+            RenderOp.Images, (self._buffer.image_id(image), count), bounds,
+            values=values))
+
+    def flush(self) -> None:
+        """記録した描画命令を実行する."""
+        self._flush_groups()
+        if self._culler is not None:
+            self._culler.end_frame()
+        if len(self._buffer) == 0:
+            return
+        self.execute(self._buffer)
+        self._buffer.reset()
+
+    def execute(self, buffer: RenderCommandBuffer) -> None:
+        """コマンドバッファを実行する."""
+        pass
+
+    def _record_batch(self, op: RenderOp, values: BatchValues, colors: BatchColors, fill: bool) -> None:
+        """一括描画を色ごとに記録する."""
+        item_size = BATCH_ITEM_SIZE[op]
+        for (color, run) in split_batch(values, item_size, colors):
+            # 範囲は並べ替えとカリングの時しか使わない
+            bounds = None
+            if self._sort_by_state or self._culler is not None:
+                bounds = get_batch_bounds(op, run)
+            style = color.css
+            self._record(_DrawItem(
+                op, (len(run) // item_size,), bounds,
+                fill_style=style if fill else None,
+                stroke_style=None if fill else style,
+                values=run))
+
+    def _record(self, item: _DrawItem) -> None:
+        """描画命令を記録する.
+
+        一括描画は全体の範囲で判定するので、一部でも画面内にあれば全て記録する。
+        """
+        if self._culler is not None and not self._culler.is_visible(item.bounds):
+            return
+        if not self._sort_by_state:
+            self._emit(item)
+            return
+
+        # 重なる命令を追い越さない範囲で、同じ描画状態のグループにまとめる
+        key = item.state_key
+        for group in reversed(self._groups):
+            if group.state_key == key:
+                group.items.append(item)
+                return
+            if group.overlaps(item.bounds):
+                break
+        self._groups.append(_DrawGroup(item))
+
+    def _flush_groups(self) -> None:
+        """並べ替え待ちの描画命令をバッファに書き出す."""
+        for group in self._groups:
+            for item in group.items:
+                self._emit(item)
+        self._groups.clear()
+
+    def _emit(self, item: _DrawItem) -> None:
+        """描画命令をバッファに書き出す."""
+        buffer = self._buffer
+        state = self._state
+        if item.font is not None and state.set_font(item.font):
+            buffer.push(RenderOp.SetFont, buffer.string_id(item.font))
+        if item.fill_style is not None and state.set_fill_style(item.fill_style):
+            buffer.push(RenderOp.SetFillStyle, buffer.string_id(item.fill_style))
+        if item.stroke_style is not None and state.set_stroke_style(item.stroke_style):
+            buffer.push(RenderOp.SetStrokeStyle, buffer.string_id(item.stroke_style))
+        buffer.push(item.op, *item.args)
+        if item.values is not None:
+            buffer.commands.extend(item.values)
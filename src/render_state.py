@@ -0,0 +1,78 @@
+"""描画状態の管理."""
+
+from __future__ import annotations
+
+import typing as tp
+
+
+class CanvasState:
+    """Python側で保持する2Dコンテキストの状態.
+
+    現在の値と同じ値を設定しようとした場合は設定を省略できるよう、Falseを返す。
+    """
+
+    def __init__(self):
+        self.fill_style: tp.Optional[str] = None
+        self.stroke_style: tp.Optional[str] = None
+        self.font: tp.Optional[str] = None
+        self._stack: list[tuple[tp.Optional[str], ...]] = []
+
+        #: 実際に行った状態変更の回数
+        self.change_count = 0
+        #: 省略した状態変更の回数
+        self.saved_count = 0
+
+    def set_fill_style(self, style: str) -> bool:
+        """塗りつぶしスタイルを設定する.
+
+        :return: コンテキストへの設定が必要か
+        """
+        if self.fill_style == style:
+            self.saved_count += 1
+            return False
+        self.fill_style = style
+        self.change_count += 1
+        return True
+
+    def set_stroke_style(self, style: str) -> bool:
+        """線スタイルを設定する.
+
+        :return: コンテキストへの設定が必要か
+        """
+        if self.stroke_style == style:
+            self.saved_count += 1
+            return False
+        self.stroke_style = style
+        self.change_count += 1
+        return True
+
+    def set_font(self, font: str) -> bool:
+        """フォントを設定する.
+
+        :return: コンテキストへの設定が必要か
+        """
+        if self.font == font:
+            self.saved_count += 1
+            return False
+        self.font = font
+        self.change_count += 1
+        return True
+
+    def save(self) -> None:
+        """状態を退避する(ctx.saveに対応)."""
+        self._stack.append((self.fill_style, self.stroke_style, self.font))
+
+    def restore(self) -> None:
+        """退避した状態に戻す(ctx.restoreに対応)."""
+        (self.fill_style, self.stroke_style, self.font) = self._stack.pop()
+
+    def invalidate(self) -> None:
+        """状態を不明にする（外部でコンテキストが変更された場合など）."""
+        self.fill_style = None
+        self.stroke_style = None
+        self.font = None
+
+    def reset_counts(self) -> None:
+        """回数をリセットする."""
+        self.change_count = 0
+        self.saved_count = 0
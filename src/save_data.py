@@ -0,0 +1,220 @@
+"""セーブデータの形式.
+
+状態を名前付きのセクション(バイト列)に分けて、1つのバイナリにまとめる。
+差分のセーブデータは、基にしたセーブデータから変わったセクションだけを持つ。
+読み込み時は、基のセーブデータに差分のセクションを上書きする。
+
+形式(リトルエンディアン)::
+
+    ヘッダー:   マジック(4バイト)、バージョン(1)、フラグ(1)、セクション数(2)、チェックサム(4)、
+                本体のCRC32(4)
+    セクション: 名前の長さ(2)、フラグ(1)、本体の長さ(4)、名前(UTF-8)、本体
+
+チェックサムは全体のセーブデータでは自身の、差分のセーブデータでは基にしたセーブデータの
+セクションから求めたCRC32。差分を違うセーブデータに重ねて読み込むことを防ぐ。
+本体のCRC32はヘッダーより後ろ(書き込んだままのセクション)から求め、展開する前に壊れていないか確かめる。
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+import typing as tp
+import zlib
+from array import array
+
+#: セーブデータの先頭に付ける識別子
+MAGIC = b'PSSV'
+#: 形式のバージョン
+VERSION = 1
+#: フラグ：差分
+DELTA_FLAG = 0x01
+#: セクションのフラグ：本体をzlibで圧縮している
+COMPRESSED_FLAG = 0x01
+#: セクションのフラグ：基にしたセーブデータから削除された
+REMOVED_FLAG = 0x02
+#: これより小さいセクションは圧縮しない(バイト)
+MIN_COMPRESS_SIZE = 64
+#: zlibの圧縮レベル。既定の6より数倍速く、大きさは数%しか変わらない
+COMPRESS_LEVEL = 1
+
+_HEADER = struct.Struct('<4sBBHII')
+_SECTION = struct.Struct('<HBI')
+
+
+def array_to_bytes(values: array) -> bytes:
+    """配列をリトルエンディアンのバイト列にする."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def array_from_bytes(typecode: str, data: tp.Union[bytes, memoryview]) -> array:
+    """リトルエンディアンのバイト列から配列を作る."""
+    values = array(typecode)
+    if len(data) % values.itemsize != 0:
+        raise ValueError(f'len(data)({len(data)}) is not a multiple of {values.itemsize}.')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class SaveData:
+    """セーブデータ.
+
+    :param sections: セクション名→本体
+    """
+
+    def __init__(self, sections: tp.Mapping[str, bytes] = None):
+        self._sections: dict[str, bytes] = dict(sections) if sections is not None else {}
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def __getitem__(self, name: str) -> bytes:
+        return self._sections[name]
+
+    def get(self, name: str, default: bytes = None) -> tp.Optional[bytes]:
+        """セクションの本体を得る."""
+        return self._sections.get(name, default)
+
+    def items(self) -> tp.ItemsView[str, bytes]:
+        """(セクション名, 本体)."""
+        return self._sections.items()
+
+    @property
+    def checksum(self) -> int:
+        """セクションから求めたCRC32."""
+        crc = 0
+        for name in sorted(self._sections):
+            body = self._sections[name]
+            crc = zlib.crc32(_SECTION.pack(len(name), 0, len(body)), crc)
+            crc = zlib.crc32(name.encode('utf-8'), crc)
+            crc = zlib.crc32(body, crc)
+        return crc
+
+    def get_changed_sections(self, base: SaveData) -> tuple[list[str], list[str]]:
+        """基にしたセーブデータから変わったセクションを得る.
+
+        :return: (追加・変更されたセクション名, 削除されたセクション名)
+        """
+        changed = [name for (name, body) in self._sections.items() if base.get(name) != body]
+        removed = [name for name in base._sections if name not in self._sections]
+        return changed, removed
+
+    def to_bytes(self, compress: bool = True) -> bytes:
+        """バイナリに変換する.
+
+        :param compress: セクションをzlibで圧縮するか。小さくならないセクションは圧縮しない
+        """
+        return self._pack(list(self._sections), [], 0, self.checksum, compress)
+
+    def to_delta_bytes(self, base: SaveData, compress: bool = True) -> bytes:
+        """基にしたセーブデータとの差分をバイナリに変換する."""
+        if base is None:
+            raise ValueError('base is None')
+        (changed, removed) = self.get_changed_sections(base)
+        return self._pack(changed, removed, DELTA_FLAG, base.checksum, compress)
+
+    @staticmethod
+    def is_delta(data: bytes) -> bool:
+        """バイナリが差分か."""
+        (_, _, flags, _, _, _) = _read_header(data)
+        return bool(flags & DELTA_FLAG)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, base: SaveData = None) -> SaveData:
+        """バイナリから生成する.
+
+        :param base: 差分の場合、基にしたセーブデータ
+        """
+        (_, _, flags, section_count, checksum, payload_crc) = _read_header(data)
+        view = memoryview(data)
+        if zlib.crc32(view[_HEADER.size:]) != payload_crc:
+            raise ValueError('Save data is broken.')
+        if flags & DELTA_FLAG:
+            if base is None:
+                raise ValueError('Save data is a delta, but base is None.')
+            if base.checksum != checksum:
+                raise ValueError('Save data is a delta of another save data.')
+            sections = dict(base._sections)
+        else:
+            sections = {}
+
+        offset = _HEADER.size
+        for _ in range(section_count):
+            if offset + _SECTION.size > len(data):
+                raise ValueError('Save data is broken.')
+            (name_size, section_flags, body_size) = _SECTION.unpack_from(data, offset)
+            offset += _SECTION.size
+            end = offset + name_size + body_size
+            if end > len(data):
+                raise ValueError('Save data is broken.')
+            name = bytes(view[offset:offset + name_size]).decode('utf-8')
+            body = view[offset + name_size:end]
+            offset = end
+
+            if section_flags & REMOVED_FLAG:
+                sections.pop(name, None)
+            elif section_flags & COMPRESSED_FLAG:
+                try:
+                    sections[name] = zlib.decompress(body)
+                except zlib.error as e:
+                    raise ValueError(f'Section({name}) is broken.') from e
+            else:
+                sections[name] = bytes(body)
+        if offset != len(data):
+            raise ValueError('Save data is broken.')
+
+        save_data = cls(sections)
+        if not flags & DELTA_FLAG and save_data.checksum != checksum:
+            raise ValueError('Save data is broken.')
+        return save_data
+
+    def _pack(
+            self,
+            names: list[str],
+            removed: list[str],
+            flags: int,
+            checksum: int,
+            compress: bool) -> bytes:
+        """セクションを並べてバイナリにする."""
+        chunks = []
+        for name in names:
+            body = self._sections[name]
+            section_flags = 0
+            if compress and len(body) >= MIN_COMPRESS_SIZE:
+                compressed = zlib.compress(body, COMPRESS_LEVEL)
+                if len(compressed) < len(body):
+                    body = compressed
+                    section_flags |= COMPRESSED_FLAG
+            encoded_name = name.encode('utf-8')
+            chunks.append(_SECTION.pack(len(encoded_name), section_flags, len(body)))
+            chunks.append(encoded_name)
+            chunks.append(body)
+        for name in removed:
+            encoded_name = name.encode('utf-8')
+            chunks.append(_SECTION.pack(len(encoded_name), REMOVED_FLAG, 0))
+            chunks.append(encoded_name)
+        payload = b''.join(chunks)
+        header = _HEADER.pack(
+            MAGIC, VERSION, flags, len(names) + len(removed), checksum, zlib.crc32(payload))
+        return header + payload
+
+
+def _read_header(data: bytes) -> tuple[bytes, int, int, int, int, int]:
+    """ヘッダーを読んで確かめる."""
+    if len(data) < _HEADER.size:
+        raise ValueError('Save data is too short.')
+    header = _HEADER.unpack_from(data)
+    (magic, version, _, _, _, _) = header
+    if magic != MAGIC:
+        raise ValueError('Save data has an unknown format.')
+    if version != VERSION:
+        raise ValueError(f'Save data version({version}) is not supported.')
+    return header
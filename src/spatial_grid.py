@@ -0,0 +1,93 @@
+"""空間索引."""
+
+from __future__ import annotations
+
+import typing as tp
+
+from values import Rect, Position
+
+T = tp.TypeVar('T')
+
+
+class SpatialGrid(tp.Generic[T]):
+    """一様グリッドによる空間索引.
+
+    要素を矩形と重なるセルに登録し、点や矩形の近くにある要素だけを取り出せるようにする。
+
+    :param cell_size: セルの大きさ
+    """
+
+    def __init__(self, cell_size: float = 64):
+        if cell_size <= 0:
+            raise ValueError(f'cell_size({cell_size}) must be positive.')
+        self._cell_size = cell_size
+        self._cells: dict[tuple[int, int], dict[T, Rect]] = {}
+        self._items: dict[T, tuple[Rect, list[tuple[int, int]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item: T) -> bool:
+        return item in self._items
+
+    @property
+    def cell_size(self) -> float:
+        """セルの大きさ."""
+        return self._cell_size
+
+    def insert(self, item: T, rect: Rect) -> None:
+        """要素を登録する."""
+        if item in self._items:
+            raise ValueError(f'item({item}) is already registered.')
+        cells = self._cells_for_rect(rect)
+        for cell in cells:
+            self._cells.setdefault(cell, {})[item] = rect
+        self._items[item] = (rect, cells)
+
+    def remove(self, item: T) -> None:
+        """要素の登録を解除する."""
+        (_, cells) = self._items.pop(item)
+        for cell in cells:
+            bucket = self._cells[cell]
+            del bucket[item]
+            if not bucket:
+                del self._cells[cell]
+
+    def update(self, item: T, rect: Rect) -> None:
+        """要素の矩形を更新する."""
+        self.remove(item)
+        self.insert(item, rect)
+
+    def clear(self) -> None:
+        """全ての要素の登録を解除する."""
+        self._cells.clear()
+        self._items.clear()
+
+    def query_point(self, point: Position) -> list[T]:
+        """指定した点を含む要素を得る."""
+        size = self._cell_size
+        bucket = self._cells.get((int(point.x // size), int(point.y // size)))
+        if bucket is None:
+            return []
+        return [item for (item, rect) in bucket.items() if rect.contains_point(point)]
+
+    def query_rect(self, rect: Rect) -> list[T]:
+        """指定した矩形と交差する要素を得る."""
+        found: dict[T, None] = {}
+        for cell in self._cells_for_rect(rect):
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                continue
+            for (item, item_rect) in bucket.items():
+                if item not in found and item_rect.intersects_with_rect(rect):
+                    found[item] = None
+        return list(found)
+
+    def _cells_for_rect(self, rect: Rect) -> list[tuple[int, int]]:
+        """矩形と重なるセルの一覧."""
+        size = self._cell_size
+        left = int(rect.left // size)
+        right = int(rect.right // size)
+        top = int(rect.top // size)
+        bottom = int(rect.bottom // size)
+        return [(x, y) for x in range(left, right + 1) for y in range(top, bottom + 1)]
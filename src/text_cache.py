@@ -0,0 +1,118 @@
+"""描画済み文字列のキャッシュ.
+
+変化しない文字列を一度だけオフスクリーンに描画しておき、以降は画像として描画する。
+オフスクリーンへの描画(ラスタライズ)は描画クラスが渡す関数で行う。
+"""
+
+from __future__ import annotations
+
+import typing as tp
+from collections import OrderedDict
+
+from values import Font, Color
+
+
+class TextSurface:
+    """文字列を描画済みの画像.
+
+    :param image: 画像データ
+    :param width: 幅
+    :param height: 高さ
+    :param baseline: 画像の上端からベースラインまでの距離
+    """
+
+    __slots__ = ('image', 'width', 'height', 'baseline')
+
+    def __init__(self, image: object, width: int, height: int, baseline: int):
+        self.image = image
+        self.width = width
+        self.height = height
+        self.baseline = baseline
+
+    @property
+    def pixel_count(self) -> int:
+        """画素数."""
+        return self.width * self.height
+
+
+#: 型：文字列をラスタライズする関数
+RasterizeFunc = tp.Callable[[str, Font, Color], TextSurface]
+
+
+class TextSurfaceCache:
+    """描画済み文字列のキャッシュ.
+
+    (文字列, フォント, 色)ごとに描画済みの画像を保持する。
+    保持している画素数の合計が上限を超えたら、最も長く使われていないものから捨てる。
+
+    :param rasterize: 文字列をラスタライズする関数
+    :param budget_pixels: 保持する画素数の上限
+    """
+
+    def __init__(self, rasterize: RasterizeFunc, budget_pixels: int = 1024 * 1024):
+        if rasterize is None:
+            raise ValueError('rasterize is None')
+        if budget_pixels <= 0:
+            raise ValueError(f'budget_pixels({budget_pixels}) must be positive.')
+        self._rasterize = rasterize
+        self._budget_pixels = budget_pixels
+        self._surfaces: OrderedDict[tuple[str, Font, Color], TextSurface] = OrderedDict()
+        self._pixel_count = 0
+        #: キャッシュにあった回数
+        self.hit_count = 0
+        #: キャッシュになくラスタライズした回数
+        self.miss_count = 0
+        #: 上限を超えて捨てた数
+        self.evicted_count = 0
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    @property
+    def budget_pixels(self) -> int:
+        """保持する画素数の上限."""
+        return self._budget_pixels
+
+    @property
+    def pixel_count(self) -> int:
+        """保持している画素数."""
+        return self._pixel_count
+
+    def get(self, text: str, font: Font, color: Color) -> TextSurface:
+        """描画済みの画像を得る.
+
+        キャッシュになければラスタライズする。
+        上限より大きい画像はキャッシュしない。
+        """
+        key = (text, font, color)
+        surfaces = self._surfaces
+        surface = surfaces.get(key)
+        if surface is not None:
+            surfaces.move_to_end(key)
+            self.hit_count += 1
+            return surface
+
+        self.miss_count += 1
+        surface = self._rasterize(text, font, color)
+        pixel_count = surface.pixel_count
+        if pixel_count > self._budget_pixels:
+            return surface
+
+        while self._pixel_count + pixel_count > self._budget_pixels:
+            (_, evicted) = surfaces.popitem(last=False)
+            self._pixel_count -= evicted.pixel_count
+            self.evicted_count += 1
+        surfaces[key] = surface
+        self._pixel_count += pixel_count
+        return surface
+
+    def clear(self) -> None:
+        """全て捨てる."""
+        self._surfaces.clear()
+        self._pixel_count = 0
+
+    def reset_counts(self) -> None:
+        """カウンタを0に戻す."""
+        self.hit_count = 0
+        self.miss_count = 0
+        self.evicted_count = 0
@@ -2,85 +2,263 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import typing as tp
 from numbers import Real
 
+_new_object = object.__new__
+
 
-@dataclass
 class Position:
-    """座標."""
-    x: Real = 0
-    y: Real = 0
+    """座標.
+
+    不変。属性は__slots__で持つ。
+    """
+
+    __slots__ = ('_x', '_y')
+
+    def __init__(self, x: Real = 0, y: Real = 0):
+        self._x = x
+        self._y = y
+
+    @property
+    def x(self) -> Real:
+        """x座標."""
+        return self._x
+
+    @property
+    def y(self) -> Real:
+        """y座標."""
+        return self._y
+
+    def __eq__(self, other):
+        if type(other) is not Position:
+            return NotImplemented
+        return self._x == other._x and self._y == other._y
+
+    def __hash__(self):
+        return hash((self._x, self._y))
+
+    def __repr__(self):
+        return f'Position(x={self._x!r}, y={self._y!r})'
 
     def __str__(self):
-        return f'({self.x}, {self.y})'
+        return f'({self._x}, {self._y})'
 
 
-@dataclass
 class Size:
-    """サイズ."""
-    width: Real
-    height: Real
+    """サイズ.
+
+    不変。属性は__slots__で持つ。
+    """
+
+    __slots__ = ('_width', '_height')
+
+    def __init__(self, width: Real, height: Real):
+        self._width = width
+        self._height = height
+
+    @property
+    def width(self) -> Real:
+        """幅."""
+        return self._width
+
+    @property
+    def height(self) -> Real:
+        """高さ."""
+        return self._height
+
+    def __eq__(self, other):
+        if type(other) is not Size:
+            return NotImplemented
+        return self._width == other._width and self._height == other._height
+
+    def __hash__(self):
+        return hash((self._width, self._height))
+
+    def __repr__(self):
+        return f'Size(width={self._width!r}, height={self._height!r})'
 
 
-@dataclass
 class Rect:
-    """矩形."""
-    position: Position
-    size: Size
+    """矩形.
+
+    不変。上下左右の座標は生成時に計算して保持するので、位置と大きさは生成時に
+    数値のx、yとwidth、heightを持っている必要がある(Position、Sizeでなくてもよい)。
+
+    描画や入力の処理で毎フレーム作る矩形は、_from_edgesで作る。
+    検証をせず、位置と大きさも参照されるまで作らない。
+    """
+
+    __slots__ = ('_position', '_size', '_left', '_top', '_right', '_bottom')
+
+    def __init__(self, position: Position, size: Size):
+        self._position = position
+        self._size = size
+        if type(position) is Position and type(size) is Size:
+            self._left = left = position._x
+            self._top = top = position._y
+            self._right = left + size._width
+            self._bottom = top + size._height
+        else:
+            self._left = left = position.x
+            self._top = top = position.y
+            self._right = left + size.width
+            self._bottom = top + size.height
+
+    @classmethod
+    def _from_edges(
+            cls,
+            left: Real,
+            top: Real,
+            right: Real,
+            bottom: Real,
+            size: Size = None) -> Rect:
+        """上下左右の座標から、検証せずに生成する(信頼できる内部の呼び出し用).
+
+        :param size: 大きさ。分かっていれば渡す。省略すると参照された時に上下左右から作る
+        """
+        rect = _new_object(cls)
+        rect._position = None
+        rect._size = size
+        rect._left = left
+        rect._top = top
+        rect._right = right
+        rect._bottom = bottom
+        return rect
 
     @property
-    def left(self) -> Real:
-        return self.position.x
+    def position(self) -> Position:
+        """位置(左上)."""
+        position = self._position
+        if position is None:
+            position = self._position = Position(self._left, self._top)
+        return position
 
     @property
-    def right(self) -> Real:
-        return self.position.x + self.size.width
+    def size(self) -> Size:
+        """大きさ."""
+        size = self._size
+        if size is None:
+            size = self._size = Size(self._right - self._left, self._bottom - self._top)
+        return size
+
+    @property
+    def left(self) -> Real:
+        """左端のx座標."""
+        return self._left
 
     @property
     def top(self) -> Real:
-        return self.position.y
+        """上端のy座標."""
+        return self._top
+
+    @property
+    def right(self) -> Real:
+        """右端のx座標."""
+        return self._right
 
     @property
     def bottom(self) -> Real:
-        return self.position.y + self.size.height
+        """下端のy座標."""
+        return self._bottom
+
+    def __eq__(self, other):
+        if type(other) is not Rect:
+            return NotImplemented
+        return self.position == other.position and self.size == other.size
+
+    def __hash__(self):
+        return hash((self.position, self.size))
+
+    def __repr__(self):
+        return f'Rect(position={self.position!r}, size={self.size!r})'
 
     @property
     def center(self) -> Position:
-        x = self.position.x + self.size.width / 2
-        y = self.position.y + self.size.height / 2
-        return Position(x, y)
+        """中心."""
+        return Position((self._left + self._right) / 2, (self._top + self._bottom) / 2)
 
     def contains_point(self, point: Position) -> bool:
         """指定した点を含むか."""
-        is_x = self.left <= point.x <= self.right
-        is_y = self.top <= point.y <= self.bottom
-        return is_x and is_y
+        x = point.x
+        y = point.y
+        return self._left <= x <= self._right and self._top <= y <= self._bottom
 
     def intersects_with_rect(self, other: Rect) -> bool:
         """指定した矩形と交差するか."""
-        is_x = other.left <= self.right and self.left <= other.right
-        is_y = other.top <= self.bottom and self.top <= other.bottom
-        return is_x and is_y
+        return (other._left <= self._right and self._left <= other._right
+                and other._top <= self._bottom and self._top <= other._bottom)
+
+    def union_with_rect(self, other: Rect) -> Rect:
+        """指定した矩形と合わせた範囲を囲む矩形を得る."""
+        return Rect._from_edges(
+            min(self._left, other._left), min(self._top, other._top),
+            max(self._right, other._right), max(self._bottom, other._bottom))
+
+    def clip_with_rect(self, other: Rect) -> tp.Optional[Rect]:
+        """指定した矩形の内側に切り詰めた矩形を得る.
+
+        :return: 切り詰めた矩形。交差しない場合はNone
+        """
+        if not self.intersects_with_rect(other):
+            return None
+        return Rect._from_edges(
+            max(self._left, other._left), max(self._top, other._top),
+            min(self._right, other._right), min(self._bottom, other._bottom))
 
 
 class Color:
-    """色."""
+    """色.
 
-    def __init__(self, r: int, g: int, b: int, a: int = 255):
-        if r < 0 or 255 < r:
-            raise ValueError()
-        if g < 0 or 255 < g:
-            raise ValueError()
-        if b < 0 or 255 < b:
-            raise ValueError()
-        if r < 0 or 255 < r:
-            raise ValueError()
+    不変で、同じ値の色は同じインスタンスを使い回す。
+    使い回すインスタンスは検証せずに返すので、値を検証するのは初めて作る時だけ。
+    CSS文字列は生成時に1度だけ作る。
+    """
+
+    __slots__ = ('_r', '_g', '_b', '_a', '_css')
 
-        self._r = r
-        self._g = g
-        self._b = b
-        self._a = a
+    #: 使い回すインスタンスの最大数
+    CACHE_LIMIT = 4096
+    _cache: dict[tuple[int, int, int, int], Color] = {}
+
+    def __new__(cls, r: int, g: int, b: int, a: int = 255):
+        color = cls._cache.get((r, g, b, a))
+        if color is not None:
+            return color
+
+        if not (0 <= r <= 255 and 0 <= g <= 255 and 0 <= b <= 255 and 0 <= a <= 255):
+            raise ValueError(f'Color({r}, {g}, {b}, {a}) is out of range.')
+
+        color = object.__new__(cls)
+        object.__setattr__(color, '_r', r)
+        object.__setattr__(color, '_g', g)
+        object.__setattr__(color, '_b', b)
+        object.__setattr__(color, '_a', a)
+        if a == 255:
+            css = f'rgb({r},{g},{b})'
+        else:
+            css = f'rgba({r},{g},{b},{a / 255:.3g})'
+        object.__setattr__(color, '_css', css)
+
+        if len(cls._cache) < cls.CACHE_LIMIT:
+            cls._cache[(r, g, b, a)] = color
+        return color
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f'{type(self).__name__} is immutable.')
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Color):
+            return NotImplemented
+        return (self._r, self._g, self._b, self._a) == (other._r, other._g, other._b, other._a)
+
+    def __hash__(self):
+        return hash((self._r, self._g, self._b, self._a))
+
+    def __repr__(self):
+        return f'Color({self._r}, {self._g}, {self._b}, {self._a})'
 
     @property
     def r(self) -> int:
@@ -98,16 +276,79 @@ class Color:
     def a(self) -> int:
         return self._a
 
+    @property
+    def css(self) -> str:
+        """CSSの色指定文字列."""
+        return self._css
+
 
 class Font:
-    """フォント設定."""
+    """フォント設定.
+
+    不変で、同じ設定のフォントは同じインスタンスを使い回す。
+    CSS文字列は生成時に1度だけ作る。
+    """
+
+    __slots__ = ('_size', '_name', '_bold', '_css')
+
+    #: 使い回すインスタンスの最大数
+    CACHE_LIMIT = 256
+    _cache: dict[tuple[int, str, bool], Font] = {}
+
+    def __new__(cls, size: int, name: str, bold: bool = False):
+        key = (size, name, bold)
+        font = cls._cache.get(key)
+        if font is not None:
+            return font
 
-    def __init__(self, size: int, name: str, bold: bool = False):
         if size <= 0:
             raise ValueError()
         if not name:
             raise ValueError()
 
-        self.size = size
-        self.name = name
-        self.bold = bold
+        font = super().__new__(cls)
+        object.__setattr__(font, '_size', size)
+        object.__setattr__(font, '_name', name)
+        object.__setattr__(font, '_bold', bold)
+        css = f'{size}px '
+        if bold:
+            css += 'bold '
+        css += name
+        object.__setattr__(font, '_css', css)
+
+        if len(cls._cache) < cls.CACHE_LIMIT:
+            cls._cache[key] = font
+        return font
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f'{type(self).__name__} is immutable.')
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Font):
+            return NotImplemented
+        return (self._size, self._name, self._bold) == (other._size, other._name, other._bold)
+
+    def __hash__(self):
+        return hash((self._size, self._name, self._bold))
+
+    def __repr__(self):
+        return f'Font({self._size}, {self._name!r}, bold={self._bold})'
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def bold(self) -> bool:
+        return self._bold
+
+    @property
+    def css(self) -> str:
+        """CSSのフォント指定文字列."""
+        return self._css
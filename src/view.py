@@ -4,10 +4,13 @@ from __future__ import annotations
 
 import typing as tp
 
+from dirty_region import DirtyRegion
 from frame import Frame
-from input import VirtualKey, OperationParam
+from input import VirtualKey, OperationParam, InputSnapshot
 from interface import AbstractRenderer, AbstractImageLoader
+from layer import LayerStack
 from model import GameModel
+from model_runner import AbstractModelRunner
 from values import *
 
 # 型：ログ出力関数
@@ -18,6 +21,16 @@ class Button(Frame):
     """ボタン."""
 
     MARGIN_LEFT = 5
+    #: 文字サイズ
+    FONT_SIZE = 30
+    #: 背景色
+    BACK_COLOR = Color(255, 255, 255)
+    #: 枠線の色
+    FRAME_COLOR = Color(128, 128, 128)
+    #: 文字色
+    TEXT_COLOR = Color(0, 0, 0)
+    #: フォント
+    FONT = Font(FONT_SIZE, 'serif')
 
     def __init__(
             self,
@@ -27,7 +40,7 @@ class Button(Frame):
             parent: Frame = None):
         super().__init__(rect, parent)
 
-        self.text = text
+        self._text = text
         self._renderer = renderer
 
         #: 押された時に呼ばれるコールバック
@@ -35,17 +48,34 @@ class Button(Frame):
 
         self.connect_input(VirtualKey.MouseLeft, self._on_mouseleft)
 
-    def draw(self):
-        """描画."""
+    @property
+    def text(self) -> str:
+        """表示する文字列."""
+        return self._text
 
-        self._renderer.draw_rect(self.rect, Color(255, 255, 255))
-        self._renderer.draw_rect(self.rect, Color(128, 128, 128), fill=False)
+    @text.setter
+    def text(self, value: str) -> None:
+        if value == self._text:
+            return
+        self._text = value
+        self.invalidate()
+
+    def draw(self, renderer: AbstractRenderer = None):
+        """描画.
+
+        :param renderer: 描画先。Noneなら生成時に渡した描画クラス
+        """
+        if renderer is None:
+            renderer = self._renderer
+
+        rect = self.world_rect
+        renderer.draw_rect(rect, self.BACK_COLOR)
+        renderer.draw_rect(rect, self.FRAME_COLOR, fill=False)
 
-        font_size = 30
-        (x, y) = self.position.x, self.position.y
+        (x, y) = rect.position.x, rect.position.y
         x += self.MARGIN_LEFT
-        y += font_size
-        self._renderer.draw_text(self.text, (x, y), Font(font_size, 'serif'), Color(0, 0, 0))
+        y += self.FONT_SIZE
+        renderer.draw_text(self.text, (x, y), self.FONT, self.TEXT_COLOR, cached=True)
 
     def _on_mouseleft(self, param: OperationParam):
         if param.is_press():
@@ -59,18 +89,59 @@ class GameView:
     :param model: ゲームモデル
     :param renderer: 描画クラス
     :param image_loader: 画像読み込みクラス
+    :param log_func: ログ出力関数
+    :param layered: 描画レイヤーを使うか。描画クラスがオフスクリーンに対応している必要がある
+    :param runner: ゲームモデルの実行。指定するとモデルを直接読み書きせず、スナップショットと操作の依頼を使う
     """
 
+    #: 線の色
+    LINE_COLOR = Color(200, 0, 0)
+    #: 円の色
+    CIRCLE_COLOR = Color(0, 0, 200)
+    #: タイトルのフォント
+    TITLE_FONT = Font(size=48, name='serif', bold=True)
+    #: タイトルの色
+    TITLE_COLOR = Color(0, 100, 0)
+    #: 矩形
+    RECT = Rect(Position(400, 250), Size(100, 50))
+    #: 矩形の色
+    RECT_COLOR = Color(0, 200, 0)
+    #: マウスに追従する画像のサイズ
+    IMAGE_SIZE = Size(32, 32)
+    #: ロード中表示のフォント
+    LOADING_FONT = Font(size=48, name='sans-serif', bold=True)
+    #: ロード中表示の色
+    LOADING_COLOR = Color(255, 255, 255)
+    #: デバッグ表示のフォント
+    DEBUG_FONT = Font(size=10, name='sans-serif')
+    #: デバッグ表示の色
+    DEBUG_COLOR = Color(0, 0, 0)
+    #: フレームのデバッグ表示の色
+    DEBUG_FRAME_COLOR = Color(0, 255, 255)
+    #: デバッグ情報の表示範囲
+    DEBUG_RECT = Rect(Position(0, 0), Size(200, 25))
+    #: レイヤー名：静的な背景
+    BACKGROUND_LAYER = 'background'
+    #: レイヤー名：マウスに追従する画像
+    SPRITE_LAYER = 'sprite'
+    #: レイヤー名：ボタン
+    WIDGET_LAYER = 'widget'
+    #: レイヤー名：デバッグ表示
+    HUD_LAYER = 'hud'
+
     def __init__(
             self,
             model: GameModel,
             renderer: AbstractRenderer,
             image_loader: AbstractImageLoader,
-            log_func: LogFuncType = None) -> None:
+            log_func: LogFuncType = None,
+            layered: bool = False,
+            runner: AbstractModelRunner = None) -> None:
 
         if model is None:
             raise ValueError('model is None')
         self._model = model
+        self._runner = runner
 
         if renderer is None:
             raise ValueError('renderer is None')
@@ -86,12 +157,26 @@ class GameView:
         else:
             self.log = log_func
 
+        self._dirty_region = DirtyRegion(Rect(Position(0, 0), self._renderer.size))
+        self._dirty_region.invalidate_all()
+        self._is_loading = True
+        self._debug_texts: tuple[str, ...] = ()
+        #: キーの状態。入力キューのリスナーとして1フレームに1回まとめて更新し、毎フレームの処理で問い合わせる
+        self.input_snapshot = InputSnapshot()
+
         self._root_frame = self._create_root_frame()
+        self._root_frame.dirty_region = self._dirty_region
         self._mouse_pos = Position(0, 0)
+        #: マウスに追従する画像の矩形。描画のたびに作らないよう、マウスが動いた時だけ作り直す
+        self._image_rect = Rect(self._mouse_pos, self.IMAGE_SIZE)
 
         self._buttons: list[Button] = []
         self._create_buttons()
 
+        self._layers: tp.Optional[LayerStack] = None
+        if layered:
+            self._layers = self._create_layers()
+
     def _create_root_frame(self) -> Frame:
         """ルートフレームを生成する."""
         position = Position(0, 0)
@@ -115,80 +200,200 @@ class GameView:
             self._buttons.append(button)
 
     def draw(self) -> None:
-        """描画."""
-        self._renderer.clear()
+        """描画.
+
+        前回の描画から変化した範囲だけを描き直す。
+        """
+        self._check_changes()
+        if self._layers is not None:
+            self._draw_layers()
+        elif not self._dirty_region.is_empty():
+            self._renderer.set_clip(self._dirty_region.rects)
+            self._draw_frame()
+            self._renderer.reset_clip()
+            self._dirty_region.clear()
+        self._renderer.flush()
+
+    def _check_changes(self) -> None:
+        """描画内容の変化を調べて、再描画範囲に加える."""
+        is_loading = self._image_loader.is_loading()
+        if is_loading != self._is_loading:
+            self._is_loading = is_loading
+            self._dirty_region.invalidate_all()
+            if self._layers is not None:
+                self._layers.invalidate()
+
+        debug_texts = self._get_debug_texts()
+        if debug_texts != self._debug_texts:
+            self._debug_texts = debug_texts
+            if self._layers is not None:
+                self._layers.invalidate(self.HUD_LAYER)
+            else:
+                self._dirty_region.invalidate(self.DEBUG_RECT)
+
+    def _draw_frame(self) -> None:
+        """再描画範囲の描画命令を出す."""
+        renderer = self._renderer
+        dirty_region = self._dirty_region
+        for rect in dirty_region.rects:
+            renderer.clear(rect)
 
         # 先読み画像の読み込み待ち
-        if self._image_loader.is_loading():
-            self._show_loading()
+        if self._is_loading:
+            self._show_loading(renderer)
             return
 
-        self._renderer.draw_line(
+        self._draw_scene(renderer)
+
+        if dirty_region.intersects_with_rect(self.RECT):
+            renderer.draw_rect(
+                rect=self.RECT,
+                color=self.RECT_COLOR)
+
+        if dirty_region.intersects_with_rect(self._image_rect):
+            self._draw_sprite(renderer)
+
+        for button in self._buttons:
+            if dirty_region.intersects_with_rect(button.world_rect):
+                button.draw()
+
+        self._display_debug(renderer)
+
+    def _create_layers(self) -> LayerStack:
+        """描画レイヤーを生成する."""
+        layers = LayerStack(self._renderer)
+        layers.add(self.BACKGROUND_LAYER, self._draw_background_layer)
+        layers.add(self.SPRITE_LAYER, self._draw_sprite_layer)
+        layers.add(self.WIDGET_LAYER, self._draw_widget_layer)
+        layers.add(self.HUD_LAYER, self._draw_hud_layer)
+        return layers
+
+    def _draw_layers(self) -> None:
+        """変化したレイヤーを描き直して、重ね合わせる."""
+        # ボタンなどのフレームの変化
+        if not self._dirty_region.is_empty():
+            self._layers.invalidate(self.WIDGET_LAYER)
+            self._dirty_region.clear()
+        self._layers.draw()
+
+    def _draw_background_layer(self, renderer: AbstractRenderer) -> None:
+        """静的な背景のレイヤー."""
+        if self._is_loading:
+            self._show_loading(renderer)
+            return
+
+        self._draw_scene(renderer)
+        renderer.draw_rect(
+            rect=self.RECT,
+            color=self.RECT_COLOR)
+
+    def _draw_sprite_layer(self, renderer: AbstractRenderer) -> None:
+        """マウスに追従する画像のレイヤー."""
+        if not self._is_loading:
+            self._draw_sprite(renderer)
+
+    def _draw_widget_layer(self, renderer: AbstractRenderer) -> None:
+        """ボタンのレイヤー."""
+        if not self._is_loading:
+            for button in self._buttons:
+                button.draw(renderer)
+
+    def _draw_hud_layer(self, renderer: AbstractRenderer) -> None:
+        """デバッグ表示のレイヤー."""
+        if not self._is_loading:
+            self._display_debug(renderer)
+
+    def _draw_scene(self, renderer: AbstractRenderer) -> None:
+        """変化しない図形を描画する."""
+        renderer.draw_line(
             start_pos=(300, 100),
             end_pos=(400, 120),
-            color=Color(200, 0, 0))
+            color=self.LINE_COLOR)
 
-        self._renderer.draw_circle(
+        renderer.draw_circle(
             center=(300, 200),
             radius=50,
-            color=Color(0, 0, 200))
+            color=self.CIRCLE_COLOR)
 
-        self._renderer.draw_text(
+        renderer.draw_text(
             text='GameTemplate',
             position=(10, 380),
-            font=Font(size=48, name='serif', bold=True),
-            color=Color(0, 100, 0))
-
-        self._renderer.draw_rect(
-            rect=Rect(
-                Position(400, 250),
-                Size(100, 50)),
-            color=Color(0, 200, 0))
+            font=self.TITLE_FONT,
+            color=self.TITLE_COLOR,
+            cached=True)
 
+    def _draw_sprite(self, renderer: AbstractRenderer) -> None:
+        """マウスに追従する画像を描画する."""
         image = self._image_loader.get_image('image.png')
         if image is not None:
-            self._renderer.draw_image(
+            renderer.draw_image(
                 image=image,
                 position=self._mouse_pos,
-                size=Size(32, 32))
-
-        for button in self._buttons:
-            button.draw()
-
-        self._display_debug()
+                size=self.IMAGE_SIZE,
+                src_rect=self._image_loader.get_source_rect('image.png'))
 
     def operate(self, param: OperationParam) -> None:
         """入力時に外部から呼ばれる."""
         if param.code == VirtualKey.MouseMove:
-            self._mouse_pos = param.position
+            if self._layers is not None:
+                self._set_mouse_pos(param.position)
+                self._layers.invalidate(self.SPRITE_LAYER)
+            else:
+                self._dirty_region.invalidate(self._image_rect)
+                self._set_mouse_pos(param.position)
+                self._dirty_region.invalidate(self._image_rect)
 
         if param.code == VirtualKey.S and param.is_press():
-            self._model.save()
+            self._post(GameModel.save)
         elif param.code == VirtualKey.L and param.is_press():
-            self._model.load()
+            self._post(GameModel.load)
 
         self._root_frame.process_input(param)
 
-    def _show_loading(self) -> None:
+    def _show_loading(self, renderer: AbstractRenderer) -> None:
         """ロード中表示."""
-        self._renderer.draw_text(
+        renderer.draw_text(
             text='Now Loading...',
             position=(120, 200),
-            font=Font(size=48, name='sans-serif', bold=True),
-            color=Color(255, 255, 255))
+            font=self.LOADING_FONT,
+            color=self.LOADING_COLOR,
+            cached=True)
+
+    def _set_mouse_pos(self, position: Position) -> None:
+        """マウスの位置を設定する."""
+        self._mouse_pos = position
+        self._image_rect = Rect(position, self.IMAGE_SIZE)
+
+    def _post(self, func: tp.Callable[[GameModel], tp.Any]) -> None:
+        """モデルへの操作を行う。ランナーがあれば依頼する."""
+        if self._runner is not None:
+            self._runner.post(func)
+        else:
+            func(self._model)
+
+    def _get_debug_texts(self) -> tuple[str, ...]:
+        """デバッグ表示する文字列."""
+        if self._runner is not None:
+            time = self._runner.time
+        else:
+            time = self._model.time
+        return (
+            f'Time={time:.1f}',
+            f'MousePos={self._mouse_pos}',
+        )
 
-    def _display_debug(self) -> None:
+    def _display_debug(self, renderer: AbstractRenderer) -> None:
         """デバッグ情報を画面に描画する."""
-        font = Font(size=10, name='sans-serif')
-        color = Color(0, 0, 0)
-        self._renderer.draw_text(f'Time={self._model.time:.1f}', (0, 10), font, color)
-        self._renderer.draw_text(f'MousePos={self._mouse_pos}', (0, 20), font, color)
-        self._display_debug_frame()
+        font = self.DEBUG_FONT
+        color = self.DEBUG_COLOR
+        for (i, text) in enumerate(self._debug_texts):
+            renderer.draw_text(text, (0, 10 + i * 10), font, color)
+        self._display_debug_frame(renderer)
 
-    def _display_debug_frame(self) -> None:
+    def _display_debug_frame(self, renderer: AbstractRenderer) -> None:
         """フレームのデバッグ表示."""
         rect = self._root_frame.rect
-        self._renderer.draw_rect(rect, Color(0, 255, 255), fill=False)
+        renderer.draw_rect(rect, self.DEBUG_FRAME_COLOR, fill=False)
 
     def _on_button_pressed(self, button: Button) -> None:
         """ボタンが押された."""
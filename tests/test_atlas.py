@@ -0,0 +1,61 @@
+"""atlasモジュールのテスト."""
+
+import unittest
+
+from atlas import *
+from headless import InstantImageLoader
+from values import *
+
+
+class TestAtlas(unittest.TestCase):
+
+    def test_pack(self):
+        packer = AtlasPacker(max_width=100, padding=1)
+        sizes = {f'image{i}.png': Size(10 + i * 5, 10 + (i % 3) * 8) for i in range(10)}
+        for (name, size) in sizes.items():
+            packer.add(name, size)
+        manifest = packer.pack('atlas.png')
+
+        self.assertEqual(len(manifest), 10)
+        self.assertLessEqual(manifest.size.width, 100)
+        atlas_rect = Rect(Position(0, 0), manifest.size)
+        rects = [manifest.get(name) for name in sizes]
+        for (name, rect) in zip(sizes, rects):
+            self.assertEqual(rect.size, sizes[name])
+            self.assertEqual(rect.clip_with_rect(atlas_rect), rect)
+        # 重ならない(間隔を空けているので、接してもいない)
+        for (i, a) in enumerate(rects):
+            for b in rects[i + 1:]:
+                self.assertFalse(a.intersects_with_rect(b))
+
+    def test_pack_invalid(self):
+        packer = AtlasPacker(max_width=100)
+        packer.add('a.png', Size(10, 10))
+        with self.assertRaises(ValueError):
+            packer.add('a.png', Size(10, 10))
+        with self.assertRaises(ValueError):
+            packer.add('b.png', Size(100, 10))
+
+    def test_json(self):
+        packer = AtlasPacker()
+        packer.add('a.png', Size(10, 20))
+        packer.add('b.png', Size(30, 5))
+        manifest = packer.pack('atlas.png')
+        loaded = AtlasManifest.from_json(manifest.to_json())
+        self.assertEqual(loaded.image_file, 'atlas.png')
+        self.assertEqual(loaded.size, manifest.size)
+        for name in manifest.names:
+            self.assertEqual(loaded.get(name), manifest.get(name))
+        self.assertIsNone(loaded.get('c.png'))
+
+    def test_loader(self):
+        manifest = AtlasManifest('atlas.png', Size(64, 64), {'a.png': Rect(Position(1, 1), Size(32, 32))})
+        loader = InstantImageLoader(['b.png'], atlas=manifest)
+        self.assertEqual(loader.get_image('a.png'), 'atlas.png')
+        self.assertEqual(loader.get_source_rect('a.png'), Rect(Position(1, 1), Size(32, 32)))
+        self.assertEqual(loader.get_image('b.png'), 'b.png')
+        self.assertIsNone(loader.get_source_rect('b.png'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""collisionモジュールのテスト."""
+
+import random
+import unittest
+
+from collision import *
+from values import *
+
+
+class TestCollision(unittest.TestCase):
+
+    def _brute_force(self, rects: dict[int, Rect]) -> set[frozenset[int]]:
+        items = list(rects)
+        return {
+            frozenset((a, b))
+            for (i, a) in enumerate(items) for b in items[i + 1:]
+            if rects[a].intersects_with_rect(rects[b])
+        }
+
+    def _check(self, broad_phase: AbstractBroadPhase) -> None:
+        rng = random.Random(1)
+        world = CollisionWorld(Size(1000, 1000), broad_phase)
+
+        def random_rect() -> Rect:
+            return Rect(
+                Position(rng.uniform(-20, 1000), rng.uniform(-20, 1000)),
+                Size(rng.uniform(1, 40), rng.uniform(1, 40)))
+
+        rects = {i: random_rect() for i in range(300)}
+        for (item, rect) in rects.items():
+            world.add(item, rect)
+
+        for _ in range(3):
+            collisions = world.find_collisions()
+            # 同じ組は1回だけ含む
+            self.assertEqual(len(collisions), len({frozenset(pair) for pair in collisions}))
+            self.assertEqual({frozenset(pair) for pair in collisions}, self._brute_force(rects))
+            self.assertGreaterEqual(world.candidate_count, world.collision_count)
+
+            # 動かす、削除する
+            for item in list(rects)[:50]:
+                rects[item] = random_rect()
+                world.move(item, rects[item])
+            for item in list(rects)[-10:]:
+                del rects[item]
+                world.remove(item)
+
+    def test_spatial_hash(self):
+        self._check(SpatialHashBroadPhase(cell_size=32))
+
+    def test_sweep_and_prune(self):
+        self._check(SweepAndPruneBroadPhase())
+
+    def test_world(self):
+        world = CollisionWorld(Size(600, 400))
+        self.assertAlmostEqual(world.broad_phase.cell_size, 600 / DEFAULT_GRID_DIVISIONS)
+        world.add('a', Rect(Position(0, 0), Size(10, 10)))
+        world.add('b', Rect(Position(5, 5), Size(10, 10)))
+        world.add('c', Rect(Position(50, 50), Size(10, 10)))
+        with self.assertRaises(ValueError):
+            world.add('a', Rect(Position(0, 0), Size(10, 10)))
+
+        collisions = []
+        world.connect(lambda item, other: collisions.append({item, other}))
+        world.update()
+        self.assertEqual(collisions, [{'a', 'b'}])
+
+        collisions.clear()
+        world.move('c', Rect(Position(12, 12), Size(10, 10)))
+        world.update()
+        self.assertCountEqual(collisions, [{'a', 'b'}, {'b', 'c'}])
+        self.assertEqual(world.get_rect('c'), Rect(Position(12, 12), Size(10, 10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""cullingモジュールのテスト."""
+
+import unittest
+from unittest import mock
+
+import rect_array
+from culling import *
+from rect_array import RectArray
+from values import *
+
+
+class TestCulling(unittest.TestCase):
+
+    def test_culler(self):
+        culler = ViewportCuller(Rect(Position(0, 0), Size(100, 100)))
+        self.assertTrue(culler.is_visible(Rect(Position(90, 90), Size(20, 20))))
+        self.assertFalse(culler.is_visible(Rect(Position(101, 0), Size(10, 10))))
+        self.assertFalse(culler.is_visible(get_circle_bounds(-20, 50, 10)))
+        self.assertEqual((culler.culled_count, culler.drawn_count), (2, 1))
+
+        culler.end_frame()
+        self.assertEqual((culler.last_culled_count, culler.last_drawn_count), (2, 1))
+        self.assertEqual((culler.culled_count, culler.drawn_count), (0, 0))
+
+        # 表示範囲を動かす
+        culler.viewport = Rect(Position(100, 0), Size(100, 100))
+        self.assertTrue(culler.is_visible(Rect(Position(101, 0), Size(10, 10))))
+
+        # まとめて判定する
+        culler.end_frame()
+        bounds = RectArray([Rect(Position(x, 0), Size(10, 10)) for x in range(0, 300, 50)])
+        self.assertEqual(list(culler.get_visible_mask(bounds)), [0, 0, 1, 1, 1, 0])
+        self.assertEqual((culler.culled_count, culler.drawn_count), (3, 3))
+
+    def test_visible_mask_fallback(self):
+        # numpyがなければ0/1のbytearrayを数える
+        culler = ViewportCuller(Rect(Position(100, 0), Size(100, 100)))
+        with mock.patch.object(rect_array, 'numpy', None):
+            bounds = RectArray([Rect(Position(x, 0), Size(10, 10)) for x in range(0, 300, 50)])
+            mask = culler.get_visible_mask(bounds)
+        self.assertIsInstance(mask, bytearray)
+        self.assertEqual((culler.culled_count, culler.drawn_count), (3, 3))
+
+    def test_bounds(self):
+        self.assertEqual(get_line_bounds(10, 0, 0, 10), Rect(Position(-1, -1), Size(12, 12)))
+        self.assertEqual(
+            get_stroke_rect_bounds(Rect(Position(0, 0), Size(10, 10))),
+            Rect(Position(-1, -1), Size(12, 12)))
+        self.assertEqual(get_circle_bounds(10, 10, 5), Rect(Position(5, 5), Size(10, 10)))
+        bounds = get_text_bounds('abc', 0, 20, Font(10, 'serif'))
+        self.assertTrue(bounds.contains_point(Position(25, 15)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""dirty_regionモジュールのテスト."""
+
+import unittest
+
+from dirty_region import *
+from values import *
+
+
+class TestDirtyRegion(unittest.TestCase):
+
+    def setUp(self):
+        self.region = DirtyRegion(Rect(Position(0, 0), Size(600, 400)))
+
+    def test_invalidate(self):
+        region = self.region
+        self.assertTrue(region.is_empty())
+
+        region.invalidate(Rect(Position(10, 10), Size(10, 10)))
+        region.invalidate(Rect(Position(100, 100), Size(10, 10)))
+        self.assertEqual(len(region.rects), 2)
+        self.assertTrue(region.intersects_with_rect(Rect(Position(15, 15), Size(1, 1))))
+        self.assertFalse(region.intersects_with_rect(Rect(Position(50, 50), Size(1, 1))))
+
+        region.clear()
+        self.assertTrue(region.is_empty())
+
+    def test_merge(self):
+        region = self.region
+
+        # 接する矩形はまとめる
+        region.invalidate(Rect(Position(10, 10), Size(10, 10)))
+        region.invalidate(Rect(Position(20, 10), Size(10, 10)))
+        self.assertEqual(region.rects, [Rect(Position(10, 10), Size(20, 10))])
+
+        # まとめた結果重なった矩形もまとめる
+        region.invalidate(Rect(Position(100, 10), Size(10, 10)))
+        region.invalidate(Rect(Position(25, 5), Size(80, 10)))
+        self.assertEqual(region.rects, [Rect(Position(10, 5), Size(100, 15))])
+
+    def test_clip(self):
+        region = self.region
+
+        # 画面外は無視する
+        region.invalidate(Rect(Position(-100, -100), Size(10, 10)))
+        self.assertTrue(region.is_empty())
+
+        region.invalidate(Rect(Position(590, 390), Size(20, 20)))
+        self.assertEqual(region.rects, [Rect(Position(590, 390), Size(10, 10))])
+
+        region.invalidate_all()
+        self.assertEqual(region.rects, [region.bounds])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 
 import unittest
 
+from dirty_region import *
 from frame import *
 from input import *
 from values import *
@@ -30,7 +31,7 @@ class TestFrame(unittest.TestCase):
         # 親子付け
         frame2 = Frame(Rect(Position(30, 40), Size(50, 60)), parent=frame1)
         self.assertEqual(frame2.parent, frame1)
-        self.assertEqual(frame1._children[0], frame2)
+        self.assertEqual(frame1.children[0], frame2)
 
         # 子フレームが受け取るか
         frame2.connect_input(VirtualKey.MouseMiddle, self._on_input)
@@ -39,6 +40,180 @@ class TestFrame(unittest.TestCase):
             state=InputState.Press)
         self.assertTrue(frame1.process_input(param))
 
+    def test_key_input(self):
+        received = []
+
+        def connect(frame: Frame, result: bool = False) -> Frame:
+            frame.connect_input(VirtualKey.Space, lambda param: received.append(frame) or result)
+            return frame
+
+        root = connect(Frame(Rect(Position(0, 0), Size(600, 400))))
+        a = connect(Frame(Rect(Position(0, 0), Size(10, 10)), parent=root))
+        a1 = connect(Frame(Rect(Position(0, 0), Size(10, 10)), parent=a))
+        b = Frame(Rect(Position(0, 0), Size(10, 10)), parent=root)
+        # 親のないフレームで登録してから追加する
+        b1 = connect(Frame(Rect(Position(0, 0), Size(10, 10))))
+        b.append(b1)
+        self.assertEqual(len(root._key_index), 4)
+
+        # 木をたどる場合と同じく、手前から順に渡す
+        param = OperationParam(code=VirtualKey.Space, state=InputState.Press)
+        self.assertFalse(root.process_input(param))
+        self.assertEqual(received, [b1, a1, a, root])
+
+        # 処理されたらそこで止まる
+        received.clear()
+        a.disconnect_input(VirtualKey.Space)
+        connect(a, result=True)
+        self.assertTrue(root.process_input(param))
+        self.assertEqual(received, [b1, a1, a])
+
+        # 登録を解除したフレームには渡さない
+        received.clear()
+        b1.disconnect_input_all()
+        a1.disconnect_input(VirtualKey.Space)
+        self.assertTrue(root.process_input(param))
+        self.assertEqual(received, [a])
+
+        with self.assertRaises(RuntimeError):
+            root.append(b1)
+
+    def test_invalidate(self):
+        root = Frame(Rect(Position(0, 0), Size(600, 400)))
+        root.dirty_region = DirtyRegion(root.rect)
+        child = Frame(Rect(Position(10, 20), Size(30, 40)), parent=root)
+
+        # 子フレームの通知はルートフレームに記録される
+        child.invalidate()
+        self.assertEqual(root.dirty_region.rects, [child.rect])
+
+    def test_spatial_index(self):
+        root = Frame(Rect(Position(0, 0), Size(1000, 1000)))
+        root.enable_spatial_index(cell_size=50)
+        received: list[Frame] = []
+
+        def create(x: int, y: int) -> Frame:
+            frame = Frame(Rect(Position(x, y), Size(20, 20)), parent=root)
+            frame.connect_input(VirtualKey.MouseLeft, lambda param: received.append(frame) or True)
+            return frame
+
+        frames = [create(x * 25, y * 25) for x in range(40) for y in range(40)]
+        # 重なっている場合は後から追加した方が手前
+        front = create(10, 10)
+
+        param = OperationParam(
+            code=VirtualKey.MouseLeft,
+            state=InputState.Press,
+            position=Position(15, 15))
+        self.assertTrue(root.process_input(param))
+        self.assertEqual(received, [front])
+
+        # 移動すると索引も更新される
+        front.rect = Rect(Position(500, 500), Size(20, 20))
+        received.clear()
+        self.assertTrue(root.process_input(param))
+        self.assertEqual(received, [frames[0]])
+
+        # 隙間では処理されない
+        param.position = Position(22, 22)
+        self.assertFalse(root.process_input(param))
+
+    def test_world_rect(self):
+        root = Frame(Rect(Position(0, 0), Size(600, 400)))
+        panel = Frame(Rect(Position(100, 50), Size(200, 200)), parent=root)
+        child = Frame(Rect(Position(10, 20), Size(30, 40)), parent=panel)
+        self.assertEqual(child.world_rect, Rect(Position(110, 70), Size(30, 40)))
+
+        # 先祖を動かすと子孫の画面上の矩形も変わる
+        panel.rect = Rect(Position(200, 100), Size(200, 200))
+        self.assertEqual(child.rect, Rect(Position(10, 20), Size(30, 40)))
+        self.assertEqual(child.world_rect, Rect(Position(210, 120), Size(30, 40)))
+
+        # 入力位置は画面上の座標で判定する
+        child.connect_input(VirtualKey.MouseLeft, self._on_input)
+        param = OperationParam(
+            code=VirtualKey.MouseLeft,
+            state=InputState.Press,
+            position=Position(215, 125))
+        self.assertTrue(root.process_input(param))
+        param.position = Position(15, 25)
+        self.assertFalse(root.process_input(param))
+
+    def test_remove_reparent(self):
+        received = []
+        root = Frame(Rect(Position(0, 0), Size(600, 400)))
+        a = Frame(Rect(Position(100, 0), Size(100, 100)), parent=root)
+        b = Frame(Rect(Position(0, 100), Size(100, 100)), parent=root)
+        child = Frame(Rect(Position(10, 10), Size(10, 10)), parent=a)
+        child.connect_input(VirtualKey.Space, lambda param: received.append(child) or True)
+        param = OperationParam(code=VirtualKey.Space, state=InputState.Press)
+
+        # 付け替えると画面上の矩形も変わる
+        child.reparent(b)
+        self.assertIs(child.parent, b)
+        self.assertEqual(a.children, [])
+        self.assertEqual(b.children, [child])
+        self.assertEqual(child.world_rect, Rect(Position(10, 110), Size(10, 10)))
+        self.assertTrue(root.process_input(param))
+
+        # 子孫には付け替えられない
+        with self.assertRaises(RuntimeError):
+            b.reparent(child)
+
+        # 削除したフレームには入力が渡らない
+        b.remove(child)
+        self.assertIsNone(child.parent)
+        self.assertEqual(child.world_rect, Rect(Position(10, 10), Size(10, 10)))
+        received.clear()
+        self.assertFalse(root.process_input(param))
+        self.assertEqual(received, [])
+        with self.assertRaises(RuntimeError):
+            b.remove(child)
+
+        # 削除したフレームは単独の木として入力を受け取り、別の木にも追加できる
+        self.assertTrue(child.process_input(param))
+        other = Frame(Rect(Position(0, 0), Size(600, 400)))
+        other.append(child)
+        received.clear()
+        self.assertTrue(other.process_input(param))
+        self.assertEqual(received, [child])
+
+        # 削除した木の登録は入力を待たずに逆引きから取り除く
+        for _ in range(1000):
+            panel = Frame(Rect(Position(0, 0), Size(10, 10)), parent=root)
+            button = Frame(Rect(Position(0, 0), Size(5, 5)), parent=panel)
+            button.connect_input(VirtualKey.Escape, lambda param: True)
+            root.remove(panel)
+        self.assertEqual(len(root._key_index), 0)
+        self.assertEqual(len(panel._get_key_index()), 1)
+
+    def test_z_order(self):
+        received = []
+        root = Frame(Rect(Position(0, 0), Size(600, 400)))
+
+        def create(z: int) -> Frame:
+            frame = Frame(Rect(Position(0, 0), Size(10, 10)), parent=root, z=z)
+            frame.connect_input(VirtualKey.MouseLeft, lambda param: received.append(frame) or True)
+            return frame
+
+        top = create(1)
+        bottom = create(0)
+        self.assertEqual(root.children, [bottom, top])
+
+        # zが大きい方が手前
+        param = OperationParam(
+            code=VirtualKey.MouseLeft,
+            state=InputState.Press,
+            position=Position(5, 5))
+        self.assertTrue(root.process_input(param))
+        self.assertEqual(received, [top])
+
+        bottom.z = 2
+        self.assertEqual(root.children, [top, bottom])
+        received.clear()
+        self.assertTrue(root.process_input(param))
+        self.assertEqual(received, [bottom])
+
     @staticmethod
     def _on_input(param: OperationParam) -> bool:
         return True
@@ -0,0 +1,48 @@
+"""headlessモジュールのテスト."""
+
+import unittest
+
+from headless import *
+from model import GameModel
+from render_command import RenderOp
+from values import Position, Size, Rect, Color
+from view import GameView
+
+
+class TestHeadless(unittest.TestCase):
+
+    def test_take_counts(self):
+        renderer = HeadlessRenderer()
+        renderer.draw_rect(Rect(Position(0, 0), Size(10, 10)), Color(255, 0, 0))
+        renderer.draw_rect(Rect(Position(0, 0), Size(10, 10)), Color(0, 0, 0), fill=False)
+        renderer.draw_line((0, 0), (10, 10), Color(0, 0, 0))
+        renderer.flush()
+
+        counts = renderer.take_counts()
+        self.assertEqual(counts[RenderOp.FillRect], 1)
+        self.assertEqual(counts[RenderOp.StrokeRect], 1)
+        self.assertEqual(counts[RenderOp.Line], 1)
+        self.assertEqual(HeadlessRenderer.count_draw_calls(counts), 3)
+
+        # 取得したら空になる
+        self.assertEqual(len(renderer.take_counts()), 0)
+
+    def test_game_view(self):
+        model = GameModel(Size(600, 400), log_func=lambda mes: None)
+        renderer = HeadlessRenderer()
+        loader = InstantImageLoader(['image.png'])
+        view = GameView(model, renderer, loader, log_func=lambda mes: None)
+        self.assertEqual(loader.get_image('image.png'), 'image.png')
+        self.assertIsNone(loader.get_image('unknown.png'))
+
+        view.draw()
+        first = HeadlessRenderer.count_draw_calls(renderer.take_counts())
+        self.assertGreater(first, 0)
+
+        # 変化がなければ描画しない
+        view.draw()
+        self.assertEqual(HeadlessRenderer.count_draw_calls(renderer.take_counts()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
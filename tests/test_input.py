@@ -30,6 +30,184 @@ class TestInput(unittest.TestCase):
         event.disconnect_all()
         self.assertFalse(event.process(param))
 
+    def test_input_queue(self):
+        queue = InputQueue()
+
+        def move(x: int) -> OperationParam:
+            return OperationParam(VirtualKey.MouseMove, InputState.Press, Position(x, 0))
+
+        press = OperationParam(VirtualKey.MouseLeft, InputState.Press, Position(2, 0))
+        release = OperationParam(VirtualKey.MouseLeft, InputState.Release, Position(2, 0))
+
+        # 連続するMouseMoveはまとめる
+        for param in [move(0), move(1), move(2), press, move(3), release, move(4), move(5)]:
+            queue.push(param)
+        self.assertEqual(len(queue), 5)
+        self.assertEqual(queue.merged_count, 3)
+
+        params = queue.drain()
+        self.assertEqual(
+            [(param.code, param.position.x) for param in params],
+            [(VirtualKey.MouseMove, 2), (VirtualKey.MouseLeft, 2), (VirtualKey.MouseMove, 3),
+             (VirtualKey.MouseLeft, 2), (VirtualKey.MouseMove, 5)])
+        self.assertTrue(params[1].is_press())
+        self.assertTrue(params[3].is_release())
+        self.assertEqual(len(queue), 0)
+
+    def test_input_queue_pool(self):
+        pool = create_param_pool()
+        queue = InputQueue(capacity=2, pool=pool)
+        received = []
+
+        def run_frame() -> None:
+            queue.push_event(VirtualKey.MouseMove, InputState.Press, Position(0, 0))
+            queue.push_event(VirtualKey.MouseMove, InputState.Press, Position(1, 0))
+            queue.push_event(VirtualKey.Space, InputState.Press)
+            queue.dispatch(lambda param: received.append((param.code, param.position)))
+
+        run_frame()
+        self.assertEqual(received, [(VirtualKey.MouseMove, Position(1, 0)), (VirtualKey.Space, None)])
+        self.assertEqual(queue.merged_count, 1)
+
+        # 処理し終えた入力は使い回す
+        for _ in range(10):
+            run_frame()
+        self.assertEqual(pool.stats.miss_count, 2)
+        self.assertEqual(pool.stats.high_water_mark, 2)
+        self.assertEqual(pool.stats.in_use, 0)
+
+        # あふれて捨てた入力もプールに返す
+        for code in (VirtualKey.A, VirtualKey.B, VirtualKey.C):
+            queue.push_event(code, InputState.Press)
+        self.assertEqual(queue.dropped_count, 1)
+        self.assertEqual(pool.stats.in_use, 2)
+
+        # コールバックが例外を投げても返却する
+        def fail(param: OperationParam) -> None:
+            raise RuntimeError('failed')
+
+        with self.assertRaises(RuntimeError):
+            queue.dispatch(fail)
+        self.assertEqual(pool.stats.in_use, 0)
+
+        # pushで積んだプールのものでない入力は返却しない
+        free_count = len(pool)
+        queue.push(OperationParam(VirtualKey.MouseMove, InputState.Press, Position(0, 0)))
+        queue.push(OperationParam(VirtualKey.MouseMove, InputState.Press, Position(1, 0)))
+        queue.dispatch(lambda param: None)
+        self.assertEqual(len(pool), free_count)
+
+        # drainで取り出したものはrelease_allで返却する
+        queue.push_event(VirtualKey.A, InputState.Press)
+        params = queue.drain()
+        self.assertEqual(pool.stats.in_use, 1)
+        queue.release_all(params)
+        self.assertEqual(pool.stats.in_use, 0)
+
+    def test_input_queue_push_event_merge(self):
+        # pushで積んだ入力は書き換えず、新しい入力で置き換える
+        for pool in (None, create_param_pool()):
+            queue = InputQueue(pool=pool)
+            pushed = OperationParam(VirtualKey.MouseMove, InputState.Press, Position(0, 0))
+            queue.push(pushed)
+            queue.push_event(VirtualKey.MouseMove, InputState.Press, Position(1, 0))
+            queue.push_event(VirtualKey.MouseMove, InputState.Press, Position(2, 0))
+            self.assertEqual(pushed.position, Position(0, 0))
+            self.assertEqual(queue.merged_count, 2)
+            received = []
+            queue.dispatch(lambda param: received.append(param.position))
+            self.assertEqual(received, [Position(2, 0)])
+            if pool is not None:
+                self.assertEqual(pool.stats.in_use, 0)
+
+    def test_input_queue_capacity(self):
+        queue = InputQueue(capacity=2)
+        for code in [VirtualKey.A, VirtualKey.B, VirtualKey.C]:
+            queue.push(OperationParam(code, InputState.Press))
+        self.assertEqual(queue.dropped_count, 1)
+
+        codes: list[VirtualKey] = []
+        self.assertEqual(queue.dispatch(lambda param: codes.append(param.code)), 2)
+        self.assertEqual(codes, [VirtualKey.B, VirtualKey.C])
+
+        queue.reset_counts()
+        self.assertEqual(queue.dropped_count, 0)
+
+    def test_key_subscription_index(self):
+        index = KeySubscriptionIndex()
+        index.add(VirtualKey.A, 'x')
+        index.add(VirtualKey.A, 'y')
+        index.add(VirtualKey.B, 'x')
+        self.assertEqual(set(index.get(VirtualKey.A)), {'x', 'y'})
+        self.assertEqual(len(index), 3)
+
+        index.remove(VirtualKey.A, 'x')
+        index.remove(VirtualKey.C, 'x')
+        self.assertEqual(set(index.get(VirtualKey.A)), {'y'})
+        self.assertEqual(set(index.items()), {(VirtualKey.A, 'y'), (VirtualKey.B, 'x')})
+
+        index.clear()
+        self.assertEqual(len(index.get(VirtualKey.A)), 0)
+
+    def test_input_snapshot(self):
+        snapshot = InputSnapshot()
+        snapshot.update([
+            OperationParam(VirtualKey.Left, InputState.Press),
+            OperationParam(VirtualKey.Space, InputState.Press),
+            OperationParam(VirtualKey.Space, InputState.Release),
+            OperationParam(VirtualKey.MouseMove, InputState.Press, Position(10, 20)),
+        ])
+        self.assertTrue(snapshot.is_down(VirtualKey.Left))
+        self.assertTrue(snapshot.pressed_this_frame(VirtualKey.Left))
+        # 同じフレームで押して離した
+        self.assertFalse(snapshot.is_down(VirtualKey.Space))
+        self.assertTrue(snapshot.pressed_this_frame(VirtualKey.Space))
+        self.assertTrue(snapshot.released_this_frame(VirtualKey.Space))
+        self.assertFalse(snapshot.is_down(VirtualKey.MouseMove))
+        self.assertEqual(snapshot.mouse_position, Position(10, 20))
+
+        # 次のフレームでは押され続けているだけ
+        snapshot.update([OperationParam(VirtualKey.Left, InputState.Repeat)])
+        self.assertTrue(snapshot.is_down(VirtualKey.Left))
+        self.assertFalse(snapshot.pressed_this_frame(VirtualKey.Left))
+        self.assertFalse(snapshot.released_this_frame(VirtualKey.Space))
+        self.assertTrue(snapshot.any_down(get_key_mask(VirtualKey.Left, VirtualKey.Right)))
+        self.assertFalse(snapshot.any_down(get_key_mask(VirtualKey.Up, VirtualKey.Down)))
+
+        snapshot.clear()
+        self.assertFalse(snapshot.is_down(VirtualKey.Left))
+        self.assertTrue(snapshot.released_this_frame(VirtualKey.Left))
+
+    def test_input_snapshot_listener(self):
+        pool = create_param_pool()
+        queue = InputQueue(pool=pool)
+        snapshot = InputSnapshot()
+        queue.add_listener(snapshot.update)
+
+        # 1フレーム分の入力をまとめて反映してから、プールに返却する
+        queue.push_event(VirtualKey.Left, InputState.Press)
+        queue.push_event(VirtualKey.MouseMove, InputState.Press, Position(10, 20))
+        queue.dispatch(lambda param: None)
+        self.assertTrue(snapshot.is_down(VirtualKey.Left))
+        self.assertTrue(snapshot.pressed_this_frame(VirtualKey.Left))
+        self.assertEqual(snapshot.mouse_position, Position(10, 20))
+        self.assertEqual(pool.stats.in_use, 0)
+
+        # 入力のないフレームでも更新される
+        queue.dispatch(lambda param: None)
+        self.assertTrue(snapshot.is_down(VirtualKey.Left))
+        self.assertFalse(snapshot.pressed_this_frame(VirtualKey.Left))
+
+        queue.push_event(VirtualKey.Left, InputState.Release)
+        queue.dispatch(lambda param: None)
+        self.assertFalse(snapshot.is_down(VirtualKey.Left))
+        self.assertTrue(snapshot.released_this_frame(VirtualKey.Left))
+
+        queue.remove_listener(snapshot.update)
+        queue.push_event(VirtualKey.Left, InputState.Press)
+        queue.dispatch(lambda param: None)
+        self.assertFalse(snapshot.is_down(VirtualKey.Left))
+
     @staticmethod
     def _on_input(param: OperationParam) -> bool:
         return True
@@ -0,0 +1,166 @@
+"""input_recordモジュールのテスト."""
+
+import unittest
+
+from headless import HeadlessRenderer, InstantImageLoader
+from input import *
+from input_record import *
+from model import GameModel
+from values import *
+from view import GameView
+
+
+class TestInputRecord(unittest.TestCase):
+
+    def _create_frames(self) -> list[list[OperationParam]]:
+        return [
+            [OperationParam(VirtualKey.MouseMove, InputState.Press, Position(10, 20))],
+            [],
+            [
+                OperationParam(VirtualKey.MouseLeft, InputState.Press, Position(20, 60)),
+                OperationParam(VirtualKey.MouseLeft, InputState.Release, Position(20, 60)),
+                OperationParam(VirtualKey.Space, InputState.Press),
+            ],
+            [],
+        ]
+
+    def test_bytes(self):
+        frames = self._create_frames()
+        for compress in (False, True):
+            log = InputLog(frames)
+            restored = InputLog.from_bytes(log.to_bytes(compress))
+            self.assertEqual(len(restored), 4)
+            self.assertEqual(restored.input_count, 4)
+            self.assertEqual(list(restored), frames)
+            self.assertEqual(restored.update_counts, [1, 1, 1, 1])
+            self.assertIsNone(restored.checksum)
+
+            # 更新回数とチェックサム
+            log = InputLog(frames, [0, 2, 1, 5], checksum=0x12345678)
+            restored = InputLog.from_bytes(log.to_bytes(compress))
+            self.assertEqual(restored.update_counts, [0, 2, 1, 5])
+            self.assertEqual(restored.checksum, 0x12345678)
+
+        with self.assertRaises(ValueError):
+            InputLog(frames, [1])
+        with self.assertRaises(ValueError):
+            InputLog.from_bytes(b'XXXX' + bytes(16))
+        with self.assertRaises(ValueError):
+            InputLog.from_bytes(InputLog(frames).to_bytes(compress=False)[:-1])
+
+        # フレーム番号がフレーム数を超える、状態が不明(ヘッダー18バイト、更新回数8バイトの後)
+        data = InputLog(frames).to_bytes(compress=False)
+        for (offset, value) in ((26, 99), (31, 0x7f)):
+            broken = bytearray(data)
+            broken[offset] = value
+            with self.assertRaises(ValueError):
+                InputLog.from_bytes(bytes(broken))
+
+        # 圧縮した本体が壊れている
+        broken = bytearray(InputLog(frames).to_bytes(compress=True))
+        broken[-1] ^= 0xff
+        with self.assertRaises(ValueError):
+            InputLog.from_bytes(bytes(broken))
+
+    def test_recorder(self):
+        received = []
+        recorder = InputRecorder()
+        for params in self._create_frames():
+            recorder.dispatch(params, received.append)
+        self.assertEqual(len(recorder), 4)
+        self.assertEqual(len(received), 4)
+        self.assertEqual(list(recorder.to_log()), self._create_frames())
+        self.assertEqual(recorder.to_log().update_counts, [0, 0, 0, 0])
+
+        # 更新は最後のフレームに数える
+        recorder.record_update(0.1)
+        recorder.record_update(0.1)
+        log = recorder.to_log(checksum=1)
+        self.assertEqual(log.update_counts, [0, 0, 0, 2])
+        self.assertEqual(log.checksum, 1)
+        recorder.clear()
+        recorder.record_update(0.1)
+        self.assertEqual(list(recorder.to_log()), [[]])
+        self.assertEqual(recorder.to_log().update_counts, [1])
+
+    def test_recorder_listener(self):
+        # 入力キューのリスナーとして、プールに返却される前にコピーして記録する
+        queue = InputQueue(pool=create_param_pool())
+        recorder = InputRecorder()
+        queue.add_listener(recorder.record_frame)
+        for params in self._create_frames():
+            for param in params:
+                queue.push_event(param.code, param.state, param.position)
+            queue.dispatch(lambda param: None)
+        self.assertEqual(list(recorder.to_log()), self._create_frames())
+
+    def test_replay(self):
+
+        def create_game() -> tuple[GameModel, GameView]:
+            model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None)
+            view = GameView(
+                model, HeadlessRenderer(), InstantImageLoader(['image.png']),
+                log_func=lambda mes: None)
+            return model, view
+
+        frames = self._create_frames() * 10
+        log = InputLog.from_bytes(InputLog(frames).to_bytes())
+
+        results = []
+        for _ in range(2):
+            (model, view) = create_game()
+            result = InputReplayer(log, view.operate, model.update, view.draw, step=0.1).run()
+            results.append((result[:4], model.time))
+
+        # 同じ記録からは同じ結果になる
+        self.assertEqual(results[0], results[1])
+        (counts, model_time) = results[0]
+        self.assertEqual(counts, (40, 40, 40, 40))
+        self.assertAlmostEqual(model_time, 4.0)
+
+    def test_replay_update_counts(self):
+        # 処理落ちしたフレームを含むプレイを記録する
+        model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None)
+        entity = model.entities.create(position=(0.0, 0.0), velocity=(0.0, 0.0))
+        positions = []
+
+        def operate(param: OperationParam) -> None:
+            # 入力した時点の位置を記録し、速度を変える
+            positions.append(model.entities.get(entity, 'position'))
+            model.entities.set(entity, 'velocity', (param.position.x, 0.0))
+
+        recorder = InputRecorder()
+        update_counts = [1, 0, 3, 1, 2, 0, 1]
+        for (frame, count) in enumerate(update_counts):
+            params = [OperationParam(VirtualKey.MouseMove, InputState.Press, Position(frame, 0))]
+            recorder.dispatch(params, operate)
+            for _ in range(count):
+                model.update(0.5)
+                recorder.record_update(0.5)
+        checksum = model.to_save_data().checksum
+        recorded_positions = positions
+        log = InputLog.from_bytes(recorder.to_log(checksum).to_bytes())
+
+        # 同じ回数だけ更新するので、入力は同じ更新の間に入り、同じ状態になる
+        model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None)
+        entity = model.entities.create(position=(0.0, 0.0), velocity=(0.0, 0.0))
+        positions = []
+        result = InputReplayer(
+            log, operate, model.update, lambda: None, step=0.5,
+            checksum=lambda: model.to_save_data().checksum).run()
+        self.assertEqual(result.update_count, sum(update_counts))
+        self.assertEqual(positions, recorded_positions)
+        self.assertEqual(result.checksum, checksum)
+        self.assertTrue(result.is_reproduced)
+
+        # 1フレーム1回として再生すると、違う状態になる
+        model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None)
+        entity = model.entities.create(position=(0.0, 0.0), velocity=(0.0, 0.0))
+        result = InputReplayer(
+            InputLog(list(log), checksum=checksum), operate, model.update, lambda: None, step=0.5,
+            checksum=lambda: model.to_save_data().checksum).run()
+        self.assertFalse(result.is_reproduced)
+
+
+if __name__ == '__main__':
+    unittest.main()
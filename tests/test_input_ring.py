@@ -0,0 +1,55 @@
+"""input_ringモジュールのテスト."""
+
+import unittest
+
+from input import *
+from input_ring import *
+from values import *
+
+
+class TestInputRing(unittest.TestCase):
+
+    def test_read_write(self):
+        ring = InputRingBuffer(capacity=4)
+        self.assertEqual(ring.capacity, 4)
+        self.assertEqual(ring.data.itemsize, 4)
+
+        ring.write(VirtualKey.MouseLeft, InputState.Press, Position(10, 20), timestamp=100)
+        ring.write(VirtualKey.A, InputState.Repeat)
+        self.assertEqual(len(ring), 2)
+
+        params = ring.read()
+        self.assertEqual(params, [
+            OperationParam(VirtualKey.MouseLeft, InputState.Press, Position(10, 20)),
+            OperationParam(VirtualKey.A, InputState.Repeat),
+        ])
+        self.assertEqual(len(ring), 0)
+        self.assertEqual(ring.read(), [])
+
+    def test_overflow(self):
+        ring = InputRingBuffer(capacity=2)
+        for code in [VirtualKey.A, VirtualKey.B, VirtualKey.C]:
+            ring.write(code, InputState.Press)
+        self.assertEqual(ring.dropped_count, 1)
+        self.assertEqual([param.code for param in ring.read()], [VirtualKey.A, VirtualKey.B])
+
+    def test_unknown_code(self):
+        ring = InputRingBuffer()
+        ring.data[HEADER_SIZE] = 9999
+        ring.data[HEADER_SIZE + 1] = InputState.Press.value
+        ring.data[HEADER_WRITE_INDEX] = 1
+        self.assertEqual(ring.read()[0].code, VirtualKey.Dummy)
+
+    def test_read_into(self):
+        ring = InputRingBuffer()
+        queue = InputQueue()
+        for x in range(3):
+            ring.write(VirtualKey.MouseMove, InputState.Press, Position(x, 0))
+        self.assertEqual(ring.read_into(queue), 3)
+        # キューに積む際にMouseMoveはまとめられる
+        self.assertEqual(queue.drain(), [
+            OperationParam(VirtualKey.MouseMove, InputState.Press, Position(2, 0))])
+
+
+if __name__ == '__main__':
+    unittest.main()
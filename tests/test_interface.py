@@ -0,0 +1,41 @@
+"""interfaceモジュールのテスト."""
+
+import unittest
+
+from interface import *
+
+
+class MockRenderer(AbstractRenderer):
+    """描画命令を記録するテスト用の描画クラス."""
+
+    def __init__(self):
+        self.calls = []
+
+    def draw_rect(self, rect: Rect, color: Color, fill=True) -> None:
+        self.calls.append(('rect', rect, color))
+
+    def draw_circle(self, center: tuple[int, int], radius: int, color: Color) -> None:
+        self.calls.append(('circle', center, radius, color))
+
+
+class TestInterface(unittest.TestCase):
+
+    def test_batch_fallback(self):
+        # 一括描画に対応していない描画クラスでは1つずつ描画する
+        renderer = MockRenderer()
+        red = Color(255, 0, 0)
+        blue = Color(0, 0, 255)
+        renderer.draw_rects([0, 0, 1, 2, 3, 4, 5, 6], red)
+        renderer.draw_circles([1, 2, 3], [blue])
+        self.assertEqual(renderer.calls, [
+            ('rect', Rect(Position(0, 0), Size(1, 2)), red),
+            ('rect', Rect(Position(3, 4), Size(5, 6)), red),
+            ('circle', (1, 2), 3, blue),
+        ])
+
+        with self.assertRaises(ValueError):
+            renderer.draw_rects([0, 0, 1], red)
+
+
+if __name__ == '__main__':
+    unittest.main()
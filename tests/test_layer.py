@@ -0,0 +1,71 @@
+"""layerモジュールのテスト."""
+
+import unittest
+
+from headless import HeadlessRenderer
+from interface import AbstractRenderer
+from layer import *
+from render_command import RenderOp
+from values import *
+
+
+class TestLayer(unittest.TestCase):
+
+    def test_draw(self):
+        renderer = HeadlessRenderer()
+        layers = LayerStack(renderer)
+        colors = {'back': Color(255, 0, 0), 'front': Color(0, 0, 255)}
+
+        def redraw(name: str):
+            return lambda r: r.draw_rect(Rect(Position(0, 0), Size(10, 10)), colors[name])
+
+        layers.add('back', redraw('back'))
+        layers.add('front', redraw('front'))
+        with self.assertRaises(ValueError):
+            layers.add('back', redraw('back'))
+
+        # 初回は全てのレイヤーを描画して重ね合わせる
+        self.assertTrue(layers.draw())
+        renderer.flush()
+        counts = renderer.take_counts()
+        self.assertEqual(counts[RenderOp.FillRect], 2)
+        self.assertEqual(counts[RenderOp.Image], 2)
+
+        # 変化がなければ何もしない
+        self.assertFalse(layers.draw())
+        self.assertEqual(len(renderer.take_counts()), 0)
+
+        # 変化したレイヤーだけ描き直す
+        layers.invalidate('front')
+        self.assertTrue(layers.draw())
+        renderer.flush()
+        counts = renderer.take_counts()
+        self.assertEqual(counts[RenderOp.FillRect], 1)
+        self.assertEqual(counts[RenderOp.Image], 2)
+        self.assertEqual([layer.redraw_count for layer in layers], [1, 2])
+
+        # 非表示のレイヤーは重ねない
+        layers.set_visible('front', False)
+        self.assertTrue(layers.draw())
+        renderer.flush()
+        self.assertEqual(renderer.take_counts()[RenderOp.Image], 1)
+
+    def test_offscreen_clear(self):
+        # オフスクリーンは透明にクリアする
+        offscreen = HeadlessRenderer().create_offscreen(Size(10, 10))
+        offscreen.clear()
+        offscreen.flush()
+        self.assertEqual(offscreen.take_counts()[RenderOp.EraseRect], 1)
+
+    def test_not_supported(self):
+        class Renderer(AbstractRenderer):
+            @property
+            def size(self) -> Size:
+                return Size(10, 10)
+
+        with self.assertRaises(RuntimeError):
+            LayerStack(Renderer()).add('layer', lambda r: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
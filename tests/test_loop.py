@@ -0,0 +1,119 @@
+"""loopモジュールのテスト."""
+
+import asyncio
+import unittest
+
+from loop import *
+
+
+class TestLoop(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = ManualClock()
+        self.deltas: list[float] = []
+        self.draw_count = 0
+        self.draw_cost = 0.0
+
+    def _update(self, delta: float) -> None:
+        self.deltas.append(delta)
+
+    def _draw(self) -> None:
+        self.draw_count += 1
+        self.clock.advance(self.draw_cost)
+
+    def _create_loop(self, **kwargs) -> GameLoop:
+        return GameLoop(self.clock, self._update, self._draw, step=0.1, **kwargs)
+
+    def test_manual_clock(self):
+        clock = ManualClock(1.0)
+        clock.advance(0.5)
+        self.assertAlmostEqual(clock.now(), 1.5)
+        with self.assertRaises(ValueError):
+            clock.advance(-1)
+
+    def test_fixed_step(self):
+        loop = self._create_loop()
+
+        # 初回は時間が経過していないので更新しない
+        self.assertAlmostEqual(loop.tick(), 0.1)
+        self.assertEqual(self.deltas, [])
+        self.assertEqual(self.draw_count, 1)
+
+        # 0.25秒経過 -> 2回更新、端数は持ち越し
+        self.clock.advance(0.25)
+        sleep = loop.tick()
+        self.assertEqual(self.deltas, [0.1, 0.1])
+        self.assertAlmostEqual(loop.accumulator, 0.05)
+        self.assertAlmostEqual(sleep, 0.05)
+
+    def test_slow_draw(self):
+        # 描画が遅くてもデルタは一定で、ゲーム時間は実時間に追従する
+        self.draw_cost = 0.15
+        loop = self._create_loop()
+        for _ in range(20):
+            self.clock.advance(loop.tick())
+        self.assertTrue(all(delta == 0.1 for delta in self.deltas))
+
+        now = self.clock.now()
+        self.draw_cost = 0.0
+        loop.tick()
+        game_time = sum(self.deltas) + loop.accumulator + loop.dropped_time
+        self.assertAlmostEqual(game_time, now, places=6)
+        self.assertGreater(loop.skipped_draw_count, 0)
+
+    def test_clamp(self):
+        loop = self._create_loop(max_steps=3)
+        loop.tick()
+        self.clock.advance(1.0)
+        loop.tick()
+        self.assertEqual(len(self.deltas), 3)
+        self.assertAlmostEqual(loop.dropped_time, 0.7)
+        self.assertLess(loop.accumulator, loop.step)
+
+    def test_skip_draw(self):
+        self.draw_cost = 0.5
+        loop = self._create_loop(max_skip_draws=2)
+        loop.tick()
+        for _ in range(6):
+            loop.tick()
+        # 連続で省略するのはmax_skip_draws回まで
+        self.assertEqual(loop.draw_count, 3)
+        self.assertEqual(loop.skipped_draw_count, 4)
+
+    def test_run(self):
+        loop = self._create_loop()
+
+        def update(delta: float) -> None:
+            self.deltas.append(delta)
+            if len(self.deltas) >= 10:
+                loop.stop()
+
+        loop._update = update
+        asyncio.run(loop.run(self.clock.sleep))
+        self.assertEqual(len(self.deltas), 10)
+        # 停止したフレームの待機分を含む
+        self.assertAlmostEqual(self.clock.now(), 1.1)
+
+    def test_process_input(self):
+        calls: list[str] = []
+        loop = GameLoop(
+            self.clock,
+            lambda delta: calls.append('update'),
+            lambda: calls.append('draw'),
+            step=0.1,
+            process_input=lambda: calls.append('input'))
+        loop.tick()
+        self.clock.advance(0.2)
+        loop.tick()
+        # 入力はフレームの最初に1回だけ処理する
+        self.assertEqual(calls, ['input', 'draw', 'input', 'update', 'update', 'draw'])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            GameLoop(None, self._update, self._draw)
+        with self.assertRaises(ValueError):
+            GameLoop(self.clock, self._update, self._draw, step=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
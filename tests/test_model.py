@@ -1,12 +1,22 @@
 """modelモジュールのテスト."""
 
+import base64
 import unittest
+from unittest import mock
+
+import model as model_module
 
 from input import *
 from model import *
 from values import *
 
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
 class MockRepository(AbstractRepository):
     """テスト用のモックリポジトリ."""
 
@@ -42,6 +52,190 @@ class TestModel(unittest.TestCase):
         model.update(1.0)
         self.assertAlmostEqual(model.time, 1.0)
 
+    def test_entity_store(self):
+        store = EntityStore()
+        store.register(POSITION)
+        store.register(VELOCITY)
+        with self.assertRaises(ValueError):
+            store.register(POSITION)
+
+        a = store.create(position=(0, 0), velocity=(1, 2))
+        b = store.create(position=(10, 10))
+        c = store.create(position=(20, 20), velocity=(3, 4))
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.get(c, 'velocity'), (3, 4))
+        with self.assertRaises(ValueError):
+            store.create(health=(1,))
+
+        # 同じ組み合わせのエンティティは同じ列に並ぶ
+        archetypes = list(store.query('position', 'velocity'))
+        self.assertEqual(len(archetypes), 1)
+        self.assertEqual(list(archetypes[0].entities), [a, c])
+        self.assertEqual(len(list(store.query('position'))), 2)
+
+        # 削除すると最後の行が詰められる
+        store.destroy(a)
+        self.assertFalse(store.is_alive(a))
+        self.assertEqual(list(archetypes[0].entities), [c])
+        self.assertEqual(store.get(c, 'position'), (20, 20))
+        with self.assertRaises(ValueError):
+            store.get(a, 'position')
+
+        # 添え字は再利用するが、世代が変わるのでIDは別になる
+        d = store.create(position=(5, 5), velocity=(0, 0))
+        self.assertNotEqual(d, a)
+        self.assertEqual(d & ENTITY_INDEX_MASK, a & ENTITY_INDEX_MASK)
+        self.assertFalse(store.is_alive(a))
+        self.assertTrue(store.is_alive(b))
+
+        store.set(d, 'velocity', (1, 1))
+        self.assertEqual(store.get(d, 'velocity'), (1, 1))
+        self.assertEqual((store.stats.miss_count, store.stats.reuse_count), (3, 1))
+
+        # 値の数が合わなければ生成しない
+        with self.assertRaises(ValueError):
+            store.create(position=(1,))
+        self.assertEqual(len(store), 3)
+
+    def test_system(self):
+        model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None)
+        moving = model.entities.create(position=(0, 0), velocity=(10, 20))
+        still = model.entities.create(position=(5, 5))
+
+        deltas = []
+        model.add_system(lambda entities, delta: deltas.append(delta))
+        model.update(0.5)
+        self.assertEqual(model.entities.get(moving, 'position'), (5, 10))
+        self.assertEqual(model.entities.get(still, 'position'), (5, 5))
+        self.assertEqual(deltas, [0.5])
+
+    def _check_move_system(self) -> None:
+        """列全体を、列を置き換えずにその場で更新する."""
+        store = EntityStore()
+        store.register(POSITION)
+        store.register(VELOCITY)
+        entities = [store.create(position=(i, -i), velocity=(i * 2, 1)) for i in range(100)]
+        (archetype,) = store.query('position', 'velocity')
+        columns = archetype.columns['position']
+
+        move_system(store, 0.5)
+        self.assertIs(archetype.columns['position'], columns)
+        self.assertEqual(store.get(entities[10], 'position'), (20.0, -9.5))
+
+        # 更新の後も列に追加、削除できる
+        entity = store.create(position=(0, 0), velocity=(2, 2))
+        store.destroy(entities[0])
+        move_system(store, 1.0)
+        self.assertEqual(store.get(entity, 'position'), (2.0, 2.0))
+
+    def test_move_system_fallback(self):
+        with mock.patch.object(model_module, 'numpy', None):
+            self._check_move_system()
+
+    @unittest.skipUnless(numpy is not None, 'numpy is not installed')
+    def test_move_system_numpy(self):
+        with mock.patch.object(model_module, 'numpy', numpy):
+            self._check_move_system()
+
+    def test_save_data(self):
+        repository = MockRepository()
+        model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None, repository=repository)
+        moving = model.entities.create(position=(0, 0), velocity=(10, 20))
+        still = [model.entities.create(position=(i, i)) for i in range(100)]
+        model.entities.destroy(still.pop())
+        model.update(0.5)
+
+        # 最初は全体を書き込む
+        model.save()
+        base = repository.data[SAVE_KEY]
+        self.assertEqual(repository.data[SAVE_DELTA_KEY], '')
+
+        # 次は動いたアーキタイプだけを差分で書き込む
+        model.update(0.5)
+        model.save()
+        self.assertEqual(repository.data[SAVE_KEY], base)
+        delta = SaveData.from_bytes(base64.b64decode(repository.data[SAVE_DELTA_KEY]), model._save_base)
+        self.assertEqual(
+            delta.get_changed_sections(model._save_base),
+            ([MODEL_SECTION, 'archetype/position,velocity'], []))
+
+        # 別のモデルに読み込む
+        loaded = GameModel(world_size=Size(600, 400), log_func=lambda mes: None, repository=repository)
+        loaded.load()
+        self.assertAlmostEqual(loaded.time, 1.0)
+        self.assertEqual(loaded.tick, 2)
+        self.assertEqual(loaded.entities.get(moving, 'position'), (10, 20))
+        self.assertEqual(loaded.entities.get(still[5], 'position'), (5, 5))
+        self.assertEqual(len(loaded.entities), len(model.entities))
+
+        # 削除した添え字の再利用も同じになる
+        self.assertEqual(
+            loaded.entities.create(position=(0, 0)),
+            model.entities.create(position=(0, 0)))
+
+        # 壊れたセーブデータでは今の状態を変えない
+        save_data = model.to_save_data()
+        sections = dict(save_data.items())
+        sections['archetype/position'] = sections['archetype/position'][:-1]
+        with self.assertRaises(ValueError):
+            loaded.restore(SaveData(sections))
+        self.assertEqual(loaded.entities.get(still[5], 'position'), (5, 5))
+
+        # モデルのセクションが壊れていれば、エンティティも置き換えない
+        model.update(0.5)
+        sections = dict(model.to_save_data().items())
+        sections[MODEL_SECTION] = sections[MODEL_SECTION][:-1]
+        with self.assertRaises(ValueError):
+            loaded.restore(SaveData(sections))
+        self.assertAlmostEqual(loaded.time, 1.0)
+        self.assertEqual(loaded.entities.get(moving, 'position'), (10, 20))
+
+    def test_load_broken(self):
+        repository = MockRepository()
+        model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None, repository=repository)
+        entity = model.entities.create(position=(0, 0), velocity=(10, 20))
+        for i in range(100):
+            model.entities.create(position=(i, i))
+        model.update(0.5)
+        model.save()
+        model.update(0.5)
+        model.save()
+        base = repository.data[SAVE_KEY]
+        delta = repository.data[SAVE_DELTA_KEY]
+        self.assertNotEqual(delta, '')
+
+        def flip(text: str) -> str:
+            data = bytearray(base64.b64decode(text))
+            data[-1] ^= 0xff
+            return base64.b64encode(bytes(data)).decode('ascii')
+
+        def create_loaded() -> tuple[GameModel, list[str]]:
+            logs = []
+            loaded = GameModel(world_size=Size(600, 400), log_func=logs.append, repository=repository)
+            loaded.time = 3.0
+            return loaded, logs
+
+        # 全体が壊れていれば、今の状態を変えずにログに出す
+        for broken in (flip(base), 'not base64!'):
+            repository.data[SAVE_KEY] = broken
+            (loaded, logs) = create_loaded()
+            loaded.load()
+            self.assertAlmostEqual(loaded.time, 3.0)
+            self.assertEqual(len(loaded.entities), 0)
+            self.assertIsNone(loaded._save_base)
+            self.assertIn('Save data is broken', logs[-1])
+
+        # 差分だけが壊れていれば、基にしたセーブデータを読み込む
+        repository.data[SAVE_KEY] = base
+        for broken in (flip(delta), 'not base64!'):
+            repository.data[SAVE_DELTA_KEY] = broken
+            (loaded, logs) = create_loaded()
+            loaded.load()
+            self.assertAlmostEqual(loaded.time, 0.5)
+            self.assertEqual(loaded.entities.get(entity, 'position'), (5, 10))
+            self.assertIsNotNone(loaded._save_base)
+            self.assertIn('Save delta is broken', logs[-1])
+
 
 if __name__ == '__main__':
     unittest.main()
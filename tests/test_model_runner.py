@@ -0,0 +1,143 @@
+"""model_runnerモジュールのテスト."""
+
+import time
+import unittest
+from unittest import mock
+
+from model import *
+from model_runner import *
+from values import *
+
+
+def _wait_until(predicate: tp.Callable[[], bool], timeout: float = 5.0) -> bool:
+    """条件を満たすまで待つ."""
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+class TestModelRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None)
+        self.entity = self.model.entities.create(position=(0.0, 0.0), velocity=(30.0, 0.0))
+
+    def test_in_thread(self):
+        runner = InThreadModelRunner(self.model)
+        first = runner.snapshot
+        runner.update(0.5)
+        runner.update(0.5)
+
+        snapshot = runner.snapshot
+        self.assertEqual(snapshot.tick, 2)
+        self.assertAlmostEqual(snapshot.time, 1.0)
+        self.assertEqual(list(snapshot.entities), [self.entity])
+        self.assertAlmostEqual(snapshot.xs[0], 30.0)
+        # 公開済みのスナップショットは変わらない
+        self.assertEqual(first.tick, 0)
+        self.assertAlmostEqual(first.xs[0], 0.0)
+
+        def reset_time(model: GameModel) -> None:
+            model.time = 0.0
+
+        runner.post(reset_time)
+        self.assertAlmostEqual(runner.snapshot.time, 0.0)
+
+    def test_in_thread_lazy_snapshot(self):
+        runner = InThreadModelRunner(self.model)
+        with mock.patch.object(self.model, 'create_snapshot', wraps=self.model.create_snapshot) as create:
+            # 読まれるまではスナップショットを作らない
+            for _ in range(10):
+                runner.update(0.5)
+            self.assertAlmostEqual(runner.time, 5.0)
+            self.assertEqual(create.call_count, 0)
+
+            # 次の更新までは同じスナップショット
+            snapshot = runner.snapshot
+            self.assertIs(runner.snapshot, snapshot)
+            self.assertEqual(snapshot.tick, 10)
+            self.assertEqual(create.call_count, 1)
+
+    def test_create_snapshot_reuse(self):
+        snapshot = self.model.create_snapshot()
+        others = [self.model.entities.create(position=(i, i)) for i in range(1, 4)]
+        self.model.update(0.5)
+
+        # 増えた分は伸ばす
+        reused = self.model.create_snapshot(reuse=snapshot)
+        self.assertIs(reused, snapshot)
+        self.assertEqual(reused.tick, 1)
+        self.assertEqual(sorted(reused.entities), sorted([self.entity] + others))
+        expected = self.model.create_snapshot()
+        self.assertEqual(list(reused.entities), list(expected.entities))
+        self.assertEqual(list(reused.xs), list(expected.xs))
+        self.assertEqual(list(reused.ys), list(expected.ys))
+
+        # 減った分は縮める
+        for entity in others:
+            self.model.entities.destroy(entity)
+        self.model.create_snapshot(reuse=snapshot)
+        self.assertEqual(list(snapshot.entities), [self.entity])
+        self.assertEqual(len(snapshot.xs), 1)
+        self.assertAlmostEqual(snapshot.xs[0], 15.0)
+
+    def test_threaded_double_buffer(self):
+        runner = ThreadedModelRunner(self.model, step=0.001)
+        # スレッドを起動せずに公開だけを繰り返す。2つを交互に使い回す
+        buffers = set()
+        for i in range(4):
+            self.model.update(0.5)
+            runner._publish()
+            buffers.add(id(runner.snapshot))
+            self.assertEqual(runner.snapshot.tick, i + 1)
+            self.assertAlmostEqual(runner.time, (i + 1) * 0.5)
+            self.assertAlmostEqual(runner.snapshot.xs[0], (i + 1) * 15.0)
+        self.assertEqual(len(buffers), 2)
+
+    def test_threaded(self):
+        runner = ThreadedModelRunner(self.model, step=0.001)
+        runner.start()
+        try:
+            with self.assertRaises(RuntimeError):
+                runner.start()
+            self.assertTrue(_wait_until(lambda: runner.snapshot.tick >= 10))
+
+            # 描画側はスナップショットを読むだけ。位置と時間は同じ更新のもの
+            snapshot = runner.snapshot
+            self.assertAlmostEqual(snapshot.xs[0], snapshot.time * 30.0)
+
+            # 操作は更新側のスレッドで実行される
+            threads = []
+            runner.post(lambda model: threads.append(threading.current_thread()))
+            self.assertTrue(_wait_until(lambda: threads))
+            self.assertIsNot(threads[0], threading.current_thread())
+            runner.update(0.001)
+        finally:
+            runner.stop(timeout=5.0)
+        self.assertFalse(runner.is_running)
+
+        # 止めた後は更新されない
+        tick = self.model.tick
+        time.sleep(0.01)
+        self.assertEqual(self.model.tick, tick)
+        self.assertEqual(runner.snapshot.tick, tick)
+
+    def test_threaded_error(self):
+        runner = ThreadedModelRunner(self.model, step=0.001)
+
+        def fail(model: GameModel) -> None:
+            raise ValueError('failed')
+
+        runner.post(fail)
+        runner.start()
+        self.assertTrue(_wait_until(lambda: not runner.is_running))
+        with self.assertRaises(RuntimeError):
+            runner.update(0.001)
+        runner.stop(timeout=5.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""poolモジュールのテスト."""
+
+import unittest
+
+from pool import *
+
+
+class Item:
+
+    def __init__(self):
+        self.value = None
+
+
+class TestPool(unittest.TestCase):
+
+    def test_pool(self):
+        resets = []
+
+        def reset(item: Item) -> None:
+            item.value = None
+            resets.append(item)
+
+        pool = ObjectPool(Item, reset, capacity=2)
+        a = pool.acquire()
+        a.value = 1
+        b = pool.acquire()
+        self.assertEqual(pool.stats.miss_count, 2)
+        self.assertEqual(pool.stats.in_use, 2)
+
+        # 返却したものを使い回す
+        pool.release(a)
+        self.assertIsNone(a.value)
+        self.assertEqual(resets, [a])
+        self.assertIs(pool.acquire(), a)
+        self.assertEqual(pool.stats.reuse_count, 1)
+        self.assertAlmostEqual(pool.stats.reuse_ratio, 1 / 3)
+
+        # 最大数を超えて返却されたものは捨てる
+        c = pool.acquire()
+        pool.release_all([a, b, c])
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(pool.stats.high_water_mark, 3)
+        self.assertEqual(pool.stats.in_use, 0)
+
+        pool.stats.reset_counts()
+        self.assertEqual((pool.stats.acquire_count, pool.stats.high_water_mark), (0, 0))
+
+    def test_release_guard(self):
+        pool = ObjectPool(Item)
+        a = pool.acquire()
+        self.assertTrue(pool.is_in_use(a))
+        pool.release(a)
+        self.assertFalse(pool.is_in_use(a))
+
+        # 二重の返却と、取り出していないものの返却はできない
+        with self.assertRaises(ValueError):
+            pool.release(a)
+        with self.assertRaises(ValueError):
+            pool.release(Item())
+        self.assertEqual(len(pool), 1)
+        self.assertIsNot(pool.acquire(), pool.acquire())
+
+    def test_prefill(self):
+        pool = ObjectPool(Item, capacity=4)
+        pool.prefill(10)
+        self.assertEqual(len(pool), 4)
+        for _ in range(4):
+            pool.acquire()
+        self.assertEqual(pool.stats.miss_count, 0)
+        self.assertAlmostEqual(pool.stats.reuse_ratio, 1.0)
+
+        with self.assertRaises(ValueError):
+            ObjectPool(Item, capacity=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""rect_arrayモジュールのテスト."""
+
+import unittest
+from unittest import mock
+
+import rect_array
+from rect_array import *
+from values import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class RectArrayTests:
+    """numpyの有無それぞれで実行するテスト."""
+
+    #: rect_arrayモジュールに使わせるnumpy。Noneならリストで持つ
+    NUMPY = None
+
+    def setUp(self):
+        patcher = mock.patch.object(rect_array, 'numpy', self.NUMPY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_position_array(self):
+        positions = PositionArray([Position(1, 2), Position(3, 4)])
+        self.assertEqual(len(positions), 2)
+        self.assertEqual(positions[1], Position(3, 4))
+        positions.translate(10, 20)
+        self.assertEqual(positions.to_positions(), [Position(11, 22), Position(13, 24)])
+
+        with self.assertRaises(ValueError):
+            PositionArray.from_columns([1, 2], [3])
+
+    def test_rect_array(self):
+        rects = [Rect(Position(x * 20, y * 20), Size(10, 10)) for x in range(5) for y in range(5)]
+        array = RectArray(rects)
+        self.assertEqual(len(array), 25)
+        self.assertEqual(array[3], rects[3])
+        self.assertEqual(array.to_rects(), rects)
+
+        # 1件ずつ判定した場合と一致する
+        point = Position(30, 50)
+        self.assertEqual(
+            list(array.contains_point(point)),
+            [int(rect.contains_point(point)) for rect in rects])
+        region = Rect(Position(15, 15), Size(30, 30))
+        self.assertEqual(
+            list(array.intersects_rect(region)),
+            [int(rect.intersects_with_rect(region)) for rect in rects])
+
+        others = RectArray([region, Rect(Position(100, 100), Size(5, 5))])
+        masks = array.intersects(others)
+        self.assertEqual(len(masks), 25)
+        self.assertEqual(
+            [list(mask) for mask in masks],
+            [[int(rect.intersects_with_rect(other)) for other in others.to_rects()] for rect in rects])
+
+        points = PositionArray([rect.center for rect in rects])
+        self.assertEqual(count_mask(array.contains_points(points)), 25)
+        points.translate(100, 0)
+        self.assertEqual(count_mask(array.contains_points(points)), 0)
+        self.assertEqual(count_mask(array.intersects_rect(region)), 4)
+
+    def test_translate(self):
+        array = RectArray.from_columns([0, 10], [0, 10], [5, 5], [5, 5])
+        array.translate(1, 2)
+        self.assertEqual(array[1], Rect(Position(11, 12), Size(5, 5)))
+
+        array.translate_each(PositionArray([Position(1, 0), Position(0, 1)]))
+        self.assertEqual(array.to_rects(), [
+            Rect(Position(2, 2), Size(5, 5)),
+            Rect(Position(11, 13), Size(5, 5)),
+        ])
+        with self.assertRaises(ValueError):
+            array.translate_each(PositionArray())
+
+
+class TestRectArray(RectArrayTests, unittest.TestCase):
+    NUMPY = None
+
+
+@unittest.skipUnless(numpy is not None, 'numpy is not installed')
+class TestRectArrayNumpy(RectArrayTests, unittest.TestCase):
+    NUMPY = numpy
+
+
+if __name__ == '__main__':
+    unittest.main()
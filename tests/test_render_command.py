@@ -0,0 +1,234 @@
+"""render_commandモジュールのテスト."""
+
+import unittest
+
+from array import array
+
+from render_command import *
+from text_cache import TextSurface, TextSurfaceCache
+from values import *
+
+
+class MockRecordingRenderer(CommandRecordingRenderer):
+    """実行したコマンドを保持するテスト用の描画クラス."""
+
+    def __init__(self, sort_by_state: bool = False, text_cache: TextSurfaceCache = None, cull: bool = False):
+        super().__init__(
+            Size(600, 400),
+            sort_by_state=sort_by_state,
+            text_cache=text_cache,
+            cull=cull)
+        self.executed: list[tuple[RenderOp, tuple[float, ...]]] = []
+        self.strings: list[str] = []
+
+    def execute(self, buffer: RenderCommandBuffer) -> None:
+        self.executed = list(buffer.iter_commands())
+        self.strings = list(buffer.strings)
+
+
+class TestRenderCommand(unittest.TestCase):
+
+    def test_buffer(self):
+        buffer = RenderCommandBuffer()
+        self.assertEqual(buffer.string_id('a'), 0)
+        self.assertEqual(buffer.string_id('b'), 1)
+        self.assertEqual(buffer.string_id('a'), 0)
+
+        image = object()
+        self.assertEqual(buffer.image_id(image), 0)
+        self.assertEqual(buffer.image_id(image), 0)
+
+        buffer.push(RenderOp.FillRect, 1, 2, 3, 4)
+        buffer.push(RenderOp.Circle, 5, 6, 7)
+        self.assertEqual(
+            list(buffer.iter_commands()),
+            [(RenderOp.FillRect, (1, 2, 3, 4)), (RenderOp.Circle, (5, 6, 7))])
+
+        buffer.reset()
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.strings, [])
+        self.assertEqual(buffer.images, [])
+
+    def test_recording_renderer(self):
+        renderer = MockRecordingRenderer()
+        renderer.clear()
+        renderer.draw_rect(Rect(Position(1, 2), Size(3, 4)), Color(255, 0, 0))
+        renderer.draw_rect(Rect(Position(1, 2), Size(3, 4)), Color(255, 0, 0), fill=False)
+        renderer.draw_line((0, 0), (10, 20), Color(0, 255, 0))
+        renderer.draw_circle((5, 6), 7, Color(0, 0, 255))
+        renderer.draw_image(object(), Position(8, 9), Size(32, 32))
+        renderer.draw_text('text', (10, 20), Font(10, 'serif', bold=True), Color(0, 0, 0))
+
+        # flushするまでは実行されない
+        self.assertEqual(renderer.executed, [])
+        renderer.flush()
+        self.assertEqual(len(renderer.buffer), 0)
+
+        ops = [op for (op, _) in renderer.executed]
+        self.assertEqual(ops, [
+            RenderOp.Clear,
+            RenderOp.SetFillStyle, RenderOp.FillRect,
+            RenderOp.SetStrokeStyle, RenderOp.StrokeRect,
+            RenderOp.SetStrokeStyle, RenderOp.Line,
+            RenderOp.SetFillStyle, RenderOp.Circle,
+            RenderOp.Image,
+            RenderOp.SetFont, RenderOp.SetFillStyle, RenderOp.Text,
+        ])
+
+        (op, args) = renderer.executed[-1]
+        self.assertEqual(renderer.strings[int(args[0])], 'text')
+        self.assertEqual(args[1:], (10, 20))
+        (op, args) = renderer.executed[-3]
+        self.assertEqual(renderer.strings[int(args[0])], '10px bold serif')
+        (op, args) = renderer.executed[1]
+        self.assertEqual(renderer.strings[int(args[0])], 'rgb(255,0,0)')
+
+    def test_redundant_state(self):
+        renderer = MockRecordingRenderer()
+        color = Color(255, 255, 255)
+        for i in range(3):
+            renderer.draw_rect(Rect(Position(0, i * 10), Size(5, 5)), color)
+        renderer.flush()
+        ops = [op for (op, _) in renderer.executed]
+        self.assertEqual(ops, [RenderOp.SetFillStyle] + [RenderOp.FillRect] * 3)
+        self.assertEqual(renderer.state.saved_count, 2)
+
+        # 状態はフレームをまたいで引き継がれる
+        renderer.draw_rect(Rect(Position(0, 0), Size(5, 5)), color)
+        renderer.flush()
+        ops = [op for (op, _) in renderer.executed]
+        self.assertEqual(ops, [RenderOp.FillRect])
+
+    def test_sort_by_state(self):
+        white = Color(255, 255, 255)
+        black = Color(0, 0, 0)
+
+        def draw(renderer: MockRecordingRenderer) -> list[RenderOp]:
+            # 重ならない白黒の矩形を交互に描画
+            for i in range(4):
+                color = white if i % 2 == 0 else black
+                renderer.draw_rect(Rect(Position(i * 10, 0), Size(5, 5)), color)
+            renderer.flush()
+            return [op for (op, _) in renderer.executed]
+
+        renderer = MockRecordingRenderer()
+        self.assertEqual(draw(renderer).count(RenderOp.SetFillStyle), 4)
+
+        renderer = MockRecordingRenderer(sort_by_state=True)
+        self.assertEqual(draw(renderer).count(RenderOp.SetFillStyle), 2)
+        self.assertEqual(renderer.state.saved_count, 2)
+
+    def test_sort_by_state_overlap(self):
+        # 重なる命令は追い越さない
+        renderer = MockRecordingRenderer(sort_by_state=True)
+        renderer.draw_rect(Rect(Position(0, 0), Size(10, 10)), Color(255, 255, 255))
+        renderer.draw_rect(Rect(Position(5, 5), Size(10, 10)), Color(0, 0, 0))
+        renderer.draw_rect(Rect(Position(8, 8), Size(10, 10)), Color(255, 255, 255))
+        renderer.flush()
+        rects = [args for (op, args) in renderer.executed if op == RenderOp.FillRect]
+        self.assertEqual(rects, [(0, 0, 10, 10), (5, 5, 10, 10), (8, 8, 10, 10)])
+
+    def test_image_rect(self):
+        renderer = MockRecordingRenderer()
+        renderer.draw_image(
+            object(), Position(8, 9), Size(32, 32),
+            src_rect=Rect(Position(1, 2), Size(16, 16)))
+        renderer.flush()
+        self.assertEqual(renderer.executed, [(RenderOp.ImageRect, (0, 1, 2, 16, 16, 8, 9, 32, 32))])
+
+    def test_batch(self):
+        renderer = MockRecordingRenderer()
+        red = Color(255, 0, 0)
+        renderer.draw_rects(array('i', [0, 0, 1, 1, 2, 2, 1, 1]), red)
+        renderer.draw_lines([0, 0, 1, 1], red)
+        renderer.draw_circles(array('d', [5, 5, 2]), red)
+        renderer.draw_images('image', array('f', [0, 0, 8, 8, 8, 0, 8, 8]))
+        renderer.flush()
+        self.assertEqual(renderer.executed, [
+            (RenderOp.SetFillStyle, (0,)),
+            (RenderOp.FillRects, (2, 0, 0, 1, 1, 2, 2, 1, 1)),
+            (RenderOp.SetStrokeStyle, (0,)),
+            (RenderOp.Lines, (1, 0, 0, 1, 1)),
+            (RenderOp.Circles, (1, 5, 5, 2)),
+            (RenderOp.Images, (0, 2, 0, 0, 8, 8, 8, 0, 8, 8)),
+        ])
+
+        with self.assertRaises(ValueError):
+            renderer.draw_rects([0, 0, 1], red)
+
+    def test_batch_colors(self):
+        # 色が変わる所で区切る
+        renderer = MockRecordingRenderer()
+        red = Color(255, 0, 0)
+        blue = Color(0, 0, 255)
+        renderer.draw_circles([0, 0, 1, 1, 1, 1, 2, 2, 1], [red, red, blue])
+        renderer.flush()
+        ops = [(op, args[0]) for (op, args) in renderer.executed]
+        self.assertEqual(ops, [
+            (RenderOp.SetFillStyle, 0), (RenderOp.Circles, 2),
+            (RenderOp.SetFillStyle, 1), (RenderOp.Circles, 1),
+        ])
+
+        with self.assertRaises(ValueError):
+            renderer.draw_circles([0, 0, 1], [red, blue])
+
+    def test_batch_sort_by_state(self):
+        white = Color(255, 255, 255)
+        black = Color(0, 0, 0)
+        renderer = MockRecordingRenderer(sort_by_state=True)
+        renderer.draw_rects([0, 0, 5, 5, 10, 0, 5, 5], white)
+        renderer.draw_rects([0, 100, 5, 5], black)
+        renderer.draw_rects([100, 100, 5, 5], white)
+        # 黒と重なる白は追い越さない
+        renderer.draw_rects([0, 100, 5, 5], white)
+        renderer.flush()
+        ops = [(op, args[0]) for (op, args) in renderer.executed]
+        self.assertEqual(ops, [
+            (RenderOp.SetFillStyle, 0), (RenderOp.FillRects, 2), (RenderOp.FillRects, 1),
+            (RenderOp.SetFillStyle, 1), (RenderOp.FillRects, 1),
+            (RenderOp.SetFillStyle, 0), (RenderOp.FillRects, 1),
+        ])
+
+    def test_cull(self):
+        renderer = MockRecordingRenderer(cull=True)
+        color = Color(255, 0, 0)
+        renderer.draw_rect(Rect(Position(10, 10), Size(10, 10)), color)
+        renderer.draw_rect(Rect(Position(-20, 10), Size(10, 10)), color)
+        renderer.draw_circle((700, 100), 50, color)
+        renderer.draw_text('text', (100, 500), Font(10, 'serif'), color)
+        # 一括描画は全体が画面外の時だけ省略する
+        renderer.draw_rects([-20, 0, 5, 5, 10, 0, 5, 5], color)
+        renderer.draw_rects([-20, 0, 5, 5, -40, 0, 5, 5], color)
+        renderer.flush()
+
+        ops = [op for (op, _) in renderer.executed]
+        self.assertEqual(ops, [RenderOp.SetFillStyle, RenderOp.FillRect, RenderOp.FillRects])
+        self.assertEqual(renderer.culler.last_culled_count, 4)
+        self.assertEqual(renderer.culler.last_drawn_count, 2)
+        self.assertEqual(renderer.culler.culled_count, 0)
+
+    def test_cached_text(self):
+        cache = TextSurfaceCache(lambda text, font, color: TextSurface(text, 50, 12, 10))
+        renderer = MockRecordingRenderer(text_cache=cache)
+        for _ in range(2):
+            renderer.draw_text('abc', (10, 20), Font(10, 'serif'), Color(0, 0, 0), cached=True)
+            renderer.flush()
+            # 文字列ではなく画像として描画する
+            self.assertEqual(renderer.executed, [(RenderOp.Image, (0, 10, 10, 50, 12))])
+        self.assertEqual(cache.miss_count, 1)
+        self.assertEqual(cache.hit_count, 1)
+
+        # キャッシュがなければ文字列を描画する
+        renderer = MockRecordingRenderer()
+        renderer.draw_text('abc', (10, 20), Font(10, 'serif'), Color(0, 0, 0), cached=True)
+        renderer.flush()
+        self.assertIn(RenderOp.Text, [op for (op, _) in renderer.executed])
+
+    def test_flush_empty(self):
+        renderer = MockRecordingRenderer()
+        renderer.flush()
+        self.assertEqual(renderer.executed, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+"""render_stateモジュールのテスト."""
+
+import unittest
+
+from render_state import *
+
+
+class TestRenderState(unittest.TestCase):
+
+    def test_canvas_state(self):
+        state = CanvasState()
+        self.assertTrue(state.set_fill_style('rgb(0,0,0)'))
+        self.assertFalse(state.set_fill_style('rgb(0,0,0)'))
+        self.assertTrue(state.set_fill_style('rgb(1,1,1)'))
+        self.assertTrue(state.set_stroke_style('rgb(0,0,0)'))
+        self.assertFalse(state.set_stroke_style('rgb(0,0,0)'))
+        self.assertTrue(state.set_font('10px serif'))
+        self.assertFalse(state.set_font('10px serif'))
+        self.assertEqual(state.change_count, 4)
+        self.assertEqual(state.saved_count, 3)
+
+        # 不明になった後は必ず設定する
+        state.invalidate()
+        self.assertTrue(state.set_fill_style('rgb(1,1,1)'))
+
+        state.reset_counts()
+        self.assertEqual(state.change_count, 0)
+        self.assertEqual(state.saved_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""save_dataモジュールのテスト."""
+
+import unittest
+from array import array
+
+from save_data import *
+
+
+class TestSaveData(unittest.TestCase):
+
+    def test_save_data(self):
+        values = array('d', range(1000))
+        save_data = SaveData({'a': b'abc', 'b': array_to_bytes(values)})
+
+        for compress in (True, False):
+            loaded = SaveData.from_bytes(save_data.to_bytes(compress))
+            self.assertEqual(loaded['a'], b'abc')
+            self.assertEqual(array_from_bytes('d', loaded['b']), values)
+            self.assertEqual(loaded.checksum, save_data.checksum)
+        self.assertLess(len(save_data.to_bytes(True)), len(save_data.to_bytes(False)))
+
+        # 壊れたセーブデータ
+        data = save_data.to_bytes()
+        with self.assertRaises(ValueError):
+            SaveData.from_bytes(data[:-1])
+        with self.assertRaises(ValueError):
+            SaveData.from_bytes(b'XXXX' + data[4:])
+        # 圧縮したセクションが壊れていても、zlibの例外ではなくValueErrorにする
+        for index in (len(data) // 2, len(data) - 1):
+            broken = bytearray(data)
+            broken[index] ^= 0xff
+            with self.assertRaises(ValueError):
+                SaveData.from_bytes(bytes(broken))
+
+        # CRC32が合っていても、展開できなければValueErrorにする
+        payload = struct.pack('<HBI', 1, COMPRESSED_FLAG, 3) + b'a' + b'xyz'
+        header = struct.pack('<4sBBHII', MAGIC, VERSION, 0, 1, 0, zlib.crc32(payload))
+        with self.assertRaises(ValueError):
+            SaveData.from_bytes(header + payload)
+
+    def test_delta(self):
+        base = SaveData({'a': b'a' * 100, 'b': b'b' * 100, 'c': b'c'})
+        current = SaveData({'a': b'a' * 100, 'b': b'B' * 100, 'd': b'd'})
+        self.assertEqual(current.get_changed_sections(base), (['b', 'd'], ['c']))
+
+        delta = current.to_delta_bytes(base, compress=False)
+        self.assertTrue(SaveData.is_delta(delta))
+        self.assertLess(len(delta), len(current.to_bytes(compress=False)))
+
+        loaded = SaveData.from_bytes(delta, base)
+        self.assertEqual(dict(loaded.items()), dict(current.items()))
+
+        # 基にしたセーブデータが違えば読み込まない
+        with self.assertRaises(ValueError):
+            SaveData.from_bytes(delta)
+        with self.assertRaises(ValueError):
+            SaveData.from_bytes(delta, current)
+
+        # 差分の本体が壊れていれば読み込まない
+        broken = bytearray(delta)
+        broken[-1] ^= 0xff
+        with self.assertRaises(ValueError):
+            SaveData.from_bytes(bytes(broken), base)
+
+
+if __name__ == '__main__':
+    unittest.main()
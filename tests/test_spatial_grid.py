@@ -0,0 +1,41 @@
+"""spatial_gridモジュールのテスト."""
+
+import unittest
+
+from spatial_grid import *
+from values import *
+
+
+class TestSpatialGrid(unittest.TestCase):
+
+    def test_query(self):
+        grid = SpatialGrid(cell_size=10)
+        grid.insert('a', Rect(Position(0, 0), Size(15, 15)))
+        grid.insert('b', Rect(Position(12, 12), Size(30, 30)))
+        grid.insert('c', Rect(Position(100, 100), Size(5, 5)))
+        self.assertEqual(len(grid), 3)
+        self.assertIn('a', grid)
+
+        self.assertEqual(grid.query_point(Position(5, 5)), ['a'])
+        self.assertEqual(sorted(grid.query_point(Position(13, 13))), ['a', 'b'])
+        self.assertEqual(grid.query_point(Position(50, 50)), [])
+        self.assertEqual(
+            sorted(grid.query_rect(Rect(Position(0, 0), Size(50, 50)))), ['a', 'b'])
+
+        with self.assertRaises(ValueError):
+            grid.insert('a', Rect(Position(0, 0), Size(1, 1)))
+
+    def test_update(self):
+        grid = SpatialGrid(cell_size=10)
+        grid.insert('a', Rect(Position(0, 0), Size(5, 5)))
+        grid.update('a', Rect(Position(100, 100), Size(5, 5)))
+        self.assertEqual(grid.query_point(Position(1, 1)), [])
+        self.assertEqual(grid.query_point(Position(101, 101)), ['a'])
+
+        grid.remove('a')
+        self.assertEqual(len(grid), 0)
+        self.assertEqual(grid.query_point(Position(101, 101)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""text_cacheモジュールのテスト."""
+
+import unittest
+
+from text_cache import *
+from values import Font, Color
+
+
+def rasterize(text: str, font: Font, color: Color) -> TextSurface:
+    return TextSurface(text, len(text) * 10, 10, 8)
+
+
+class TestTextCache(unittest.TestCase):
+
+    def test_get(self):
+        cache = TextSurfaceCache(rasterize)
+        font = Font(10, 'serif')
+        surface = cache.get('abc', font, Color(0, 0, 0))
+        self.assertEqual(surface.image, 'abc')
+        self.assertIs(cache.get('abc', font, Color(0, 0, 0)), surface)
+        self.assertIsNot(cache.get('abc', font, Color(255, 0, 0)), surface)
+        self.assertIsNot(cache.get('abc', Font(12, 'serif'), Color(0, 0, 0)), surface)
+        self.assertEqual(cache.hit_count, 1)
+        self.assertEqual(cache.miss_count, 3)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.pixel_count, 900)
+
+    def test_evict(self):
+        # 10文字分(1000画素)まで
+        cache = TextSurfaceCache(rasterize, budget_pixels=1000)
+        font = Font(10, 'serif')
+        color = Color(0, 0, 0)
+        a = cache.get('aaaa', font, color)
+        cache.get('bbbb', font, color)
+        # aを使ったので、次に捨てられるのはb
+        cache.get('aaaa', font, color)
+        cache.get('cccc', font, color)
+        self.assertEqual(cache.evicted_count, 1)
+        self.assertIs(cache.get('aaaa', font, color), a)
+        self.assertEqual(cache.pixel_count, 800)
+
+        # 上限より大きいものはキャッシュしない
+        cache.get('d' * 11, font, color)
+        self.assertEqual(len(cache), 2)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.pixel_count, 0)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            TextSurfaceCache(None)
+        with self.assertRaises(ValueError):
+            TextSurfaceCache(rasterize, budget_pixels=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
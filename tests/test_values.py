@@ -1,5 +1,7 @@
 """valuesモジュールのテスト."""
 
+import copy
+import pickle
 import unittest
 
 from values import *
@@ -21,6 +23,75 @@ class TestValues(unittest.TestCase):
             color = Color(-1, -1, -1, -1)
             color = Color(256, 256, 256, 256)
 
+    def test_color_intern(self):
+        color = Color(10, 20, 30)
+        self.assertIs(color, Color(10, 20, 30))
+        self.assertEqual(color, Color(10, 20, 30, 255))
+        self.assertEqual(hash(color), hash(Color(10, 20, 30)))
+        self.assertNotEqual(color, Color(10, 20, 31))
+        self.assertEqual(color.css, 'rgb(10,20,30)')
+        self.assertEqual(Color(10, 20, 30, 0).css, 'rgba(10,20,30,0)')
+
+        with self.assertRaises(AttributeError):
+            color.r = 0
+        with self.assertRaises(ValueError):
+            Color(0, 0, 0, 256)
+
+    def test_font(self):
+        font = Font(size=10, name='serif', bold=True)
+        self.assertIs(font, Font(10, 'serif', True))
+        self.assertEqual(font.css, '10px bold serif')
+        self.assertEqual(Font(12, 'sans-serif').css, '12px sans-serif')
+        self.assertEqual({font: 1}[Font(10, 'serif', True)], 1)
+
+        with self.assertRaises(AttributeError):
+            font.size = 20
+
+    def test_immutable(self):
+        position = Position(10, 20)
+        with self.assertRaises(AttributeError):
+            position.x = 0
+        self.assertFalse(hasattr(position, '__dict__'))
+        self.assertEqual(position, Position(10, 20))
+        self.assertEqual(hash(position), hash(Position(10, 20)))
+        self.assertEqual(str(position), '(10, 20)')
+        self.assertEqual(repr(position), 'Position(x=10, y=20)')
+        self.assertEqual(Position(), Position(0, 0))
+
+        # 型が異なる値とは等しくならない
+        self.assertNotEqual(position, Size(10, 20))
+        self.assertNotEqual(position, (10, 20))
+
+        rect = Rect(position, Size(30, 40))
+        with self.assertRaises(AttributeError):
+            rect.position = Position(0, 0)
+        self.assertEqual(copy.deepcopy(rect), rect)
+        self.assertEqual(pickle.loads(pickle.dumps(rect)), rect)
+
+    def test_rect_construction(self):
+        # 位置と大きさは数値のx、y、width、heightを持っていればよい
+        class Point:
+            x = 10
+            y = 20
+
+        class Extent:
+            width = 30
+            height = 40
+
+        rect = Rect(Point(), Extent())
+        self.assertEqual((rect.left, rect.top, rect.right, rect.bottom), (10, 20, 40, 60))
+        with self.assertRaises(AttributeError):
+            Rect(Position(0, 0), None)
+
+        # 上下左右から作った矩形は、位置と大きさを参照された時に作る
+        rect = Rect._from_edges(10, 20, 40, 60)
+        self.assertEqual(rect, Rect(Position(10, 20), Size(30, 40)))
+        self.assertEqual(hash(rect), hash(Rect(Position(10, 20), Size(30, 40))))
+        self.assertIs(rect.position, rect.position)
+        self.assertEqual(rect.size, Size(30, 40))
+        size = Size(30, 40)
+        self.assertIs(Rect._from_edges(10, 20, 40, 60, size).size, size)
+
     def test_rect(self):
         rect1 = Rect(Position(10, 20), Size(30, 40))
         self.assertEqual(rect1.position, Position(10, 20))
@@ -44,6 +115,11 @@ class TestValues(unittest.TestCase):
         self.assertTrue(rect3.intersects_with_rect(rect1))
         self.assertFalse(rect3.intersects_with_rect(rect2))
 
+        self.assertEqual(rect1.union_with_rect(rect3), rect1)
+        self.assertEqual(rect1.union_with_rect(rect2), Rect(Position(10, 20), Size(50, 60)))
+        self.assertEqual(rect1.clip_with_rect(rect2), Rect(Position(20, 30), Size(20, 30)))
+        self.assertIsNone(rect3.clip_with_rect(rect2))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,16 +1,69 @@
 import unittest
 
+import typing as tp
+
+from headless import HeadlessRenderer
+from input import *
 from view import *
 
 
 class MockRenderer(AbstractRenderer):
-    pass
+
+    @property
+    def size(self) -> Size:
+        return Size(600, 400)
 
 
 class MockImageLoader(AbstractImageLoader):
     pass
 
 
+class CountingRenderer(AbstractRenderer):
+    """描画回数を数えるテスト用の描画クラス."""
+
+    def __init__(self):
+        self.draw_count = 0
+        self.clip_rects: list[Rect] = []
+
+    @property
+    def size(self) -> Size:
+        return Size(600, 400)
+
+    def set_clip(self, rects: tp.Sequence[Rect]) -> None:
+        self.clip_rects = list(rects)
+
+    def draw_rect(self, rect: Rect, color: Color, fill=True) -> None:
+        self.draw_count += 1
+
+    def draw_line(self, start_pos: tuple[int, int], end_pos: tuple[int, int], color: Color) -> None:
+        self.draw_count += 1
+
+    def draw_circle(self, center: tuple[int, int], radius: int, color: Color) -> None:
+        self.draw_count += 1
+
+    def draw_image(self, image, position: Position, size: Size, src_rect: Rect = None) -> None:
+        self.draw_count += 1
+
+    def draw_text(
+            self,
+            text: str,
+            position: tuple[int, int],
+            font: Font,
+            color: Color,
+            cached: bool = False) -> None:
+        self.draw_count += 1
+
+
+class LoadedImageLoader(AbstractImageLoader):
+    """読み込み済みのテスト用画像読み込みクラス."""
+
+    def is_loading(self) -> bool:
+        return False
+
+    def get_image(self, file_name: str) -> object:
+        return file_name
+
+
 class TestView(unittest.TestCase):
 
     def test_font(self):
@@ -36,6 +89,64 @@ class TestView(unittest.TestCase):
         finally:
             self.assertTrue(result)
 
+    def test_dirty_region(self):
+        model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None)
+        renderer = CountingRenderer()
+        view = GameView(model, renderer, LoadedImageLoader([]), log_func=lambda mes: None)
+
+        # 初回は全体を描画する
+        view.draw()
+        self.assertGreater(renderer.draw_count, 0)
+        self.assertEqual(renderer.clip_rects, [Rect(Position(0, 0), Size(600, 400))])
+
+        # 変化がなければ何も描画しない
+        renderer.draw_count = 0
+        view.draw()
+        self.assertEqual(renderer.draw_count, 0)
+
+        # マウス移動で画像の移動前後の範囲だけ描き直す
+        view.operate(OperationParam(
+            code=VirtualKey.MouseMove,
+            state=InputState.Press,
+            position=Position(300, 300)))
+        view.draw()
+        self.assertGreater(renderer.draw_count, 0)
+        self.assertEqual(len(renderer.clip_rects), 2)
+        self.assertIn(Rect(Position(300, 300), Size(32, 32)), renderer.clip_rects)
+
+        # ボタンの文字列を変えるとボタンの範囲を描き直す
+        button = view._buttons[3]
+        button.text = 'Changed'
+        view.draw()
+        self.assertEqual(renderer.clip_rects, [button.rect])
+
+    def test_layered(self):
+        model = GameModel(world_size=Size(600, 400), log_func=lambda mes: None)
+        view = GameView(
+            model, HeadlessRenderer(), LoadedImageLoader([]),
+            log_func=lambda mes: None, layered=True)
+        layers = view._layers
+
+        def redraw_counts() -> list[int]:
+            return [layer.redraw_count for layer in layers]
+
+        view.draw()
+        self.assertEqual(redraw_counts(), [1, 1, 1, 1])
+
+        # マウス移動では画像とデバッグ表示のレイヤーだけ描き直す
+        view.operate(OperationParam(
+            code=VirtualKey.MouseMove,
+            state=InputState.Press,
+            position=Position(300, 300)))
+        view.draw()
+        self.assertEqual(redraw_counts(), [1, 2, 1, 2])
+
+        # ボタンが変化したらボタンのレイヤーを描き直す
+        view._buttons[0].text = 'Changed'
+        view.draw()
+        self.assertEqual(redraw_counts(), [1, 2, 2, 2])
+        self.assertEqual(layers.composite_count, 3)
+
 
 if __name__ == '__main__':
     unittest.main()
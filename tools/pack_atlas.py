@@ -0,0 +1,53 @@
+"""画像をアトラスにまとめる.
+
+画像ファイルを1枚のアトラス画像と目録(JSON)にまとめる。Pillowが必要。
+
+    python tools/pack_atlas.py -o src/atlas.png src/image.png ...
+
+目録はアトラス画像と同じ名前で拡張子を.jsonにしたファイルに書き出す。
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from atlas import AtlasPacker  # noqa: E402
+from values import Size  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('images', nargs='+', help='まとめる画像ファイル')
+    parser.add_argument('-o', '--output', required=True, help='アトラス画像の出力先(.png)')
+    parser.add_argument('--max-width', type=int, default=2048, help='アトラスの最大幅')
+    parser.add_argument('--padding', type=int, default=1, help='画像同士の間隔')
+    args = parser.parse_args()
+
+    try:
+        from PIL import Image
+    except ImportError:
+        sys.exit('Pillow is required: pip install Pillow')
+
+    # 名前はファイル名。画像読み込みクラスに渡すファイル名と合わせる
+    images = {os.path.basename(path): Image.open(path).convert('RGBA') for path in args.images}
+    packer = AtlasPacker(args.max_width, args.padding)
+    for (name, image) in images.items():
+        packer.add(name, Size(image.width, image.height))
+    manifest = packer.pack(os.path.basename(args.output))
+
+    sheet = Image.new('RGBA', (manifest.size.width, manifest.size.height))
+    for (name, image) in images.items():
+        rect = manifest.get(name)
+        sheet.paste(image, (rect.position.x, rect.position.y))
+    sheet.save(args.output)
+
+    manifest_file = os.path.splitext(args.output)[0] + '.json'
+    with open(manifest_file, 'w', encoding='utf-8') as file:
+        file.write(manifest.to_json())
+    print(f'{len(manifest)} images -> {args.output} {manifest.size.width}x{manifest.size.height}')
+
+
+if __name__ == '__main__':
+    main()